@@ -7,15 +7,157 @@ Production-ready tool for analyzing multi-year contracts with up-front payments.
 Calculates present value, allocates to performance obligations, and generates
 journal entries using effective interest method.
 
+The calculation core imports the standard library only; pandas, NumPy and
+openpyxl are loaded on first use by the export and batch modules.
+
 Author: Dan deCoen, Controller
 Date: December 2025
 """
 
-import pandas as pd
+import calendar
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 import json
 
+from asc606_instrument import instrumented
+
+
+# Journal entry kinds: (description, debit account, credit account)
+JE_CASH_RECEIPT, JE_LICENSE, JE_INTEREST, JE_SUPPORT = range(4)
+JE_KINDS = (
+    ('Initial cash receipt', 'Cash', 'Contract Liability'),
+    ('License revenue recognition (point in time)', 'Contract Liability', 'License Revenue'),
+    ('Interest income - Year {year}', 'Contract Liability', 'Interest Income'),
+    ('Support revenue - Year {year}', 'Contract Liability', 'Support Revenue'),
+)
+# GL accounts the entries post to; exports refer to them by position
+ACCOUNTS = ('Cash', 'Contract Liability', 'License Revenue', 'Interest Income', 'Support Revenue')
+
+
+def journal_entry(entry_num: int, date: datetime, kind: int, amount: float, year: int = 0) -> Dict:
+    """Build one balanced journal entry dict for the given entry kind"""
+    description, debit_account, credit_account = JE_KINDS[kind]
+    return {
+        'entry_num': entry_num,
+        'date': date,
+        'description': description.format(year=year),
+        'debits': [{'account': debit_account, 'amount': amount}],
+        'credits': [{'account': credit_account, 'amount': amount}]
+    }
+
+
+class DiscountFactorCache:
+    """
+    Bounded LRU table of discount factors 1 / (1 + rate) ** years
+
+    Keyed by (rate, years, day-count mode). Most books use a handful of rates
+    and integer year offsets, so PV becomes a lookup plus one multiply.
+    """
+    
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._factors = OrderedDict()
+    
+    def get(self, rate: float, years: float, mode: str) -> float:
+        """Return the discount factor, computing and caching it on a miss"""
+        key = (rate, years, mode)
+        factor = self._factors.get(key)
+        if factor is not None:
+            self.hits += 1
+            self._factors.move_to_end(key)
+            return factor
+        
+        self.misses += 1
+        factor = 1 / ((1 + rate) ** years)
+        self._factors[key] = factor
+        if len(self._factors) > self.maxsize:
+            self._factors.popitem(last=False)
+        return factor
+    
+    def stats(self) -> Dict:
+        """Hit/miss statistics for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._factors),
+            'maxsize': self.maxsize
+        }
+    
+    def clear(self):
+        """Drop all cached factors and reset statistics"""
+        self._factors.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared by every analyzer in this process
+DISCOUNT_FACTORS = DiscountFactorCache()
+
+# Day-count conventions for exact-day discounting (use_integer_years=False).
+# ACT/365.25 is the original basis; 30/360 is the US bond basis and ACT/ACT
+# the ISDA method. asc606_dates computes the same fractions for whole books.
+DAY_COUNTS = ('ACT/365.25', 'ACT/365F', 'ACT/360', '30/360', 'ACT/ACT')
+_DAY_BASIS = {'ACT/365.25': 365.25, 'ACT/365F': 365, 'ACT/360': 360}
+
+# Point of each service period discounted back to the payment date
+DISCOUNT_POINTS = ('end', 'midpoint')
+
+
+def check_discounting(day_count: str, discount_to: str):
+    """Raise ValueError for an unknown day count or discount point"""
+    if day_count not in DAY_COUNTS:
+        raise ValueError(f"day_count must be one of {DAY_COUNTS}, got {day_count!r}")
+    if discount_to not in DISCOUNT_POINTS:
+        raise ValueError(f"discount_to must be one of {DISCOUNT_POINTS}, got {discount_to!r}")
+
+
+def _days(start: datetime, end: datetime) -> float:
+    return (end - start).total_seconds() / 86400
+
+
+def year_fraction(start: datetime, end: datetime, day_count: str = 'ACT/365.25') -> float:
+    """
+    Years from start to end under a DAY_COUNTS convention
+    
+    ACT conventions count fractional days, so a service midpoint at noon
+    counts half a day. 30/360 uses calendar dates only.
+    """
+    if day_count == '30/360':
+        d1 = min(start.day, 30)
+        d2 = 30 if end.day == 31 and d1 == 30 else end.day
+        return (360 * (end.year - start.year) + 30 * (end.month - start.month) + d2 - d1) / 360
+    if day_count == 'ACT/ACT':
+        # Days falling in each calendar year over that year's length
+        y1, y2 = start.year, end.year
+        return (_days(start, datetime(y1 + 1, 1, 1)) / (365 + calendar.isleap(y1)) + (y2 - y1 - 1)
+                + _days(datetime(y2, 1, 1), end) / (365 + calendar.isleap(y2)))
+    return _days(start, end) / _DAY_BASIS[day_count]
+
+# Analysis stages in dependency order; a stale stage makes every later one stale
+STAGES = ('present_value', 'allocation', 'schedule', 'journal_entries', 'summary')
+_PV, _ALLOCATION, _SCHEDULE, _JOURNAL, _SUMMARY = range(len(STAGES))
+_UP_TO_DATE = len(STAGES)
+
+# Interest allocation in build_amortization_schedule(): 'proportional' spreads
+# the financing component by opening balance, 'effective_interest' solves a
+# level periodic yield (asc606_effective_interest, requires NumPy)
+SCHEDULE_METHODS = ('proportional', 'effective_interest')
+
+# Results only calculate_present_value() produces (not set with override_pv)
+_PV_ROW_RESULTS = ('pv_analysis', 'total_stated')
+
+# asc606_compact converters for row results stored with compact_results=True
+_COMPACTORS = {
+    'pv_analysis': 'compact_pv_analysis',
+    'amortization_schedule': 'compact_schedule',
+    'journal_entries': 'compact_journal_entries',
+}
+
 
 class ASC606FinancingAnalyzer:
     """
@@ -40,9 +182,14 @@ class ASC606FinancingAnalyzer:
         results = analyzer.analyze()
         analyzer.export_to_excel('output.xlsx')
         analyzer.export_journal_entries('journal_entries.csv')
+        
+        # What-if edits: analyze() recomputes only the affected stages and rows
+        analyzer.update_period(2, stated_amount=450_000)
+        analyzer.update_terms(discount_rate=0.065)
+        results = analyzer.analyze()
     """
     
-    def __init__(self, contract_data: Dict, discount_rate: float = 0.06, license_pct: float = 0.20, override_pv: Optional[float] = None, use_integer_years: bool = True):
+    def __init__(self, contract_data: Dict, discount_rate: float = 0.06, license_pct: float = 0.20, override_pv: Optional[float] = None, use_integer_years: bool = True, compact_results: bool = False, schedule_method: str = 'proportional', day_count: str = 'ACT/365.25', discount_to: str = 'end'):
         """
         Initialize analyzer
         
@@ -52,13 +199,26 @@ class ASC606FinancingAnalyzer:
             license_pct: Percentage allocated to license (default 20%)
             override_pv: Optional - directly specify PV instead of calculating
             use_integer_years: If True, use 1, 2, 3... years instead of exact day count
+            compact_results: If True, store row results as NumPy-backed CompactRecords
+            schedule_method: 'proportional' or 'effective_interest' (level yield)
+            day_count: Day-count convention for exact day count (see DAY_COUNTS)
+            discount_to: Discount each period from its 'end' or its 'midpoint'
+                (integer years become 0.5, 1.5, 2.5...)
         """
+        if schedule_method not in SCHEDULE_METHODS:
+            raise ValueError(f"schedule_method must be one of {SCHEDULE_METHODS}, got {schedule_method!r}")
+        check_discounting(day_count, discount_to)
+        
         self.contract_data = contract_data
         self.discount_rate = discount_rate
         self.license_pct = license_pct
         self.support_pct = 1 - license_pct
         self.override_pv = override_pv
         self.use_integer_years = use_integer_years
+        self.compact_results = compact_results
+        self.schedule_method = schedule_method
+        self.day_count = day_count
+        self.discount_to = discount_to
         
         # Parse dates
         self.payment_date = self._parse_date(contract_data['payment_date'])
@@ -73,50 +233,100 @@ class ASC606FinancingAnalyzer:
             })
         
         self.results = {}
+        self._analyzed_inputs = None
     
     def _parse_date(self, date_str: str) -> datetime:
         """Parse date string to datetime"""
+        # fromisoformat is several times faster; strptime rejects (and reports) anything else
+        if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+            return datetime.fromisoformat(date_str)
         return datetime.strptime(date_str, '%Y-%m-%d')
     
-    def calculate_present_value(self) -> Dict:
-        """Calculate PV of each period and total financing component"""
-        pv_analysis = []
-        
-        for i, period in enumerate(self.periods, 1):
-            # Determine discount period
-            if self.use_integer_years:
-                # Use integer years (1, 2, 3, 4, 5...) for cleaner calculation
-                years_diff = float(i)
-            else:
-                # Calculate exact time from payment to END of service period
-                days_diff = (period['end'] - self.payment_date).days
-                years_diff = days_diff / 365.25
-            
-            # Present value calculation
-            stated = period['stated_amount']
-            pv = stated / ((1 + self.discount_rate) ** years_diff)
-            financing = stated - pv
-            
-            # Calculate midpoint for reference
-            service_midpoint = period['start'] + (period['end'] - period['start']) / 2
-            
-            pv_analysis.append({
-                'period': i,
-                'start': period['start'],
-                'end': period['end'],
-                'service_midpoint': service_midpoint,
-                'years_from_payment': years_diff,
-                'stated_amount': stated,
-                'present_value': pv,
-                'financing_component': financing
-            })
+    def _publish(self, key: str, rows: List[Dict]):
+        """Store row results, compacting them if requested"""
+        if self.compact_results:
+            import asc606_compact
+            rows = getattr(asc606_compact, _COMPACTORS[key])(rows)
+        self.results[key] = rows
+    
+    def _revise(self, key: str, changes: Dict[int, Dict]):
+        """
+        Replace fields of some published rows, leaving the previous results untouched
+        
+        Args:
+            key: Row results key, e.g. 'journal_entries'
+            changes: Row index -> {field: new value}
+        """
+        rows = self.results[key]
+        if self.compact_results:
+            import asc606_compact
+            self.results[key] = asc606_compact.revise_records(rows, changes)
+            return
+        rows = list(rows)
+        for index, fields in changes.items():
+            rows[index] = {**rows[index], **fields}
+        self.results[key] = rows
+    
+    def _pv_row(self, i: int, period: Dict, mode: str) -> Dict:
+        """PV analysis row for period i (1-based)"""
+        service_midpoint = period['start'] + (period['end'] - period['start']) / 2
+        midpoint = self.discount_to == 'midpoint'
+        
+        # Determine discount period
+        if self.use_integer_years:
+            # Use integer years (1, 2, 3, 4, 5...) for cleaner calculation
+            years_diff = i - 0.5 if midpoint else float(i)
+        elif not midpoint:
+            # Exact time from payment to END of service period
+            years_diff = year_fraction(self.payment_date, period['end'], self.day_count)
+        elif self.day_count == '30/360':
+            # 30/360 has no time of day: average the start and end fractions
+            years_diff = (year_fraction(self.payment_date, period['start'], self.day_count)
+                          + year_fraction(self.payment_date, period['end'], self.day_count)) / 2
+        else:
+            years_diff = year_fraction(self.payment_date, service_midpoint, self.day_count)
+        
+        # Present value calculation
+        stated = period['stated_amount']
+        pv = stated * DISCOUNT_FACTORS.get(self.discount_rate, years_diff, mode)
+        financing = stated - pv
+        
+        return {
+            'period': i,
+            'start': period['start'],
+            'end': period['end'],
+            'service_midpoint': service_midpoint,
+            'years_from_payment': years_diff,
+            'stated_amount': stated,
+            'present_value': pv,
+            'financing_component': financing
+        }
+    
+    @instrumented('analyzer.calculate_present_value', rows=lambda self, _: len(self.results['pv_analysis']))
+    def calculate_present_value(self, periods: Optional[Iterable[int]] = None) -> Dict:
+        """
+        Calculate PV of each period and total financing component
+        
+        Args:
+            periods: Optional 0-based period indexes to recalculate; other rows
+                are reused from the previous run. Default recalculates all.
+        """
+        mode = 'integer' if self.use_integer_years else self.day_count.lower()
+        pv_analysis = self.results.get('pv_analysis')
+        
+        if periods is None or pv_analysis is None or len(pv_analysis) != len(self.periods):
+            pv_analysis = [self._pv_row(i, period, mode) for i, period in enumerate(self.periods, 1)]
+            self._publish('pv_analysis', pv_analysis)
+        else:
+            self._revise('pv_analysis', {index: self._pv_row(index + 1, self.periods[index], mode)
+                                         for index in periods})
+            pv_analysis = self.results['pv_analysis']
         
         # Calculate totals
         total_stated = sum(p['stated_amount'] for p in pv_analysis)
         total_pv = sum(p['present_value'] for p in pv_analysis)
         total_financing = sum(p['financing_component'] for p in pv_analysis)
         
-        self.results['pv_analysis'] = pv_analysis
         self.results['total_stated'] = total_stated
         self.results['total_pv'] = total_pv
         self.results['financing_component'] = total_financing
@@ -124,6 +334,7 @@ class ASC606FinancingAnalyzer:
         
         return self.results
     
+    @instrumented('analyzer.allocate_transaction_price')
     def allocate_transaction_price(self):
         """Allocate adjusted transaction price to license and support"""
         if 'total_pv' not in self.results:
@@ -142,6 +353,7 @@ class ASC606FinancingAnalyzer:
         self.results['support_total'] = total_pv * self.support_pct
         self.results['annual_support'] = self.results['support_total'] / len(self.periods)
     
+    @instrumented('analyzer.build_amortization_schedule', rows=lambda _, schedule: len(schedule))
     def build_amortization_schedule(self) -> List[Dict]:
         """Build effective interest amortization schedule"""
         if 'license_revenue' not in self.results:
@@ -169,20 +381,26 @@ class ASC606FinancingAnalyzer:
             'ending_liability': ending
         })
         
-        # Calculate opening balances for interest allocation
-        opening_balances = []
-        current = ending
-        
-        for _ in range(len(self.periods)):
-            opening_balances.append(current)
-            current = current - annual_support
-        
-        # Allocate interest proportionally
-        total_weighted = sum(opening_balances)
-        interest_by_year = [
-            financing_component * (bal / total_weighted)
-            for bal in opening_balances
-        ]
+        if self.schedule_method == 'effective_interest':
+            interest_by_year = self._level_yield_interest(ending, annual_support, financing_component)
+        else:
+            for key in ('effective_rate', 'solver_iterations', 'solver_converged'):
+                self.results.pop(key, None)
+            
+            # Calculate opening balances for interest allocation
+            opening_balances = []
+            current = ending
+            
+            for _ in range(len(self.periods)):
+                opening_balances.append(current)
+                current = current - annual_support
+            
+            # Allocate interest proportionally
+            total_weighted = sum(opening_balances)
+            interest_by_year = [
+                financing_component * (bal / total_weighted)
+                for bal in opening_balances
+            ]
         
         # Build years 1-N
         opening = ending
@@ -202,9 +420,20 @@ class ASC606FinancingAnalyzer:
             
             opening = ending
         
-        self.results['amortization_schedule'] = schedule
-        return schedule
+        self._publish('amortization_schedule', schedule)
+        return self.results['amortization_schedule']
     
+    def _level_yield_interest(self, carrying: float, annual_support: float, financing_component: float) -> List[float]:
+        """Interest per year at the solved effective rate (see asc606_effective_interest)"""
+        from asc606_effective_interest import level_yield_interest
+        
+        interest, solution = level_yield_interest([carrying], [annual_support], [financing_component], [len(self.periods)])
+        self.results['effective_rate'] = float(solution['effective_rate'][0])
+        self.results['solver_iterations'] = int(solution['iterations'][0])
+        self.results['solver_converged'] = bool(solution['converged'][0])
+        return interest.tolist()
+    
+    @instrumented('analyzer.generate_journal_entries', rows=lambda _, entries: len(entries))
     def generate_journal_entries(self) -> List[Dict]:
         """Generate complete journal entries"""
         if 'amortization_schedule' not in self.results:
@@ -216,78 +445,159 @@ class ASC606FinancingAnalyzer:
         entries = []
         
         # Entry 1: Initial cash receipt
-        entries.append({
-            'entry_num': 1,
-            'date': self.payment_date,
-            'description': 'Initial cash receipt',
-            'debits': [{'account': 'Cash', 'amount': cash_received}],
-            'credits': [{'account': 'Contract Liability', 'amount': cash_received}]
-        })
+        entries.append(journal_entry(1, self.payment_date, JE_CASH_RECEIPT, cash_received))
         
         # Entry 2: License revenue
         license_row = schedule[0]
-        entries.append({
-            'entry_num': 2,
-            'date': license_row['date'],
-            'description': 'License revenue recognition (point in time)',
-            'debits': [{'account': 'Contract Liability', 'amount': license_row['revenue_recognized']}],
-            'credits': [{'account': 'License Revenue', 'amount': license_row['revenue_recognized']}]
-        })
+        entries.append(journal_entry(2, license_row['date'], JE_LICENSE, license_row['revenue_recognized']))
         
         # Entries 3+: Annual support and interest
         entry_num = 3
         for i in range(1, len(schedule)):
             row = schedule[i]
-            
-            # Interest income
-            entries.append({
-                'entry_num': entry_num,
-                'date': row['date'],
-                'description': f'Interest income - Year {i}',
-                'debits': [{'account': 'Contract Liability', 'amount': row['interest_income']}],
-                'credits': [{'account': 'Interest Income', 'amount': row['interest_income']}]
-            })
-            entry_num += 1
-            
-            # Support revenue
-            entries.append({
-                'entry_num': entry_num,
-                'date': row['date'],
-                'description': f'Support revenue - Year {i}',
-                'debits': [{'account': 'Contract Liability', 'amount': row['revenue_recognized']}],
-                'credits': [{'account': 'Support Revenue', 'amount': row['revenue_recognized']}]
-            })
-            entry_num += 1
+            entries.append(journal_entry(entry_num, row['date'], JE_INTEREST, row['interest_income'], year=i))
+            entries.append(journal_entry(entry_num + 1, row['date'], JE_SUPPORT, row['revenue_recognized'], year=i))
+            entry_num += 2
         
-        self.results['journal_entries'] = entries
-        return entries
+        self._publish('journal_entries', entries)
+        return self.results['journal_entries']
     
-    def analyze(self) -> Dict:
-        """Run complete analysis"""
-        # If override PV provided, use it directly
-        if self.override_pv:
-            self.results['total_pv'] = self.override_pv
-            self.results['financing_component'] = self.contract_data['cash_received'] - self.override_pv
-            self.results['financing_pct'] = (self.results['financing_component'] / self.contract_data['cash_received']) * 100
-        else:
-            self.calculate_present_value()
-        
-        self.allocate_transaction_price()
-        self.build_amortization_schedule()
-        self.generate_journal_entries()
-        
-        # Add summary
-        self.results['summary'] = {
-            'customer': self.contract_data['customer'],
-            'cash_received': self.contract_data['cash_received'],
-            'transaction_price': self.results['total_pv'],
-            'financing_component': self.results['financing_component'],
-            'financing_pct': self.results['financing_pct'],
-            'discount_rate': self.discount_rate,
-            'license_pct': self.license_pct * 100,
-            'support_pct': self.support_pct * 100
+    def update_period(self, index: int, start: Optional[str] = None, end: Optional[str] = None, stated_amount: Optional[float] = None):
+        """
+        Edit one service period; the next analyze() recomputes only what it affects
+        
+        Args:
+            index: 0-based period index
+            start: New start date (YYYY-MM-DD)
+            end: New end date (YYYY-MM-DD)
+            stated_amount: New stated amount
+        """
+        period = dict(self.periods[index])
+        if start is not None:
+            period['start'] = self._parse_date(start)
+        if end is not None:
+            period['end'] = self._parse_date(end)
+        if stated_amount is not None:
+            period['stated_amount'] = stated_amount
+        self.periods[index] = period
+    
+    def update_terms(self, discount_rate: Optional[float] = None, license_pct: Optional[float] = None, override_pv: Optional[float] = None):
+        """Change contract-wide terms; the next analyze() recomputes only what they affect"""
+        if discount_rate is not None:
+            self.discount_rate = discount_rate
+        if license_pct is not None:
+            self.license_pct = license_pct
+            self.support_pct = 1 - license_pct
+        if override_pv is not None:
+            self.override_pv = override_pv or None
+    
+    def _input_snapshot(self) -> Dict:
+        """Inputs each stage depends on, for change detection between runs"""
+        cash_received = self.contract_data['cash_received']
+        return {
+            'present_value': (self.discount_rate, self.override_pv, self.use_integer_years, self.day_count,
+                              self.discount_to, self.payment_date, cash_received if self.override_pv else None),
+            'allocation': (self.license_pct, self.support_pct),
+            'schedule': (cash_received, self.schedule_method),
+            'summary': (self.contract_data['customer'],),
+            'periods': [(p['start'], p['end'], p['stated_amount']) for p in self.periods],
         }
+    
+    def _stale_inputs(self, current: Dict):
+        """
+        Compare inputs with the last analyze() run
+        
+        Returns:
+            (first stale stage, PV rows to recalculate, rows whose end date
+            moved without changing any amount)
+        """
+        previous = self._analyzed_inputs
+        if (previous is None or 'summary' not in self.results
+                or previous['present_value'] != current['present_value']
+                or len(previous['periods']) != len(current['periods'])):
+            return _PV, None, set()
+        
+        stale = _UP_TO_DATE
+        if previous['allocation'] != current['allocation']:
+            stale = min(stale, _ALLOCATION)
+        if previous['schedule'] != current['schedule']:
+            stale = min(stale, _SCHEDULE)
+        if previous['summary'] != current['summary']:
+            stale = min(stale, _SUMMARY)
+        
+        pv_rows, date_rows = set(), set()
+        for i, (old, new) in enumerate(zip(previous['periods'], current['periods'])):
+            if old == new:
+                continue
+            pv_rows.add(i)
+            dates_discounted = not self.use_integer_years and (
+                old[1] != new[1] or (self.discount_to == 'midpoint' and old[0] != new[0]))
+            amount_changed = old[2] != new[2] or dates_discounted
+            if amount_changed and not self.override_pv:
+                stale = min(stale, _ALLOCATION)
+            elif old[1] != new[1]:
+                date_rows.add(i)
+        
+        return stale, pv_rows, date_rows
+    
+    def _update_period_dates(self, rows: Iterable[int]):
+        """Move schedule rows and their journal entries to new period end dates"""
+        schedule, entries = {}, {}
+        for i in rows:
+            end = {'date': self.periods[i]['end']}
+            schedule[i + 1] = end
+            entries[2 * i + 2] = entries[2 * i + 3] = end
+        self._revise('amortization_schedule', schedule)
+        self._revise('journal_entries', entries)
+    
+    @instrumented('analyzer.analyze')
+    def analyze(self) -> Dict:
+        """
+        Run complete analysis
+        
+        Repeat calls recompute only the stages (and PV rows) whose inputs
+        changed since the last run; an unchanged analyzer returns immediately.
+        """
+        current = self._input_snapshot()
+        stale, pv_rows, date_rows = self._stale_inputs(current)
         
+        if stale <= _PV:
+            # If override PV provided, use it directly
+            if self.override_pv:
+                # PV rows of an earlier calculated run do not apply to an override
+                for key in _PV_ROW_RESULTS:
+                    self.results.pop(key, None)
+                self.results['total_pv'] = self.override_pv
+                self.results['financing_component'] = self.contract_data['cash_received'] - self.override_pv
+                self.results['financing_pct'] = (self.results['financing_component'] / self.contract_data['cash_received']) * 100
+            else:
+                self.calculate_present_value()
+        elif pv_rows and not self.override_pv:
+            self.calculate_present_value(periods=pv_rows)
+        
+        if stale <= _ALLOCATION:
+            self.allocate_transaction_price()
+        if stale <= _SCHEDULE:
+            self.build_amortization_schedule()
+        if stale <= _JOURNAL:
+            self.generate_journal_entries()
+        elif date_rows:
+            self._update_period_dates(date_rows)
+        
+        if stale <= _SUMMARY:
+            # Add summary
+            self.results['summary'] = {
+                'customer': self.contract_data['customer'],
+                'cash_received': self.contract_data['cash_received'],
+                'transaction_price': self.results['total_pv'],
+                'financing_component': self.results['financing_component'],
+                'financing_pct': self.results['financing_pct'],
+                'discount_rate': self.discount_rate,
+                'license_pct': self.license_pct * 100,
+                'support_pct': self.support_pct * 100
+            }
+        
+        self._analyzed_inputs = current
         return self.results
     
     def print_summary(self):
@@ -305,6 +615,8 @@ class ASC606FinancingAnalyzer:
         print(f"Transaction Price (PV):  ${s['transaction_price']:,.2f}")
         print(f"Financing Component:     ${s['financing_component']:,.2f} ({s['financing_pct']:.2f}%)")
         print(f"\nDiscount Rate:           {s['discount_rate']*100:.1f}%")
+        if 'effective_rate' in self.results:
+            print(f"Effective Interest Rate: {self.results['effective_rate']*100:.4f}% per period")
         print(f"License Allocation:      {s['license_pct']:.0f}%")
         print(f"Support Allocation:      {s['support_pct']:.0f}%")
         
@@ -349,244 +661,43 @@ class ASC606FinancingAnalyzer:
     
     def export_to_excel(self, filename: str):
         """Export complete analysis to Excel"""
-        if 'amortization_schedule' not in self.results:
+        from asc606_export import write_analysis_workbook
+        
+        if 'summary' not in self.results:
             self.analyze()
         
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            # Summary sheet
-            summary = self.results['summary']
-            summary_data = {
-                'Metric': [
-                    'Customer',
-                    'Cash Received',
-                    'Transaction Price (PV)',
-                    'Financing Component',
-                    'Financing %',
-                    'Discount Rate',
-                    'License Allocation %',
-                    'Support Allocation %'
-                ],
-                'Value': [
-                    summary['customer'],
-                    f"${summary['cash_received']:,.2f}",
-                    f"${summary['transaction_price']:,.2f}",
-                    f"${summary['financing_component']:,.2f}",
-                    f"{summary['financing_pct']:.2f}%",
-                    f"{summary['discount_rate']*100:.1f}%",
-                    f"{summary['license_pct']:.0f}%",
-                    f"{summary['support_pct']:.0f}%"
-                ]
-            }
-            df_summary = pd.DataFrame(summary_data)
-            df_summary.to_excel(writer, sheet_name='Summary', index=False)
-            
-            # Amortization schedule
-            schedule_data = []
-            for row in self.results['amortization_schedule']:
-                schedule_data.append({
-                    'Period': row['period'],
-                    'Date': row['date'].strftime('%Y-%m-%d'),
-                    'Opening Liability': row['opening_liability'],
-                    'Interest Income': row['interest_income'],
-                    'Revenue Recognized': row['revenue_recognized'],
-                    'Ending Liability': row['ending_liability']
-                })
-            df_schedule = pd.DataFrame(schedule_data)
-            df_schedule.to_excel(writer, sheet_name='Amortization Schedule', index=False)
-            
-            # Journal entries
-            je_data = []
-            for entry in self.results['journal_entries']:
-                je_data.append({
-                    'Entry #': entry['entry_num'],
-                    'Date': entry['date'].strftime('%Y-%m-%d'),
-                    'Description': entry['description'],
-                    'Account': '',
-                    'Debit': '',
-                    'Credit': ''
-                })
-                
-                for debit in entry['debits']:
-                    je_data.append({
-                        'Entry #': '', 'Date': '', 'Description': '',
-                        'Account': debit['account'],
-                        'Debit': debit['amount'],
-                        'Credit': ''
-                    })
-                
-                for credit in entry['credits']:
-                    je_data.append({
-                        'Entry #': '', 'Date': '', 'Description': '',
-                        'Account': credit['account'],
-                        'Debit': '',
-                        'Credit': credit['amount']
-                    })
-                
-                je_data.append({'Entry #': '', 'Date': '', 'Description': '', 'Account': '', 'Debit': '', 'Credit': ''})
-            
-            df_je = pd.DataFrame(je_data)
-            df_je.to_excel(writer, sheet_name='Journal Entries', index=False)
+        write_analysis_workbook(filename, self.results)
         
         print(f"\n✓ Exported to: {filename}")
     
     def export_journal_entries_csv(self, filename: str):
         """Export journal entries in CSV format for NetSuite import"""
+        from asc606_export import write_journal_entries_csv
+        
         if 'journal_entries' not in self.results:
             self.analyze()
         
-        csv_data = []
-        
-        for entry in self.results['journal_entries']:
-            date_str = entry['date'].strftime('%m/%d/%Y')
-            
-            for debit in entry['debits']:
-                csv_data.append({
-                    'Date': date_str,
-                    'Account': debit['account'],
-                    'Debit': debit['amount'],
-                    'Credit': '',
-                    'Memo': entry['description']
-                })
-            
-            for credit in entry['credits']:
-                csv_data.append({
-                    'Date': date_str,
-                    'Account': credit['account'],
-                    'Debit': '',
-                    'Credit': credit['amount'],
-                    'Memo': entry['description']
-                })
-        
-        df = pd.DataFrame(csv_data)
-        df.to_csv(filename, index=False)
+        write_journal_entries_csv(filename, self, contract_columns=False)
         
         print(f"✓ Exported journal entries to: {filename}")
     
     def export_to_excel_buffer(self, buffer):
         """Export analysis to Excel file in a BytesIO buffer for web API"""
-        if not self.results:
+        from asc606_export import write_analysis_workbook
+        
+        if 'summary' not in self.results:
             self.analyze()
         
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            # Summary sheet
-            summary_data = {
-                'Metric': [
-                    'Customer',
-                    'Cash Received',
-                    'Stated Contract Value',
-                    'Present Value',
-                    'Financing Component',
-                    'Financing %',
-                    '',
-                    'License Allocation %',
-                    'License Revenue',
-                    'License Financing',
-                    '',
-                    'Support Allocation %',
-                    'Support Revenue',
-                    'Support Financing',
-                    '',
-                    'Discount Rate',
-                    'Is Significant?'
-                ],
-                'Value': [
-                    self.contract_data['customer'],
-                    self.contract_data['cash_received'],
-                    self.results['stated_total'],
-                    self.results['present_value'],
-                    self.results['financing_component'],
-                    f"{self.results['financing_percentage']:.2%}",
-                    '',
-                    f"{self.license_pct:.0%}",
-                    self.results['license_revenue'],
-                    self.results['license_financing'],
-                    '',
-                    f"{self.support_pct:.0%}",
-                    self.results['support_revenue'],
-                    self.results['support_financing'],
-                    '',
-                    f"{self.discount_rate:.1%}",
-                    'YES' if self.results['is_significant'] else 'NO'
-                ]
-            }
-            df_summary = pd.DataFrame(summary_data)
-            df_summary.to_excel(writer, sheet_name='Summary', index=False)
-            
-            # PV Analysis
-            df_pv = pd.DataFrame(self.results['pv_analysis'])
-            df_pv.to_excel(writer, sheet_name='PV Analysis', index=False)
-            
-            # License Schedule
-            df_lic = pd.DataFrame(self.results['license_schedule'])
-            df_lic.to_excel(writer, sheet_name='License Schedule', index=False)
-            
-            # Support Schedule
-            df_sup = pd.DataFrame(self.results['support_schedule'])
-            df_sup.to_excel(writer, sheet_name='Support Schedule', index=False)
-            
-            # Journal Entries
-            je_data = []
-            for entry in self.results['journal_entries']:
-                je_data.append({
-                    'Entry #': entry['entry_num'],
-                    'Date': entry['date'].strftime('%Y-%m-%d'),
-                    'Description': entry['description'],
-                    'Account': '',
-                    'Debit': '',
-                    'Credit': ''
-                })
-                
-                for debit in entry['debits']:
-                    je_data.append({
-                        'Entry #': '', 'Date': '', 'Description': '',
-                        'Account': debit['account'],
-                        'Debit': debit['amount'],
-                        'Credit': ''
-                    })
-                
-                for credit in entry['credits']:
-                    je_data.append({
-                        'Entry #': '', 'Date': '', 'Description': '',
-                        'Account': credit['account'],
-                        'Debit': '',
-                        'Credit': credit['amount']
-                    })
-                
-                je_data.append({'Entry #': '', 'Date': '', 'Description': '', 'Account': '', 'Debit': '', 'Credit': ''})
-            
-            df_je = pd.DataFrame(je_data)
-            df_je.to_excel(writer, sheet_name='Journal Entries', index=False)
+        write_analysis_workbook(buffer, self.results)
     
     def export_journal_entries_buffer(self, buffer):
         """Export journal entries to CSV buffer for web API"""
+        from asc606_export import write_journal_entries_csv
+        
         if 'journal_entries' not in self.results:
             self.analyze()
         
-        csv_data = []
-        
-        for entry in self.results['journal_entries']:
-            date_str = entry['date'].strftime('%m/%d/%Y')
-            
-            for debit in entry['debits']:
-                csv_data.append({
-                    'Date': date_str,
-                    'Account': debit['account'],
-                    'Debit': debit['amount'],
-                    'Credit': '',
-                    'Memo': entry['description']
-                })
-            
-            for credit in entry['credits']:
-                csv_data.append({
-                    'Date': date_str,
-                    'Account': credit['account'],
-                    'Debit': '',
-                    'Credit': credit['amount'],
-                    'Memo': entry['description']
-                })
-        
-        df = pd.DataFrame(csv_data)
-        df.to_csv(buffer, index=False)
+        write_journal_entries_csv(buffer, self, contract_columns=False)
 
 
 def analyze_deka_bank():
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Columnar Export
+Coder Technologies Inc.
+
+Writes a whole portfolio's PV analysis, amortization schedules and journal
+entries as typed columnar tables for BI tools, instead of spreadsheets:
+
+    Parquet     one dataset directory per table, optionally hive-partitioned
+                by customer, year or month (zstd compressed)
+    Arrow IPC   one uncompressed .arrow file per table, so readers can
+                memory-map it and use the columns without copying
+
+Columns are typed: contract_id and customer strings, date32 dates, int64
+amounts in cents (from asc606_cents, so every contract ties to the cent),
+and dictionary-encoded account and entry type columns. Amount columns end
+in _cents.
+
+Sources are PortfolioAnalyzer or CentsPortfolio instances, or an iterable of
+them (e.g. books streamed by asc606_loader); each source is written as its
+own row group / record batch, so memory stays bounded by one source.
+
+Usage:
+    write_parquet(portfolio, 'bi/parquet', partition_by='year')
+    write_arrow(portfolio, 'bi/arrow')
+    schedule = read_arrow('bi/arrow/amortization_schedule.arrow')   # zero-copy
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import os
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pyarrow as pa
+
+from asc606_analyzer_production import ACCOUNTS, JE_KINDS
+from asc606_cents import CentsPortfolio, to_cents
+from asc606_instrument import instrumented
+
+
+TABLES = ('pv_analysis', 'amortization_schedule', 'journal_entries')
+PARTITIONS = ('customer', 'year', 'month')
+
+# Journal entry descriptions without the year (contract_year holds it; 0 for cash and license)
+ENTRY_TYPES = tuple(description.replace(' - Year {year}', '') for description, _, _ in JE_KINDS)
+
+_DEBIT_ACCOUNT = np.array([ACCOUNTS.index(debit) for _, debit, _ in JE_KINDS], dtype=np.int8)
+_CREDIT_ACCOUNT = np.array([ACCOUNTS.index(credit) for _, _, credit in JE_KINDS], dtype=np.int8)
+
+_CATEGORY = pa.dictionary(pa.int8(), pa.string())
+_METADATA = {'amount_unit': 'cents'}
+
+PV_SCHEMA = pa.schema([
+    ('contract_id', pa.string()),
+    ('customer', pa.string()),
+    ('period', pa.int32()),
+    ('start', pa.date32()),
+    ('end', pa.date32()),
+    ('service_midpoint', pa.timestamp('s')),
+    ('years_from_payment', pa.float64()),
+    ('stated_amount_cents', pa.int64()),
+    ('present_value_cents', pa.int64()),
+    ('financing_component_cents', pa.int64()),
+], metadata=_METADATA)
+
+# period 0 is license delivery, N is Year N
+SCHEDULE_SCHEMA = pa.schema([
+    ('contract_id', pa.string()),
+    ('customer', pa.string()),
+    ('period', pa.int32()),
+    ('date', pa.date32()),
+    ('opening_liability_cents', pa.int64()),
+    ('interest_income_cents', pa.int64()),
+    ('revenue_recognized_cents', pa.int64()),
+    ('ending_liability_cents', pa.int64()),
+], metadata=_METADATA)
+
+JOURNAL_SCHEMA = pa.schema([
+    ('contract_id', pa.string()),
+    ('customer', pa.string()),
+    ('entry_num', pa.int32()),
+    ('date', pa.date32()),
+    ('entry_type', _CATEGORY),
+    ('contract_year', pa.int32()),
+    ('debit_account', _CATEGORY),
+    ('credit_account', _CATEGORY),
+    ('amount_cents', pa.int64()),
+], metadata=_METADATA)
+
+SCHEMAS = {'pv_analysis': PV_SCHEMA, 'amortization_schedule': SCHEDULE_SCHEMA, 'journal_entries': JOURNAL_SCHEMA}
+# Row date used for year/month partitions
+_PARTITION_DATE = {'pv_analysis': 'end', 'amortization_schedule': 'date', 'journal_entries': 'date'}
+
+
+def _as_cents(source) -> CentsPortfolio:
+    return source if isinstance(source, CentsPortfolio) else to_cents(source)
+
+
+def _as_sources(sources) -> Iterable:
+    """Accept a single portfolio or an iterable of them"""
+    if hasattr(sources, 'book'):
+        return [sources]
+    return sources
+
+
+def _contract_columns(cents: CentsPortfolio, rows: np.ndarray):
+    """contract_id and customer of every row, gathered in Arrow"""
+    indices = pa.array(rows)
+    return [pa.array(cents.book.contract_ids, type=pa.string()).take(indices),
+            pa.array(cents.book.customers, type=pa.string()).take(indices)]
+
+
+def _category(indices: np.ndarray, categories) -> pa.DictionaryArray:
+    return pa.DictionaryArray.from_arrays(pa.array(indices.astype(np.int8)), pa.array(categories, type=pa.string()))
+
+
+def pv_table(cents: CentsPortfolio) -> pa.Table:
+    """PV analysis rows (contracts with an override PV have none, as in the analyzer)"""
+    book = cents.book
+    r = cents.results
+    rows = np.flatnonzero(~cents.portfolio.override_mask[book.period_contract])
+    return pa.Table.from_arrays(_contract_columns(cents, book.period_contract[rows]) + [
+        pa.array(book.period_number[rows].astype(np.int32)),
+        pa.array(book.period_start[rows]),
+        pa.array(book.period_end[rows]),
+        pa.array(r['service_midpoint'][rows].astype('datetime64[s]'), type=pa.timestamp('s')),
+        pa.array(r['years_from_payment'][rows]),
+        pa.array(r['stated_amount'][rows]),
+        pa.array(r['present_value'][rows]),
+        pa.array(r['period_financing'][rows]),
+    ], schema=PV_SCHEMA)
+
+
+def schedule_table(cents: CentsPortfolio) -> pa.Table:
+    """Amortization schedule rows, license delivery (period 0) then Year 1..N"""
+    book = cents.book
+    r = cents.results
+    schedule_contract = np.repeat(np.arange(len(book)), book.n_periods + 1)
+    period = np.arange(len(schedule_contract)) - cents.schedule_offsets[schedule_contract]
+    return pa.Table.from_arrays(_contract_columns(cents, schedule_contract) + [
+        pa.array(period.astype(np.int32)),
+        pa.array(r['schedule_date']),
+        pa.array(r['schedule_opening_liability']),
+        pa.array(r['schedule_interest_income']),
+        pa.array(r['schedule_revenue_recognized']),
+        pa.array(r['schedule_ending_liability']),
+    ], schema=SCHEDULE_SCHEMA)
+
+
+def journal_table(cents: CentsPortfolio) -> pa.Table:
+    """One row per journal entry (each entry is one debit and one credit of amount_cents)"""
+    r = cents.results
+    kind = r['je_kind']
+    return pa.Table.from_arrays(_contract_columns(cents, r['je_contract']) + [
+        pa.array(r['je_entry_num'].astype(np.int32)),
+        pa.array(r['je_date']),
+        _category(kind, ENTRY_TYPES),
+        pa.array(r['je_year'].astype(np.int32)),
+        _category(_DEBIT_ACCOUNT[kind], ACCOUNTS),
+        _category(_CREDIT_ACCOUNT[kind], ACCOUNTS),
+        pa.array(r['je_amount']),
+    ], schema=JOURNAL_SCHEMA)
+
+
+_BUILDERS = {'pv_analysis': pv_table, 'amortization_schedule': schedule_table, 'journal_entries': journal_table}
+
+
+def tables(source) -> Dict[str, pa.Table]:
+    """All three tables for one portfolio, keyed by TABLES name"""
+    cents = _as_cents(source)
+    return {name: _BUILDERS[name](cents) for name in TABLES}
+
+
+def _with_partition(table: pa.Table, name: str, partition_by: str) -> pa.Table:
+    """Add the calendar year or YYYY-MM partition column (customer is already a column)"""
+    if partition_by == 'customer':
+        return table
+    dates = table.column(_PARTITION_DATE[name]).to_numpy().astype('datetime64[D]')
+    if partition_by == 'year':
+        values = pa.array(dates.astype('datetime64[Y]').astype(np.int64) + 1970, type=pa.int16())
+    else:
+        values = pa.array(np.datetime_as_string(dates.astype('datetime64[M]'), unit='M'))
+    return table.append_column(partition_by, values)
+
+
+def _check_empty(directory: str):
+    """Refuse to mix a new export with files from an earlier one"""
+    if os.path.isdir(directory) and os.listdir(directory):
+        raise FileExistsError(f'{directory} is not empty; write each export to a new directory')
+
+
+@instrumented('export.parquet', rows=lambda _, rows: sum(rows.values()))
+def write_parquet(sources, directory: str, partition_by: Optional[str] = None,
+                  compression: str = 'zstd') -> Dict[str, int]:
+    """
+    Write Parquet datasets <directory>/<table>/ for every table
+
+    Args:
+        sources: PortfolioAnalyzer, CentsPortfolio, or an iterable of either
+        directory: New or empty output directory
+        partition_by: None, 'customer', 'year' or 'month' (hive-style
+            directories, e.g. year=2026/)
+        compression: Parquet codec
+
+    Returns:
+        Rows written per table
+    """
+    import pyarrow.dataset as ds
+
+    if partition_by is not None and partition_by not in PARTITIONS:
+        raise ValueError(f"partition_by must be one of {PARTITIONS}, got {partition_by!r}")
+    _check_empty(directory)
+
+    file_format = ds.ParquetFileFormat()
+    options = file_format.make_write_options(compression=compression)
+    rows = dict.fromkeys(TABLES, 0)
+    for part, source in enumerate(_as_sources(sources)):
+        for name, table in tables(source).items():
+            if partition_by is not None:
+                table = _with_partition(table, name, partition_by)
+            ds.write_dataset(
+                table, os.path.join(directory, name), format=file_format, file_options=options,
+                partitioning=[partition_by] if partition_by else None, partitioning_flavor='hive',
+                basename_template=f'part-{part}-{{i}}.parquet', existing_data_behavior='overwrite_or_ignore',
+                max_partitions=1 << 20,
+            )
+            rows[name] += table.num_rows
+    return rows
+
+
+@instrumented('export.arrow', rows=lambda _, rows: sum(rows.values()))
+def write_arrow(sources, directory: str) -> Dict[str, int]:
+    """
+    Write uncompressed Arrow IPC files <directory>/<table>.arrow
+
+    Every source becomes one record batch per file. The files are not
+    compressed, so read_arrow() maps them without copying.
+
+    Args:
+        sources: PortfolioAnalyzer, CentsPortfolio, or an iterable of either
+        directory: Output directory (created if needed)
+
+    Returns:
+        Rows written per table
+    """
+    os.makedirs(directory, exist_ok=True)
+    rows = dict.fromkeys(TABLES, 0)
+    writers = {name: pa.ipc.new_file(os.path.join(directory, f'{name}.arrow'), SCHEMAS[name]) for name in TABLES}
+    try:
+        for source in _as_sources(sources):
+            for name, table in tables(source).items():
+                for batch in table.to_batches():
+                    writers[name].write_batch(batch)
+                rows[name] += table.num_rows
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return rows
+
+
+def read_arrow(path: str) -> pa.Table:
+    """Memory-map an Arrow IPC file written by write_arrow(); no data is copied"""
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Result Cache
+Coder Technologies Inc.
+
+Persistent, content-addressed cache of analysis results in a SQLite file.
+Each entry is keyed by a SHA-256 of the canonical inputs (contract_data,
+discount_rate, license_pct, override_pv, use_integer_years, schedule_method,
+day_count, discount_to),
+so an unchanged contract is served from disk on the next close run instead
+of being recomputed. Payloads hold the summary, totals, PV rows and schedule
+as marshal-encoded tuples (zlib-compressed when large). A hit decodes the
+totals and summary immediately; row lists are built on first access, and
+journal entries are rebuilt from the schedule exactly as
+generate_journal_entries() builds them.
+
+Entries carry the calculation code version (a hash of the analyzer
+sources); opening the cache drops entries written by other versions. The
+file is bounded by max_bytes, evicting least recently used entries first.
+
+Usage:
+    with ResultCache('asc606_cache.sqlite') as cache:
+        results = cache.analyze(contract_data, discount_rate=0.06, license_pct=0.20)
+        print(cache.stats())
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import sqlite3
+import time
+import zlib
+from datetime import datetime
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from asc606_analyzer_production import (
+    JE_CASH_RECEIPT,
+    JE_INTEREST,
+    JE_LICENSE,
+    JE_SUPPORT,
+    ASC606FinancingAnalyzer,
+    journal_entry,
+)
+
+# Bump when the payload layout changes; marshal's format is tied to the interpreter
+CACHE_FORMAT = f'2-marshal{marshal.version}'
+
+# Modules whose source determines the numbers in a result
+_CALCULATION_SOURCES = ('asc606_analyzer_production.py', 'asc606_effective_interest.py')
+
+_SCALAR_KEYS = ('total_stated', 'total_pv', 'financing_component', 'financing_pct', 'license_revenue',
+                'support_total', 'annual_support', 'effective_rate', 'solver_iterations', 'solver_converged')
+
+_CONTRACT_FIELDS = frozenset(('customer', 'cash_received', 'payment_date', 'periods'))
+
+# Payloads smaller than this are stored uncompressed (zlib costs more than it saves)
+_COMPRESS_MIN_BYTES = 2048
+
+# Deferred last-used updates are written once this many hits pile up
+_TOUCH_BATCH = 1_000
+
+
+def calculation_version() -> str:
+    """Hash of the calculation sources and payload format"""
+    digest = hashlib.sha256(str(CACHE_FORMAT).encode())
+    root = os.path.dirname(os.path.abspath(__file__))
+    for name in _CALCULATION_SOURCES:
+        path = os.path.join(root, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _canonical(value):
+    """Normalize inputs so equal contracts hash equally (420000 == 420000.0)"""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def _date_text(value) -> str:
+    return value if isinstance(value, str) else _canonical(value)
+
+
+def cache_key(contract_data: Dict, discount_rate: float = 0.06, license_pct: float = 0.20,
+              override_pv: Optional[float] = None, use_integer_years: bool = True,
+              schedule_method: str = 'proportional', day_count: str = 'ACT/365.25',
+              discount_to: str = 'end') -> str:
+    """SHA-256 of the canonical analysis inputs"""
+    # Known fields take a fast path; anything else is canonicalized generically
+    periods = tuple(
+        (_date_text(p['start']), _date_text(p['end']), float(p['stated_amount']))
+        if len(p) == 3 else json.dumps(_canonical(p), sort_keys=True)
+        for p in contract_data['periods']
+    )
+    extra = {k: v for k, v in contract_data.items() if k not in _CONTRACT_FIELDS}
+    inputs = (
+        contract_data['customer'],
+        float(contract_data['cash_received']),
+        _date_text(contract_data['payment_date']),
+        periods,
+        json.dumps(_canonical(extra), sort_keys=True) if extra else '',
+        float(discount_rate),
+        float(license_pct),
+        # The analyzer treats 0 like no override
+        float(override_pv) if override_pv else None,
+        bool(use_integer_years),
+        schedule_method,
+        day_count,
+        discount_to,
+    )
+    return hashlib.sha256(repr(inputs).encode()).hexdigest()
+
+
+def _date(value: datetime) -> str:
+    return value.isoformat() if value.hour or value.minute or value.second else value.strftime('%Y-%m-%d')
+
+
+def encode_results(results: Dict) -> bytes:
+    """Compact payload of an analyzer results dict (zlib-compressed when that pays off)"""
+    payload = (
+        tuple((key, results[key]) for key in _SCALAR_KEYS if key in results),
+        tuple(results['summary'].items()),
+        tuple(
+            (_date(row['date']), row['opening_liability'], row['interest_income'],
+             row['revenue_recognized'], row['ending_liability'])
+            for row in results['amortization_schedule']
+        ),
+        tuple(
+            (row['period'], _date(row['start']), _date(row['end']), _date(row['service_midpoint']),
+             row['years_from_payment'], row['stated_amount'], row['present_value'], row['financing_component'])
+            for row in results['pv_analysis']
+        ) if 'pv_analysis' in results else None,
+    )
+    data = marshal.dumps(payload)
+    if len(data) >= _COMPRESS_MIN_BYTES:
+        packed = zlib.compress(data, 1)
+        if len(packed) < len(data) * 0.8:
+            return b'z' + packed
+    return b'm' + data
+
+
+def _pv_analysis(pv_rows) -> List[Dict]:
+    parse = datetime.fromisoformat
+    return [
+        {
+            'period': period,
+            'start': parse(start),
+            'end': parse(end),
+            'service_midpoint': parse(midpoint),
+            'years_from_payment': years,
+            'stated_amount': stated,
+            'present_value': pv,
+            'financing_component': financing
+        }
+        for period, start, end, midpoint, years, stated, pv, financing in pv_rows
+    ]
+
+
+def _schedule(schedule_rows) -> List[Dict]:
+    parse = datetime.fromisoformat
+    return [
+        {
+            'period': f'Year {i}' if i else 'License Delivery',
+            'date': parse(date),
+            'opening_liability': opening,
+            'interest_income': interest,
+            'revenue_recognized': revenue,
+            'ending_liability': ending
+        }
+        for i, (date, opening, interest, revenue, ending) in enumerate(schedule_rows)
+    ]
+
+
+def _journal_entries(results: 'CachedResults') -> List[Dict]:
+    """Same layout as generate_journal_entries()"""
+    schedule = results['amortization_schedule']
+    entries = [
+        journal_entry(1, schedule[0]['date'], JE_CASH_RECEIPT, results['summary']['cash_received']),
+        journal_entry(2, schedule[0]['date'], JE_LICENSE, schedule[0]['revenue_recognized']),
+    ]
+    for year, row in enumerate(schedule[1:], 1):
+        entries.append(journal_entry(2 * year + 1, row['date'], JE_INTEREST, row['interest_income'], year=year))
+        entries.append(journal_entry(2 * year + 2, row['date'], JE_SUPPORT, row['revenue_recognized'], year=year))
+    return entries
+
+
+class CachedResults(MutableMapping):
+    """
+    Analyzer results dict served from the cache
+
+    Totals and summary are decoded up front; 'pv_analysis',
+    'amortization_schedule' and 'journal_entries' are built on first
+    access, so callers that only need the summary never pay for the rows.
+    """
+
+    def __init__(self, values: Dict, pending: Dict):
+        self._values = values
+        self._pending = pending
+
+    def __getitem__(self, key):
+        if key in self._pending:
+            self._values[key] = self._pending.pop(key)(self)
+        return self._values[key]
+
+    def __setitem__(self, key, value):
+        self._pending.pop(key, None)
+        self._values[key] = value
+
+    def __delitem__(self, key):
+        if self._pending.pop(key, None) is None:
+            del self._values[key]
+
+    def __iter__(self):
+        yield from self._values
+        yield from list(self._pending)
+
+    def __len__(self) -> int:
+        return len(self._values) + len(self._pending)
+
+    def __contains__(self, key) -> bool:
+        return key in self._values or key in self._pending
+
+    def __repr__(self) -> str:
+        return f'CachedResults({sorted(self)})'
+
+
+def decode_results(blob: bytes) -> CachedResults:
+    """Rebuild the analyzer results from encode_results() output"""
+    data = zlib.decompress(blob[1:]) if blob[:1] == b'z' else blob[1:]
+    scalars, summary, schedule_rows, pv_rows = marshal.loads(data)
+
+    values = dict(scalars)
+    values['summary'] = dict(summary)
+    pending = {
+        'amortization_schedule': lambda _: _schedule(schedule_rows),
+        'journal_entries': _journal_entries,
+    }
+    if pv_rows is not None:
+        pending['pv_analysis'] = lambda _: _pv_analysis(pv_rows)
+    return CachedResults(values, pending)
+
+
+class ResultCache:
+    """
+    SQLite-backed, size-bounded LRU cache of analysis results
+
+    Safe to share between processes (WAL mode); each process opens its own
+    ResultCache on the same file.
+    """
+
+    def __init__(self, path: str = 'asc606_cache.sqlite', max_bytes: int = 512 * 1024 * 1024,
+                 version: Optional[str] = None):
+        """
+        Open (or create) a cache file
+
+        Args:
+            path: SQLite file
+            max_bytes: Upper bound on stored payload bytes
+            version: Calculation version; default hashes the analyzer sources
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version or calculation_version()
+        self.hits = 0
+        self.misses = 0
+        self._touched = {}
+
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            ' key TEXT PRIMARY KEY, version TEXT NOT NULL, payload BLOB NOT NULL,'
+            ' size INTEGER NOT NULL, last_used REAL NOT NULL)'
+        )
+        self.db.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+
+        # Versioned invalidation: results from other calculation code are stale
+        self.invalidated = self.db.execute('DELETE FROM results WHERE version != ?', (self.version,)).rowcount
+        self._size = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+    def __enter__(self) -> 'ResultCache':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached results for key, or None"""
+        row = self.db.execute('SELECT payload FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time()
+        if len(self._touched) >= _TOUCH_BATCH:
+            self.flush()
+        return decode_results(row[0])
+
+    def put(self, key: str, results: Dict):
+        """Store results under key, evicting old entries past max_bytes"""
+        blob = encode_results(results)
+        with self.db:
+            self.db.execute('BEGIN')
+            previous = self.db.execute('SELECT size FROM results WHERE key = ?', (key,)).fetchone()
+            self.db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                            (key, self.version, blob, len(blob), time.time()))
+        self._size += len(blob) - (previous[0] if previous else 0)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_bytes: Optional[int] = None):
+        """Drop least recently used entries until at most target_bytes remain (default 90% of max_bytes)"""
+        target = int(self.max_bytes * 0.9) if target_bytes is None else target_bytes
+        self.flush()
+        with self.db:
+            self.db.execute('BEGIN')
+            freed = 0
+            victims = []
+            for key, size in self.db.execute('SELECT key, size FROM results ORDER BY last_used'):
+                if self._size - freed <= target:
+                    break
+                victims.append((key,))
+                freed += size
+            self.db.executemany('DELETE FROM results WHERE key = ?', victims)
+        self._size -= freed
+
+    def flush(self):
+        """Write deferred last-used times of cache hits"""
+        if not self._touched:
+            return
+        with self.db:
+            self.db.execute('BEGIN')
+            self.db.executemany('UPDATE results SET last_used = ? WHERE key = ?',
+                                [(used, key) for key, used in self._touched.items()])
+        self._touched = {}
+
+    def analyze(self, contract_data: Dict, discount_rate: float = 0.06, license_pct: float = 0.20,
+                override_pv: Optional[float] = None, use_integer_years: bool = True,
+                schedule_method: str = 'proportional', day_count: str = 'ACT/365.25',
+                discount_to: str = 'end') -> Dict:
+        """ASC606FinancingAnalyzer results, from the cache when the inputs are unchanged"""
+        key = cache_key(contract_data, discount_rate, license_pct, override_pv, use_integer_years, schedule_method,
+                        day_count, discount_to)
+        results = self.get(key)
+        if results is None:
+            analyzer = ASC606FinancingAnalyzer(
+                contract_data=contract_data,
+                discount_rate=discount_rate,
+                license_pct=license_pct,
+                override_pv=override_pv,
+                use_integer_years=use_integer_years,
+                schedule_method=schedule_method,
+                day_count=day_count,
+                discount_to=discount_to
+            )
+            results = analyzer.analyze()
+            self.put(key, results)
+        return results
+
+    def analyze_many(self, contracts: Iterable[Dict], discount_rate: float = 0.06, license_pct: float = 0.20,
+                     use_integer_years: bool = True, schedule_method: str = 'proportional',
+                     day_count: str = 'ACT/365.25', discount_to: str = 'end') -> Iterator[Dict]:
+        """
+        Results for a book of contract_data dicts, in order
+
+        A contract dict may carry its own 'discount_rate', 'license_pct' or
+        'override_pv', as in ContractBook.from_contracts().
+        """
+        for contract in contracts:
+            yield self.analyze(contract,
+                               discount_rate=contract.get('discount_rate', discount_rate),
+                               license_pct=contract.get('license_pct', license_pct),
+                               override_pv=contract.get('override_pv'),
+                               use_integer_years=use_integer_years,
+                               schedule_method=schedule_method,
+                               day_count=day_count,
+                               discount_to=discount_to)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self),
+            'bytes': self._size,
+            'max_bytes': self.max_bytes,
+            'version': self.version,
+            'invalidated': self.invalidated,
+        }
+
+    def clear(self):
+        self.db.execute('DELETE FROM results')
+        self._touched = {}
+        self._size = 0
+
+    def close(self):
+        if self.db is not None:
+            self.flush()
+            self.db.close()
+            self.db = None
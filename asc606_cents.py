@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Integer-Cents Results
+Coder Technologies Inc.
+
+Fixed-point version of an analyzed PortfolioAnalyzer: every amount becomes
+an int64 count of cents. Each computed line is rounded half away from zero,
+and the rounding residual of every total goes into the contract's final
+period. As a result:
+
+    present value lines     sum to the transaction price
+    license + support       equal the transaction price
+    interest                equals the financing component, so
+                            license + support + interest == stated total
+                            (cash received for override-PV contracts)
+    every journal entry     debits == credits (one amount per entry)
+
+Only sub-cent rounding residuals are moved; amounts are never plugged. When
+cash received differs from the stated total, revenue plus interest does not
+tie to cash, and reconciliation() reports those contracts as untied.
+
+All work is array arithmetic over the whole book, so converting a
+portfolio costs about as much as one analysis stage.
+
+Usage:
+    portfolio = analyze_portfolio(book)
+    cents = to_cents(portfolio)
+    cents.reconciliation()['tied']          # True when cash equals the stated totals
+    write_journal_entries_csv('netsuite_import.csv', cents)
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import numpy as np
+from typing import Dict, List
+
+from asc606_analyzer_production import journal_entry
+from asc606_instrument import instrumented
+from asc606_portfolio import PortfolioAnalyzer, _segmented_cumsum, _to_datetimes
+
+
+# Non-amount result arrays carried over unchanged
+_PASSTHROUGH = ('service_midpoint', 'years_from_payment', 'financing_pct', 'schedule_date',
+                'je_contract', 'je_entry_num', 'je_kind', 'je_year', 'je_date',
+                'effective_rate', 'solver_iterations', 'solver_converged')
+
+
+def round_cents(amounts) -> np.ndarray:
+    """
+    Dollar amounts to int64 cents, rounding half away from zero
+
+    Amounts are first rounded to 6 decimal places of a cent, so binary
+    representation error (e.g. 0.285 * 100 = 28.499999...) does not decide
+    the rounding direction.
+    """
+    scaled = np.round(np.asarray(amounts, dtype=np.float64) * 100, 6)
+    return (np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)).astype(np.int64)
+
+
+def cents_text(cents: int) -> str:
+    """Exact decimal text for a cents amount, e.g. 12345 -> '123.45'"""
+    sign = '-' if cents < 0 else ''
+    dollars, remainder = divmod(abs(int(cents)), 100)
+    return f'{sign}{dollars}.{remainder:02d}'
+
+
+def allocate_cents(totals: np.ndarray, lines: np.ndarray, line_contract: np.ndarray,
+                   offsets: np.ndarray) -> np.ndarray:
+    """
+    Round each line to cents and put every contract's residual in its last line
+
+    Args:
+        totals: Target cents per contract
+        lines: Dollar amount of every line, contracts back to back
+        line_contract: Contract position of every line
+        offsets: Start of each contract's lines (plus end sentinel)
+
+    Returns:
+        int64 cents per line summing exactly to totals (contracts without
+        lines keep their residual unallocated)
+    """
+    cents = round_cents(lines)
+    residual = totals - np.bincount(line_contract, cents, minlength=len(totals)).astype(np.int64)
+    has_lines = offsets[1:] > offsets[:-1]
+    cents[offsets[1:][has_lines] - 1] += residual[has_lines]
+    return cents
+
+
+class CentsPortfolio:
+    """
+    Integer-cents results of an analyzed PortfolioAnalyzer
+
+    results has the same keys and row layout as PortfolioAnalyzer.results,
+    with every amount an int64 count of cents, plus 'cash_received',
+    'stated_amount' and 'interest_total'. Exports accept it wherever they
+    accept a portfolio; journal amounts are written as exact decimals.
+    """
+
+    def __init__(self, portfolio: PortfolioAnalyzer, results: Dict[str, np.ndarray]):
+        self.portfolio = portfolio
+        self.book = portfolio.book
+        self.results = results
+
+    def __len__(self) -> int:
+        return len(self.book)
+
+    @property
+    def schedule_offsets(self) -> np.ndarray:
+        return self.portfolio.schedule_offsets
+
+    @property
+    def je_offsets(self) -> np.ndarray:
+        return self.portfolio.je_offsets
+
+    def reconciliation(self) -> Dict:
+        """
+        Per-contract tie-out in cents
+
+        Returns:
+            Dict with revenue_total (license + support + interest),
+            cash_difference (cash - revenue_total; non-zero where cash
+            received differs from the stated total), untied (positions of
+            contracts with a cash_difference) and tied (True when there are
+            none)
+        """
+        r = self.results
+        revenue_total = r['license_revenue'] + r['support_total'] + r['interest_total']
+        cash_difference = r['cash_received'] - revenue_total
+        untied = np.flatnonzero(cash_difference)
+        return {
+            'revenue_total': revenue_total,
+            'cash_difference': cash_difference,
+            'untied': untied,
+            'tied': not len(untied),
+        }
+
+    def summary(self, index: int) -> Dict:
+        """Summary dict for one contract, amounts in dollars (exact cents)"""
+        summary = self.portfolio.summary(index)
+        r = self.results
+        summary['cash_received'] = r['cash_received'][index] / 100
+        summary['transaction_price'] = r['total_pv'][index] / 100
+        summary['financing_component'] = r['financing_component'][index] / 100
+        return summary
+
+    def contract_results(self, index: int, compact: bool = False) -> Dict:
+        """
+        ASC606FinancingAnalyzer-style results for one contract, amounts in
+        dollars rounded to the cent (rows are always lists; compact is accepted
+        for export compatibility)
+        """
+        book = self.book
+        r = self.results
+        results = {}
+
+        lo, hi = book.offsets[index], book.offsets[index + 1]
+        if not self.portfolio.override_mask[index]:
+            starts = _to_datetimes(book.period_start[lo:hi])
+            ends = _to_datetimes(book.period_end[lo:hi])
+            midpoints = _to_datetimes(r['service_midpoint'][lo:hi])
+            results['pv_analysis'] = [
+                {
+                    'period': i,
+                    'start': starts[i - 1],
+                    'end': ends[i - 1],
+                    'service_midpoint': midpoints[i - 1],
+                    'years_from_payment': float(r['years_from_payment'][row]),
+                    'stated_amount': r['stated_amount'][row] / 100,
+                    'present_value': r['present_value'][row] / 100,
+                    'financing_component': r['period_financing'][row] / 100
+                }
+                for i, row in enumerate(range(lo, hi), 1)
+            ]
+            results['total_stated'] = r['total_stated'][index] / 100
+
+        for key in ('total_pv', 'financing_component', 'license_revenue', 'support_total', 'interest_total'):
+            results[key] = r[key][index] / 100
+        results['financing_pct'] = float(r['financing_pct'][index])
+        if 'effective_rate' in r:
+            results['effective_rate'] = float(r['effective_rate'][index])
+
+        lo, hi = self.schedule_offsets[index], self.schedule_offsets[index + 1]
+        dates = _to_datetimes(r['schedule_date'][lo:hi])
+        results['amortization_schedule'] = [
+            {
+                'period': f'Year {i}' if i else 'License Delivery',
+                'date': dates[i],
+                'opening_liability': r['schedule_opening_liability'][row] / 100,
+                'interest_income': r['schedule_interest_income'][row] / 100,
+                'revenue_recognized': r['schedule_revenue_recognized'][row] / 100,
+                'ending_liability': r['schedule_ending_liability'][row] / 100
+            }
+            for i, row in enumerate(range(lo, hi))
+        ]
+
+        lo, hi = self.je_offsets[index], self.je_offsets[index + 1]
+        dates = _to_datetimes(r['je_date'][lo:hi])
+        results['journal_entries'] = [
+            journal_entry(int(r['je_entry_num'][row]), dates[i], int(r['je_kind'][row]),
+                          r['je_amount'][row] / 100, year=int(r['je_year'][row]))
+            for i, row in enumerate(range(lo, hi))
+        ]
+
+        results['summary'] = self.summary(index)
+        return results
+
+    def summaries(self) -> List[Dict]:
+        return [self.summary(i) for i in range(len(self.book))]
+
+
+@instrumented('cents.to_cents', rows=lambda portfolio, _: len(portfolio.book))
+def to_cents(portfolio: PortfolioAnalyzer) -> CentsPortfolio:
+    """
+    Convert an analyzed portfolio to integer cents (analyzes it first if needed)
+
+    Args:
+        portfolio: PortfolioAnalyzer
+
+    Returns:
+        CentsPortfolio
+    """
+    if 'je_amount' not in portfolio.results:
+        portfolio.analyze()
+
+    book = portfolio.book
+    f = portfolio.results
+    n = len(book)
+    offsets = book.offsets
+    period_contract = book.period_contract
+    override = portfolio.override_mask
+    license_rows = portfolio.schedule_offsets[:-1]
+    year_rows = np.arange(len(period_contract), dtype=np.int64) + period_contract + 1
+
+    r = {key: f[key] for key in _PASSTHROUGH if key in f}
+    cash = r['cash_received'] = round_cents(book.cash_received)
+    stated = r['stated_amount'] = round_cents(book.stated_amount)
+    r['total_stated'] = np.bincount(period_contract, stated, minlength=n).astype(np.int64)
+    total_pv = r['total_pv'] = round_cents(f['total_pv'])
+
+    # PV lines tie to the transaction price (override contracts have no PV lines to tie)
+    pv_target = np.where(override, np.bincount(period_contract, round_cents(f['present_value']), minlength=n),
+                         total_pv).astype(np.int64)
+    r['present_value'] = allocate_cents(pv_target, f['present_value'], period_contract, offsets)
+    r['period_financing'] = stated - r['present_value']
+    r['financing_component'] = np.where(override, cash - total_pv, r['total_stated'] - total_pv)
+
+    # Allocation: support is whatever the license leaves of the transaction price
+    license_revenue = r['license_revenue'] = round_cents(f['license_revenue'])
+    support_total = r['support_total'] = total_pv - license_revenue
+    support = allocate_cents(support_total, f['schedule_revenue_recognized'][year_rows], period_contract, offsets)
+
+    # Interest lines tie to the financing component; only their rounding residual moves
+    interest_total = r['interest_total'] = r['financing_component']
+    interest = allocate_cents(interest_total, f['schedule_interest_income'][year_rows], period_contract, offsets)
+
+    # Schedule rolls forward in exact integer arithmetic
+    license_ending = cash - license_revenue
+    ending = license_ending[period_contract] + _segmented_cumsum(interest - support, offsets, book.n_periods)
+    opening = ending - interest + support
+    columns = {
+        'schedule_opening_liability': (cash, opening),
+        'schedule_interest_income': (np.zeros(n, dtype=np.int64), interest),
+        'schedule_revenue_recognized': (license_revenue, support),
+        'schedule_ending_liability': (license_ending, ending),
+    }
+    for key, (license_values, year_values) in columns.items():
+        column = np.empty(len(f['schedule_date']), dtype=np.int64)
+        column[license_rows] = license_values
+        column[year_rows] = year_values
+        r[key] = column
+
+    # Journal amounts come straight from the schedule, as in generate_journal_entries()
+    je_first = portfolio.je_offsets[:-1]
+    interest_entries = je_first[period_contract] + 2 * book.period_number
+    je_amount = np.empty(len(f['je_amount']), dtype=np.int64)
+    je_amount[je_first] = cash
+    je_amount[je_first + 1] = license_revenue
+    je_amount[interest_entries] = interest
+    je_amount[interest_entries + 1] = support
+    r['je_amount'] = je_amount
+
+    return CentsPortfolio(portfolio, r)
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Batch Command Line
+Coder Technologies Inc.
+
+Runs a whole contract file (CSV or Parquet, asc606_loader layout) through
+the parallel batch runner and writes the NetSuite import and a per-contract
+summary. Progress and throughput are reported as chunks finish.
+
+Every finished chunk is written to <out>/chunks/ and recorded in
+<out>/checkpoint.json before the next one is recorded, so a run that is
+killed (or crashes) resumes after the last completed chunk: rerun the same
+command. The checkpoint remembers the input file and options; a run with a
+changed file or different options refuses to resume unless --restart is
+given. When every chunk is done the parts are merged into:
+
+    <out>/journal_entries.csv       NetSuite import (External ID ... Name)
+    <out>/summary.csv               one row per contract
+    <out>/quarantine_report.csv     validation findings (with --validate)
+    <out>/quarantined_rows.csv      rows of quarantined contracts (with --validate)
+
+Usage:
+    python asc606_cli.py run book.csv --rate 0.06 --license-pct 0.2 --workers 8 --out results/
+    python asc606_cli.py status results/
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from asc606_analyzer_production import DAY_COUNTS, DISCOUNT_POINTS, check_discounting
+
+CHECKPOINT_FILE = 'checkpoint.json'
+CHUNK_DIR = 'chunks'
+OUTPUTS = ('journal_entries', 'summary')
+SUMMARY_COLUMNS = ['Contract ID', 'Customer', 'Cash Received', 'Transaction Price (PV)', 'Financing Component',
+                   'Financing %', 'Is Significant?', 'Discount Rate', 'License Allocation %', 'License Revenue',
+                   'Support Revenue']
+
+# Bump when the checkpoint layout changes; older checkpoints are not resumed
+CHECKPOINT_VERSION = 1
+
+
+class CheckpointMismatch(Exception):
+    """The output directory holds a checkpoint of a different run"""
+
+
+def _write_atomic(path: str, write):
+    """Write a file under a temporary name and move it into place"""
+    tmp = path + '.tmp'
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _input_fingerprint(path: str) -> Dict:
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _count_rows(path: str, file_format: str) -> int:
+    """Period rows in the input, for progress (CSV lines minus the header)"""
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    return max(lines + (last != b'\n') - 1, 0)
+
+
+class Checkpoint:
+    """
+    Completed chunks of one run, persisted in <out>/checkpoint.json
+
+    A chunk is recorded only after its files are in place, and the file is
+    replaced atomically, so the checkpoint never lists a partial chunk.
+    """
+
+    def __init__(self, directory: str, run: Dict):
+        self.directory = directory
+        self.path = os.path.join(directory, CHECKPOINT_FILE)
+        self.run = run
+        self.chunks: List[Dict] = []
+        self.complete = False
+
+    @classmethod
+    def load(cls, directory: str) -> Optional['Checkpoint']:
+        path = os.path.join(directory, CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            state = json.load(f)
+        checkpoint = cls(directory, state['run'])
+        checkpoint.chunks = state['chunks']
+        checkpoint.complete = state['complete']
+        return checkpoint
+
+    def save(self):
+        state = {'run': self.run, 'chunks': self.chunks, 'complete': self.complete}
+
+        def write(tmp):
+            with open(tmp, 'w') as f:
+                json.dump(state, f, indent=1)
+        _write_atomic(self.path, write)
+
+    def chunk_path(self, output: str, index: int) -> str:
+        return os.path.join(self.directory, CHUNK_DIR, f'{output}-{index:06d}.csv')
+
+    def record(self, index: int, contracts: int, entries: int):
+        self.chunks.append({'index': index, 'contracts': contracts, 'entries': entries})
+        self.save()
+
+    @property
+    def contracts(self) -> int:
+        return sum(chunk['contracts'] for chunk in self.chunks)
+
+
+class Progress:
+    """Chunk-by-chunk progress and throughput on stderr (one updating line on a terminal)"""
+
+    def __init__(self, total_rows: int, quiet: bool = False, stream=None):
+        self.total_rows = total_rows
+        self.quiet = quiet
+        self.stream = stream or sys.stderr
+        self.tty = self.stream.isatty()
+        self.start = time.perf_counter()
+        self.contracts = 0
+        self.rows = 0
+
+    def _write(self, line: str, overwrite: bool = False):
+        if not self.quiet:
+            self.stream.write(('\r' + line) if overwrite and self.tty else line + '\n')
+            self.stream.flush()
+
+    def resumed(self, chunks: int):
+        self._write(f'resuming: {chunks} chunks already complete')
+
+    def update(self, chunks: int, contracts: int, rows: int, rows_done: int):
+        """
+        Report one finished chunk
+
+        Args:
+            chunks: Chunks complete so far (including resumed ones)
+            contracts, rows: Contracts and file rows of the finished chunk
+            rows_done: File rows accounted for so far (resumed, finished and quarantined)
+        """
+        self.contracts += contracts
+        self.rows += rows
+        elapsed = time.perf_counter() - self.start
+        rate = self.contracts / elapsed if elapsed > 0 else 0.0
+        fraction = min(rows_done / self.total_rows, 1.0) if self.total_rows else 1.0
+        # ETA from this run's throughput, so resumed chunks do not inflate it
+        eta = elapsed * max(self.total_rows - rows_done, 0) / self.rows if self.rows else None
+        self._write(f'chunk {chunks:>5}  {fraction:6.1%}  {self.contracts:>10,} contracts  '
+                    f'{rate:>9,.0f} contracts/s  ETA {_duration(eta)}', overwrite=True)
+
+    def finish(self):
+        if self.tty and not self.quiet and self.contracts:
+            self.stream.write('\n')
+
+
+def _duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '--:--'
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}:{minutes:02d}:{seconds:02d}' if hours else f'{minutes}:{seconds:02d}'
+
+
+def _write_summary(path: str, portfolio, cents: bool):
+    """Per-contract summary CSV for one chunk"""
+    import pandas as pd
+    from asc606_export import SIGNIFICANCE_THRESHOLD_PCT
+
+    book = portfolio.book
+    r = portfolio.results
+    scale = 100 if cents else 1
+    financing_pct = r['financing_pct']
+    frame = pd.DataFrame({
+        'Contract ID': book.contract_ids,
+        'Customer': book.customers,
+        'Cash Received': np.round(book.cash_received, 2),
+        'Transaction Price (PV)': np.round(r['total_pv'] / scale, 2),
+        'Financing Component': np.round(r['financing_component'] / scale, 2),
+        'Financing %': np.round(financing_pct, 4),
+        'Is Significant?': np.where(np.abs(financing_pct) > SIGNIFICANCE_THRESHOLD_PCT, 'YES', 'NO'),
+        'Discount Rate': book.discount_rate,
+        'License Allocation %': book.license_pct * 100,
+        'License Revenue': np.round(r['license_revenue'] / scale, 2),
+        'Support Revenue': np.round(r['support_total'] / scale, 2),
+    }, columns=SUMMARY_COLUMNS)
+    frame.to_csv(path, index=False, lineterminator='\n')
+
+
+def _run_chunk(book, paths: Dict[str, str], cents: bool, terms: Dict) -> int:
+    """
+    Analyze one chunk and write its parts (runs in a worker process)
+
+    Args:
+        terms: PortfolioAnalyzer keyword arguments (use_integer_years, day_count, discount_to)
+
+    Returns:
+        Journal lines written
+    """
+    from asc606_export import write_journal_entries_csv
+    from asc606_portfolio import PortfolioAnalyzer
+
+    portfolio = PortfolioAnalyzer(book, **terms)
+    portfolio.analyze()
+    if cents:
+        from asc606_cents import to_cents
+        portfolio = to_cents(portfolio)
+
+    lines = []
+    _write_atomic(paths['journal_entries'], lambda tmp: lines.append(write_journal_entries_csv(tmp, portfolio)))
+    _write_atomic(paths['summary'], lambda tmp: _write_summary(tmp, portfolio, cents))
+    return lines[0]
+
+
+def _iter_finished(books, checkpoint: Checkpoint, skip: set, workers: int, cents: bool,
+                   terms: Dict) -> Iterator[Tuple[int, int, int, Optional[int]]]:
+    """
+    Run every chunk not in skip; yield (index, contracts, rows, journal lines)
+    as chunks finish, in completion order (lines is None for skipped chunks)
+
+    At most 2 * workers chunks are in flight, so the file is never read far
+    ahead of the workers.
+    """
+    def task(index, book):
+        paths = {output: checkpoint.chunk_path(output, index) for output in OUTPUTS}
+        return book, paths, cents, terms
+
+    if workers == 1:
+        for index, book in enumerate(books):
+            lines = None if index in skip else _run_chunk(*task(index, book))
+            yield index, len(book), len(book.stated_amount), lines
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        for index, book in enumerate(books):
+            if index in skip:
+                yield index, len(book), len(book.stated_amount), None
+                continue
+            pending[executor.submit(_run_chunk, *task(index, book))] = (index, len(book), len(book.stated_amount))
+            if len(pending) >= 2 * workers:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield (*pending.pop(future), future.result())
+        for future in as_completed(list(pending)):
+            yield (*pending.pop(future), future.result())
+
+
+def _merge(checkpoint: Checkpoint):
+    """Concatenate every chunk's parts into the final outputs"""
+    from asc606_export import PORTFOLIO_COLUMNS
+
+    headers = {'journal_entries': PORTFOLIO_COLUMNS, 'summary': SUMMARY_COLUMNS}
+    for output in OUTPUTS:
+        target = os.path.join(checkpoint.directory, f'{output}.csv')
+
+        def write(tmp):
+            with open(tmp, 'wb') as out:
+                if not checkpoint.chunks:
+                    out.write((','.join(headers[output]) + '\n').encode())
+                for position, chunk in enumerate(sorted(checkpoint.chunks, key=lambda chunk: chunk['index'])):
+                    with open(checkpoint.chunk_path(output, chunk['index']), 'rb') as part:
+                        header = part.readline()
+                        if position == 0:
+                            out.write(header)
+                        while True:
+                            block = part.read(1 << 20)
+                            if not block:
+                                break
+                            out.write(block)
+        _write_atomic(target, write)
+
+
+def _remove_parts(checkpoint: Checkpoint):
+    for output in OUTPUTS:
+        for chunk in checkpoint.chunks:
+            path = checkpoint.chunk_path(output, chunk['index'])
+            if os.path.exists(path):
+                os.remove(path)
+    chunk_dir = os.path.join(checkpoint.directory, CHUNK_DIR)
+    if not os.listdir(chunk_dir):
+        os.rmdir(chunk_dir)
+
+
+def run(path: str, out: str, discount_rate: float = 0.06, license_pct: float = 0.20,
+        workers: Optional[int] = None, chunk_size: int = 5_000, cents: bool = False,
+        validate: bool = False, exact_days: bool = False, day_count: str = 'ACT/365.25',
+        discount_to: str = 'end', restart: bool = False, quiet: bool = False) -> Dict:
+    """
+    Analyze a contract file chunk by chunk, resuming from a checkpoint in out
+
+    Args:
+        path: CSV or Parquet contract file (asc606_loader layout)
+        out: Output directory (created if needed)
+        discount_rate: Rate for contracts without a discount_rate value
+        license_pct: License allocation for contracts without a license_pct value
+        workers: Worker processes (default: os.cpu_count())
+        chunk_size: Contracts per chunk (and per checkpoint)
+        cents: If True, write integer-cents amounts (asc606_cents)
+        validate: If True, quarantine invalid contracts instead of failing
+        exact_days: If True, discount by exact day count instead of whole years
+        day_count: Day-count convention with exact_days (see DAY_COUNTS)
+        discount_to: Discount each period from its 'end' or its 'midpoint'
+        restart: Discard an existing checkpoint in out instead of resuming
+        quiet: Suppress progress output
+
+    Returns:
+        Dict with contracts, analyzed (contracts analyzed by this call, i.e.
+        excluding resumed chunks), chunks, journal_lines, quarantined,
+        seconds, resumed_chunks and already_complete
+
+    Raises:
+        CheckpointMismatch: out holds the checkpoint of a different input or options
+    """
+    from asc606_loader import _detect_format, iter_contract_books
+
+    check_discounting(day_count, discount_to)
+    file_format = _detect_format(path)
+    run_state = {
+        'version': CHECKPOINT_VERSION,
+        'input': _input_fingerprint(path),
+        'options': {'discount_rate': discount_rate, 'license_pct': license_pct, 'chunk_size': chunk_size,
+                    'cents': cents, 'validate': validate, 'exact_days': exact_days,
+                    'day_count': day_count, 'discount_to': discount_to},
+    }
+
+    os.makedirs(os.path.join(out, CHUNK_DIR), exist_ok=True)
+    checkpoint = None if restart else Checkpoint.load(out)
+    if checkpoint is not None and checkpoint.run != run_state:
+        raise CheckpointMismatch(f'{out} holds a checkpoint for a different input file or options; '
+                                 f'use --restart to discard it')
+    if checkpoint is not None and checkpoint.complete:
+        return _result(checkpoint, None, 0.0, len(checkpoint.chunks), already_complete=True)
+    if checkpoint is None:
+        checkpoint = Checkpoint(out, run_state)
+        checkpoint.save()
+
+    quarantine = None
+    if validate:
+        from asc606_validation import Quarantine
+        quarantine = Quarantine()
+
+    progress = Progress(_count_rows(path, file_format), quiet=quiet)
+    done = {chunk['index'] for chunk in checkpoint.chunks}
+    if done:
+        progress.resumed(len(done))
+    books = iter_contract_books(path, batch_size=chunk_size, discount_rate=discount_rate,
+                                license_pct=license_pct, file_format=file_format, quarantine=quarantine)
+
+    # Completed chunks are re-read (chunk boundaries depend on the file) but not re-analyzed
+    started = time.perf_counter()
+    rows_done = 0
+    workers = workers or os.cpu_count() or 1
+    terms = {'use_integer_years': not exact_days, 'day_count': day_count, 'discount_to': discount_to}
+    for index, contracts, rows, lines in _iter_finished(books, checkpoint, done, workers, cents, terms):
+        rows_done += rows
+        if lines is None:
+            continue
+        checkpoint.record(index, contracts, lines)
+        progress.update(len(checkpoint.chunks), contracts, rows, rows_done + _quarantined_rows(quarantine))
+    progress.finish()
+
+    if quarantine is not None:
+        quarantine.report.write_csv(os.path.join(out, 'quarantine_report.csv'))
+        quarantine.write_csv(os.path.join(out, 'quarantined_rows.csv'))
+    _merge(checkpoint)
+    checkpoint.complete = True
+    checkpoint.save()
+    _remove_parts(checkpoint)
+
+    return _result(checkpoint, quarantine, time.perf_counter() - started, len(done), progress.contracts)
+
+
+def _result(checkpoint: Checkpoint, quarantine, seconds: float, resumed_chunks: int, analyzed: int = 0,
+            already_complete: bool = False) -> Dict:
+    return {
+        'contracts': checkpoint.contracts,
+        'analyzed': analyzed,
+        'chunks': len(checkpoint.chunks),
+        'journal_lines': sum(chunk['entries'] for chunk in checkpoint.chunks),
+        'quarantined': quarantine.contracts if quarantine is not None else 0,
+        'seconds': seconds,
+        'resumed_chunks': resumed_chunks,
+        'already_complete': already_complete,
+    }
+
+
+def _quarantined_rows(quarantine) -> int:
+    return sum(len(frame) for frame in quarantine.frames) if quarantine is not None else 0
+
+
+def status(out: str) -> Optional[Dict]:
+    """Checkpoint state of an output directory, or None if it has none"""
+    checkpoint = Checkpoint.load(out)
+    if checkpoint is None:
+        return None
+    return {
+        'input': checkpoint.run['input']['path'],
+        'options': checkpoint.run['options'],
+        'chunks': len(checkpoint.chunks),
+        'contracts': checkpoint.contracts,
+        'complete': checkpoint.complete,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='ASC 606 batch analysis')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Analyze a contract file (resumes an interrupted run)')
+    run_parser.add_argument('book', help='CSV or Parquet contract file, one row per service period')
+    run_parser.add_argument('--out', required=True, help='Output directory (holds the checkpoint)')
+    run_parser.add_argument('--rate', type=float, default=0.06,
+                            help='Discount rate for contracts without a discount_rate column value')
+    run_parser.add_argument('--license-pct', type=float, default=0.20,
+                            help='License allocation for contracts without a license_pct column value')
+    run_parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    run_parser.add_argument('--chunk-size', type=int, default=5_000, help='Contracts per chunk and checkpoint')
+    run_parser.add_argument('--cents', action='store_true', help='Write integer-cents amounts')
+    run_parser.add_argument('--validate', action='store_true',
+                            help='Quarantine invalid contracts instead of stopping the run')
+    run_parser.add_argument('--exact-days', action='store_true', help='Discount by exact day count')
+    run_parser.add_argument('--day-count', choices=DAY_COUNTS, default='ACT/365.25',
+                            help='Day-count convention with --exact-days (default: ACT/365.25)')
+    run_parser.add_argument('--discount-to', choices=DISCOUNT_POINTS, default='end',
+                            help='Discount each service period from its end or its midpoint')
+    run_parser.add_argument('--restart', action='store_true', help='Discard an existing checkpoint')
+    run_parser.add_argument('--quiet', action='store_true', help='No progress output')
+
+    status_parser = commands.add_parser('status', help='Show the checkpoint of an output directory')
+    status_parser.add_argument('out', help='Output directory')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'status':
+        state = status(args.out)
+        if state is None:
+            print(f'No checkpoint in {args.out}')
+            return 1
+        print(json.dumps(state, indent=2))
+        return 0
+
+    if args.chunk_size < 1:
+        parser.error('--chunk-size must be at least 1')
+    try:
+        result = run(args.book, args.out, discount_rate=args.rate, license_pct=args.license_pct,
+                     workers=args.workers, chunk_size=args.chunk_size, cents=args.cents,
+                     validate=args.validate, exact_days=args.exact_days, day_count=args.day_count,
+                     discount_to=args.discount_to, restart=args.restart, quiet=args.quiet)
+    except (CheckpointMismatch, FileNotFoundError, ValueError) as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+
+    if result['already_complete']:
+        print(f"✓ Already complete: {result['contracts']:,} contracts in {args.out}")
+        return 0
+    rate = result['analyzed'] / result['seconds'] if result['seconds'] else 0
+    print(f"✓ {result['contracts']:,} contracts, {result['journal_lines']:,} journal lines "
+          f"in {result['seconds']:.1f}s ({rate:,.0f} contracts/s)")
+    if result['resumed_chunks']:
+        print(f"✓ Resumed after {result['resumed_chunks']} completed chunks "
+              f"({result['analyzed']:,} contracts analyzed in this run)")
+    if result['quarantined']:
+        print(f"✓ {result['quarantined']:,} quarantined contracts (see quarantine_report.csv)")
+    print(f'✓ Results in {args.out}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
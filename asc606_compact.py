@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Compact Results
+Coder Technologies Inc.
+
+Stores PV analysis, amortization schedule and journal entry rows as NumPy
+structured arrays (int64 dates, float64 amounts) instead of lists of dicts.
+CompactRecords behaves like the list it replaces: indexing returns a
+lightweight read-only row that supports row['date'], row.get(...), dict(row),
+and produces datetime objects and debit/credit lists on access. Existing
+dict-based callers keep working unchanged.
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import numpy as np
+from collections.abc import Mapping, Sequence
+from typing import Dict, List
+
+from asc606_analyzer_production import JE_CASH_RECEIPT, JE_INTEREST, JE_KINDS, JE_LICENSE, JE_SUPPORT
+
+
+PV_DTYPE = np.dtype([
+    ('period', np.int32),
+    ('start', 'datetime64[D]'),
+    ('end', 'datetime64[D]'),
+    ('service_midpoint', 'datetime64[s]'),
+    ('years_from_payment', np.float64),
+    ('stated_amount', np.float64),
+    ('present_value', np.float64),
+    ('financing_component', np.float64),
+])
+
+# period 0 is license delivery, N is Year N
+SCHEDULE_DTYPE = np.dtype([
+    ('period', np.int32),
+    ('date', 'datetime64[D]'),
+    ('opening_liability', np.float64),
+    ('interest_income', np.float64),
+    ('revenue_recognized', np.float64),
+    ('ending_liability', np.float64),
+])
+
+JOURNAL_DTYPE = np.dtype([
+    ('entry_num', np.int32),
+    ('date', 'datetime64[D]'),
+    ('kind', np.int8),
+    ('year', np.int32),
+    ('amount', np.float64),
+])
+
+
+def _value(records, index, field):
+    """Read one field as a plain Python value (datetime for dates)"""
+    value = records[field][index]
+    if isinstance(value, np.datetime64):
+        return value.astype('datetime64[us]').item()
+    return value.item()
+
+
+class _Row(Mapping):
+    """Read-only dict view of one structured-array row"""
+
+    __slots__ = ('_records', '_index')
+    keys_ = ()
+
+    def __init__(self, records: np.ndarray, index: int):
+        self._records = records
+        self._index = index
+
+    def __getitem__(self, key):
+        if key not in self.keys_:
+            raise KeyError(key)
+        return _value(self._records, self._index, key)
+
+    def __iter__(self):
+        return iter(self.keys_)
+
+    def __len__(self) -> int:
+        return len(self.keys_)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class PVRow(_Row):
+    """One row of results['pv_analysis']"""
+
+    __slots__ = ()
+    keys_ = PV_DTYPE.names
+
+
+class ScheduleRow(_Row):
+    """One row of results['amortization_schedule']"""
+
+    __slots__ = ()
+    keys_ = SCHEDULE_DTYPE.names
+
+    def __getitem__(self, key):
+        if key == 'period':
+            period = int(self._records['period'][self._index])
+            return f'Year {period}' if period else 'License Delivery'
+        return super().__getitem__(key)
+
+
+class JournalEntryRow(_Row):
+    """One entry of results['journal_entries']"""
+
+    __slots__ = ()
+    keys_ = ('entry_num', 'date', 'description', 'debits', 'credits')
+
+    def __getitem__(self, key):
+        if key in ('description', 'debits', 'credits'):
+            description, debit_account, credit_account = JE_KINDS[self._records['kind'][self._index]]
+            if key == 'description':
+                return description.format(year=int(self._records['year'][self._index]))
+            amount = float(self._records['amount'][self._index])
+            account = debit_account if key == 'debits' else credit_account
+            return [{'account': account, 'amount': amount}]
+        return super().__getitem__(key)
+
+
+class CompactRecords(Sequence):
+    """
+    List-like wrapper over a structured array of result rows
+
+    Slicing returns another CompactRecords sharing the same memory.
+    """
+
+    def __init__(self, array: np.ndarray, row_class):
+        self.array = array
+        self.row_class = row_class
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CompactRecords(self.array[index], self.row_class)
+        if index < 0:
+            index += len(self.array)
+        if not 0 <= index < len(self.array):
+            raise IndexError('record index out of range')
+        return self.row_class(self.array, index)
+
+    def __repr__(self) -> str:
+        return f'CompactRecords({len(self)} x {self.row_class.__name__})'
+
+    @property
+    def nbytes(self) -> int:
+        return self.array.nbytes
+
+    def to_dicts(self) -> List[Dict]:
+        """Materialize as a list of plain dicts"""
+        return [dict(row) for row in self]
+
+
+def revise_records(records: CompactRecords, changes: Dict[int, Dict]) -> CompactRecords:
+    """
+    Copy of records with some fields replaced
+
+    Args:
+        records: CompactRecords to copy (left unchanged)
+        changes: Row index -> {field: new value}; fields must be stored
+            fields of the array (e.g. 'date', not 'description')
+    """
+    array = records.array.copy()
+    for index, fields in changes.items():
+        for name, value in fields.items():
+            array[name][index] = value
+    return CompactRecords(array, records.row_class)
+
+
+def compact_pv_analysis(pv_analysis: List[Dict]) -> CompactRecords:
+    """Convert results['pv_analysis'] rows to CompactRecords"""
+    array = np.array([tuple(row[name] for name in PV_DTYPE.names) for row in pv_analysis], dtype=PV_DTYPE)
+    return CompactRecords(array, PVRow)
+
+
+def compact_schedule(schedule: List[Dict]) -> CompactRecords:
+    """Convert results['amortization_schedule'] rows to CompactRecords"""
+    array = np.array([
+        (i, row['date'], row['opening_liability'], row['interest_income'],
+         row['revenue_recognized'], row['ending_liability'])
+        for i, row in enumerate(schedule)
+    ], dtype=SCHEDULE_DTYPE)
+    return CompactRecords(array, ScheduleRow)
+
+
+def compact_journal_entries(entries: List[Dict]) -> CompactRecords:
+    """
+    Convert results['journal_entries'] to CompactRecords
+
+    Entries must follow the generate_journal_entries() layout: cash receipt,
+    license revenue, then interest and support for each year.
+    """
+    array = np.empty(len(entries), dtype=JOURNAL_DTYPE)
+    for i, entry in enumerate(entries):
+        if i < 2:
+            kind, year = (JE_CASH_RECEIPT, JE_LICENSE)[i], 0
+        else:
+            kind, year = (JE_INTEREST, JE_SUPPORT)[i % 2], i // 2
+        array[i] = (entry['entry_num'], entry['date'], kind, year, entry['debits'][0]['amount'])
+    return CompactRecords(array, JournalEntryRow)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Consolidated GL Posting
+Coder Technologies Inc.
+
+Summarizes a portfolio's journal entries for posting: every debit and credit
+line is aggregated by date, account and optional dimensions (customer,
+subsidiary, ...) across all contracts, so NetSuite receives a few hundred
+summary lines instead of one interest and one support entry per contract
+per year.
+
+Lines are grouped with hash-based group-by (pandas factorize over the
+combined key) and summed with bincount. Each summary line keeps a
+drill-down index (CSR offsets into the contributing journal entries), so
+any posted amount traces back to its contracts.
+
+Debits and credits are kept gross, never netted. All lines sharing a date
+and dimension values form one journal. Lines are summed in integer cents
+(dollar entries are rounded to the cent first, as a per-contract import
+would post them), so every journal balances exactly as written.
+
+Usage:
+    consolidated = consolidate_journal(portfolio, dimensions=('customer',))
+    consolidated.write_csv('netsuite_consolidated.csv')
+    consolidated.drill_down(0)        # contracts behind the first line
+
+    # Dimensions not on the book are passed one value per contract
+    consolidate_journal(portfolio, dimensions={'subsidiary': subsidiaries})
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import numpy as np
+from typing import Dict, Iterable, List, Sequence, Union
+
+from asc606_analyzer_production import ACCOUNTS, JE_KINDS
+from asc606_instrument import instrumented
+
+
+DEBIT, CREDIT = 0, 1
+
+CONSOLIDATED_COLUMNS = ['External ID', 'Date', 'Account', 'Debit', 'Credit', 'Memo']
+# CSV headers of built-in dimensions (NetSuite's Name column holds the customer)
+DIMENSION_HEADERS = {'customer': 'Name', 'subsidiary': 'Subsidiary'}
+
+# Account of each entry kind's debit and credit line
+_LINE_ACCOUNT = np.array([[ACCOUNTS.index(debit), ACCOUNTS.index(credit)] for _, debit, credit in JE_KINDS],
+                         dtype=np.int8)
+
+
+def _as_sources(sources) -> List:
+    """Accept a single portfolio or an iterable of them"""
+    if hasattr(sources, 'book'):
+        return [sources]
+    return list(sources)
+
+
+def _same_unit(sources: List) -> List:
+    """Convert dollar portfolios to cents when any source is in cents, so amounts add up"""
+    in_cents = [source.results['je_amount'].dtype.kind == 'i' for source in sources]
+    if all(in_cents) or not any(in_cents):
+        return sources
+    from asc606_cents import to_cents
+    return [source if cents else to_cents(source) for source, cents in zip(sources, in_cents)]
+
+
+def _dimension_labels(sources: List, dimensions, n: int) -> Dict[str, np.ndarray]:
+    """One label per contract for every dimension, across all sources"""
+    if isinstance(dimensions, dict):
+        names = list(dimensions)
+    else:
+        names = list(dimensions)
+        dimensions = {}
+
+    labels = {}
+    for name in names:
+        if name in dimensions:
+            values = np.asarray(dimensions[name], dtype=object)
+        elif name == 'customer':
+            values = np.concatenate([source.book.customers for source in sources])
+        else:
+            raise ValueError(f"Dimension {name!r} is not on the book; pass one value per contract, "
+                             f"e.g. dimensions={{{name!r}: values}}")
+        if len(values) != n:
+            raise ValueError(f'Dimension {name!r} has {len(values)} values for {n} contracts')
+        labels[name] = values
+    return labels
+
+
+class ConsolidatedJournal:
+    """
+    Summary GL lines with a drill-down index to the contract entries
+
+    Line arrays (one value per summary line, in posting order): date, account
+    (index into ACCOUNTS), side (DEBIT or CREDIT), amount, journal (number of
+    the date + dimensions journal the line belongs to) and one label array per
+    dimension. The contract entries of line i are entries[offsets[i]:offsets[i + 1]],
+    positions into the concatenated journal entries of all sources.
+    """
+
+    def __init__(self, date: np.ndarray, account: np.ndarray, side: np.ndarray, amount: np.ndarray,
+                 journal: np.ndarray, dimensions: Dict[str, np.ndarray], offsets: np.ndarray,
+                 entries: np.ndarray, entry_contract: np.ndarray, entry_amount: np.ndarray,
+                 contract_ids: np.ndarray):
+        self.date = date
+        self.account = account
+        self.side = side
+        self.amount = amount
+        self.journal = journal
+        self.dimensions = dimensions
+        self.offsets = offsets
+        self.entries = entries
+        self.entry_contract = entry_contract
+        self.entry_amount = entry_amount
+        self.contract_ids = contract_ids
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    @property
+    def n_journals(self) -> int:
+        return int(self.journal[-1]) + 1 if len(self.journal) else 0
+
+    @property
+    def entry_count(self) -> np.ndarray:
+        """Contract journal entries summarized by each line"""
+        return np.diff(self.offsets)
+
+    def journal_totals(self) -> Dict[str, np.ndarray]:
+        """Debit and credit totals of every journal"""
+        n = self.n_journals
+        debit = self.side == DEBIT
+        return {
+            'debit': np.bincount(self.journal[debit], self.amount[debit], minlength=n),
+            'credit': np.bincount(self.journal[~debit], self.amount[~debit], minlength=n),
+        }
+
+    @property
+    def balanced(self) -> bool:
+        """True when every journal's debits equal its credits in the cents written by rows()"""
+        from asc606_cents import round_cents
+
+        cents = self.amount if self.amount.dtype.kind == 'i' else round_cents(self.amount)
+        n = self.n_journals
+        debit = self.side == DEBIT
+        return bool(np.array_equal(np.bincount(self.journal[debit], cents[debit], minlength=n),
+                                   np.bincount(self.journal[~debit], cents[~debit], minlength=n)))
+
+    def drill_down(self, line: int) -> Dict:
+        """
+        Contract entries behind one summary line
+
+        Returns:
+            Dict with entries (positions in the concatenated journal entries),
+            contract_ids and amounts, one value per contributing entry
+        """
+        rows = self.entries[self.offsets[line]:self.offsets[line + 1]]
+        return {
+            'entries': rows,
+            'contract_ids': self.contract_ids[self.entry_contract[rows]],
+            'amounts': self.entry_amount[rows],
+        }
+
+    def contracts(self, line: int) -> np.ndarray:
+        """Distinct contract IDs contributing to one summary line"""
+        rows = self.entries[self.offsets[line]:self.offsets[line + 1]]
+        return self.contract_ids[np.unique(self.entry_contract[rows])]
+
+    def rows(self, prefix: str = 'ASC606') -> Iterable[List]:
+        """
+        NetSuite rows (CONSOLIDATED_COLUMNS plus one column per dimension)
+
+        Args:
+            prefix: External ID prefix; each journal is <prefix>-<YYYYMMDD>-<journal>
+        """
+        integer_cents = self.amount.dtype.kind == 'i'
+        if integer_cents:
+            from asc606_cents import cents_text
+
+        dates = np.datetime_as_string(self.date, unit='D').tolist()
+        labels = [values.tolist() for values in self.dimensions.values()]
+        counts = self.entry_count.tolist()
+        for i, (day, account, side, amount, journal) in enumerate(zip(
+                dates, self.account.tolist(), self.side.tolist(), self.amount.tolist(), self.journal.tolist())):
+            text = cents_text(amount) if integer_cents else round(amount, 2)
+            month, dom, year = day[5:7], day[8:10], day[:4]
+            yield [f'{prefix}-{year}{month}{dom}-{journal + 1}', f'{month}/{dom}/{year}', ACCOUNTS[account],
+                   text if side == DEBIT else '', text if side == CREDIT else '',
+                   f"ASC 606 consolidated ({counts[i]} {'entry' if counts[i] == 1 else 'entries'})"] + [values[i] for values in labels]
+
+    def write_csv(self, target, prefix: str = 'ASC606') -> int:
+        """Write the summary lines as a NetSuite journal import; returns lines written"""
+        import csv
+        from asc606_export import open_text
+
+        headers = [DIMENSION_HEADERS.get(name, name.replace('_', ' ').title()) for name in self.dimensions]
+        lines = 0
+        with open_text(target) as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(CONSOLIDATED_COLUMNS + headers)
+            for row in self.rows(prefix):
+                writer.writerow(row)
+                lines += 1
+        return lines
+
+
+@instrumented('consolidation.consolidate', rows=lambda _, journal: len(journal.entries))
+def consolidate_journal(sources, dimensions: Union[Sequence[str], Dict[str, Sequence]] = ()) -> ConsolidatedJournal:
+    """
+    Aggregate journal entries across contracts by date, account and dimensions
+
+    Args:
+        sources: PortfolioAnalyzer, CentsPortfolio, or an iterable of either
+            (analyzed first if needed). When cents and dollar sources are
+            mixed, the dollar ones are converted with to_cents()
+        dimensions: Dimension names to group by, in order. 'customer' comes
+            from the book; any other dimension is given as a dict entry of
+            one value per contract (across all sources, in source order)
+
+    Returns:
+        ConsolidatedJournal; amounts are int64 cents when any source is a
+        CentsPortfolio, otherwise dollars summed from entries rounded to the cent
+    """
+    import pandas as pd
+    from asc606_cents import round_cents
+
+    sources = _as_sources(sources)
+    for source in sources:
+        if 'je_amount' not in source.results:
+            source.analyze()
+    sources = _same_unit(sources)
+
+    # Every entry becomes a debit line and a credit line of the same amount
+    bases = np.cumsum([0] + [len(source.book) for source in sources])
+    contract_ids = np.concatenate([source.book.contract_ids for source in sources])
+    entry_contract = np.concatenate([source.results['je_contract'] + base for source, base in zip(sources, bases)])
+    entry_kind = np.concatenate([source.results['je_kind'] for source in sources])
+    entry_date = np.concatenate([source.results['je_date'] for source in sources]).astype('datetime64[D]')
+    entry_amount = np.concatenate([source.results['je_amount'] for source in sources])
+    labels = _dimension_labels(sources, dimensions, len(contract_ids))
+
+    n_entries = len(entry_kind)
+    line_entry = np.repeat(np.arange(n_entries, dtype=np.int64), 2)
+    line_side = np.tile(np.array([DEBIT, CREDIT], dtype=np.int8), n_entries)
+    line_account = _LINE_ACCOUNT[entry_kind[line_entry], line_side]
+
+    # Journal key: date then dimensions; label codes are sorted, so code order is label order
+    days = entry_date.astype(np.int64)
+    journal_key = days - days.min() if n_entries else days
+    for name, values in labels.items():
+        codes, uniques = pd.factorize(values, sort=True)
+        journal_key = journal_key * len(uniques) + codes[entry_contract]
+        journal_key, _ = pd.factorize(journal_key, sort=True)
+    journal_key = np.asarray(journal_key, dtype=np.int64)
+
+    # Line key: journal, then debits before credits, then account
+    line_key = (journal_key[line_entry] * 2 + line_side) * len(ACCOUNTS) + line_account
+    group, keys = pd.factorize(line_key, sort=True)
+    n_lines = len(keys)
+
+    # Drill-down: entries of every line, contiguous in line order
+    order = np.argsort(group, kind='stable')
+    offsets = np.zeros(n_lines + 1, dtype=np.int64)
+    np.cumsum(np.bincount(group, minlength=n_lines), out=offsets[1:])
+    entries = line_entry[order]
+
+    # Sum in cents: float64 holds these integer totals exactly
+    in_cents = entry_amount.dtype.kind == 'i'
+    entry_cents = entry_amount if in_cents else round_cents(entry_amount)
+    amount = np.round(np.bincount(group, entry_cents[line_entry], minlength=n_lines)).astype(np.int64)
+    if not in_cents:
+        amount = amount / 100
+
+    first = line_entry[order[offsets[:-1]]]
+    journal, _ = pd.factorize(journal_key[first], sort=True)
+    return ConsolidatedJournal(
+        date=entry_date[first],
+        account=(keys % len(ACCOUNTS)).astype(np.int8),
+        side=(keys // len(ACCOUNTS) % 2).astype(np.int8),
+        amount=amount,
+        journal=np.asarray(journal, dtype=np.int64),
+        dimensions={name: values[entry_contract[first]] for name, values in labels.items()},
+        offsets=offsets,
+        entries=entries,
+        entry_contract=entry_contract,
+        entry_amount=entry_amount,
+        contract_ids=contract_ids,
+    )
+
+
+def write_consolidated_csv(target, sources, dimensions: Union[Sequence[str], Dict[str, Sequence]] = (),
+                           prefix: str = 'ASC606') -> int:
+    """Consolidate sources and write the NetSuite import in one call; returns lines written"""
+    return consolidate_journal(sources, dimensions).write_csv(target, prefix)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Customer Deliverables
+Coder Technologies Inc.
+
+Renders every customer's deliverable - an Excel workbook (Portfolio Summary
+plus one amortization schedule sheet per contract) and a NetSuite import
+CSV - in worker processes, and streams them into one ZIP archive or a
+directory tree, with a manifest listing every file's size and SHA-256.
+
+Customers are rendered in sorted order and written in that order as workers
+finish, so at most a few tasks' files are held in memory at once. Output is
+byte-for-byte deterministic regardless of worker count or run time: ZIP
+entries and the workbooks' inner archives carry a fixed timestamp, and the
+workbook document properties are fixed too.
+
+Layout (inside the ZIP or under the directory):
+
+    manifest.csv
+    Acme Bank/Acme Bank - ASC 606 Analysis.xlsx
+    Acme Bank/Acme Bank - NetSuite Import.csv
+    Deka Bank/...
+
+Usage:
+    write_deliverables(book, 'deliverables_2025Q4.zip', workers=8)
+    write_deliverables(book, 'deliverables/', cents=True)
+    write_deliverables(portfolio, 'deliverables.zip')     # reuses portfolio's results
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import csv
+import hashlib
+import io
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from asc606_analyzer_production import check_discounting
+from asc606_instrument import instrumented
+from asc606_portfolio import ContractBook, PortfolioAnalyzer
+
+
+MANIFEST_FILE = 'manifest.csv'
+MANIFEST_COLUMNS = ['Customer', 'Folder', 'Contracts', 'File', 'Bytes', 'SHA-256']
+
+# Earliest time a ZIP entry can carry; used for every entry
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+FIXED_TIMESTAMP = '1980-01-01T00:00:00Z'
+
+# Analysis options used when neither the caller nor a PortfolioAnalyzer sets them
+DEFAULT_TERMS = {'use_integer_years': True, 'schedule_method': 'proportional',
+                 'day_count': 'ACT/365.25', 'discount_to': 'end'}
+
+_INVALID_PATH_CHARS = re.compile(r'[\x00-\x1f<>:"/\\|?*]')
+_CORE_DATES = re.compile(rb'(<dcterms:(?:created|modified)[^>]*>)[^<]*(</dcterms:(?:created|modified)>)')
+
+
+def _folder_name(customer: str, used: set) -> str:
+    """File-system safe, unique (case-insensitive) folder name for a customer"""
+    base = _INVALID_PATH_CHARS.sub('_', str(customer)).strip(' .')[:100] or 'Customer'
+    name, n = base, 2
+    while name.lower() in used:
+        name = f'{base} ({n})'
+        n += 1
+    used.add(name.lower())
+    return name
+
+
+def _zip_info(name: str, compress_type: int) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=FIXED_DATE_TIME)
+    info.compress_type = compress_type
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def _normalize_xlsx(data: bytes) -> bytes:
+    """Rewrite an .xlsx with fixed entry times and document dates, so equal content gives equal bytes"""
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as source, zipfile.ZipFile(out, 'w') as target:
+        for info in source.infolist():
+            content = source.read(info)
+            if info.filename == 'docProps/core.xml':
+                content = _CORE_DATES.sub(rb'\g<1>' + FIXED_TIMESTAMP.encode() + rb'\g<2>', content)
+            target.writestr(_zip_info(info.filename, info.compress_type), content)
+    return out.getvalue()
+
+
+def _render_customer(portfolio: PortfolioAnalyzer, folder: str, cents: bool,
+                     schedule_sheets: bool) -> List[Tuple[str, bytes]]:
+    """Workbook and NetSuite CSV for one customer's analyzed contracts, as (path, bytes) pairs"""
+    from asc606_export import write_journal_entries_csv, write_portfolio_workbook
+
+    if cents:
+        from asc606_cents import to_cents
+        portfolio = to_cents(portfolio)
+
+    workbook = io.BytesIO()
+    write_portfolio_workbook(workbook, portfolio, schedule_sheets=schedule_sheets)
+    journal = io.BytesIO()
+    write_journal_entries_csv(journal, portfolio)
+    return [
+        (f'{folder}/{folder} - ASC 606 Analysis.xlsx', _normalize_xlsx(workbook.getvalue())),
+        (f'{folder}/{folder} - NetSuite Import.csv', journal.getvalue()),
+    ]
+
+
+def _render_task(task: Union[ContractBook, PortfolioAnalyzer], customers: List[Tuple[str, str, int, int]],
+                 cents: bool, schedule_sheets: bool, terms: Dict) -> List[Dict]:
+    """
+    Worker entry point: render a run of customers
+
+    Args:
+        task: Contracts of every customer in the task, customer by customer;
+            a ContractBook is analyzed here, a PortfolioAnalyzer is used as is
+        customers: (customer, folder, start, stop) contract ranges in task
+        terms: PortfolioAnalyzer keyword arguments for a ContractBook
+    """
+    if isinstance(task, ContractBook):
+        task = PortfolioAnalyzer(task, **terms)
+        task.analyze()
+    return [
+        {'customer': customer, 'folder': folder, 'contracts': stop - start,
+         'files': _render_customer(task.take(np.arange(start, stop)), folder, cents, schedule_sheets)}
+        for customer, folder, start, stop in customers
+    ]
+
+
+def _plan_tasks(source: Union[ContractBook, PortfolioAnalyzer], task_contracts: int) -> Iterator[Tuple]:
+    """Group customers (sorted by name, contracts in book order) into tasks of about task_contracts contracts"""
+    book = source.book if isinstance(source, PortfolioAnalyzer) else source
+    customers = book.customers.astype(str)
+    order = np.argsort(customers, kind='stable')
+    sorted_customers = customers[order]
+    starts = np.flatnonzero(np.r_[True, sorted_customers[1:] != sorted_customers[:-1]])
+    stops = np.r_[starts[1:], len(order)]
+
+    used = set()
+    task, size = [], 0
+    for start, stop in zip(starts.tolist(), stops.tolist()):
+        task.append((book.customers[order[start]], _folder_name(sorted_customers[start], used), start, stop))
+        size += stop - start
+        if size >= task_contracts:
+            yield _take_task(source, order, task), _rebase(task)
+            task, size = [], 0
+    if task:
+        yield _take_task(source, order, task), _rebase(task)
+
+
+def _take_task(source: Union[ContractBook, PortfolioAnalyzer], order: np.ndarray, task: List):
+    return source.take(order[task[0][2]:task[-1][3]])
+
+
+def _rebase(task: List) -> List:
+    base = task[0][2]
+    return [(customer, folder, start - base, stop - base) for customer, folder, start, stop in task]
+
+
+def _iter_rendered(tasks: Iterator, workers: int, options: Tuple) -> Iterator[Dict]:
+    """Render tasks in worker processes, yielding customers in task order"""
+    if workers == 1:
+        for book, customers in tasks:
+            yield from _render_task(book, customers, *options)
+        return
+
+    max_pending = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for book, customers in tasks:
+            pending.append(executor.submit(_render_task, book, customers, *options))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class _ZipTarget:
+    def __init__(self, path: str):
+        self.archive = zipfile.ZipFile(path, 'w', allowZip64=True)
+
+    def write(self, name: str, data: bytes):
+        # Workbooks are already compressed
+        compress_type = zipfile.ZIP_STORED if name.endswith('.xlsx') else zipfile.ZIP_DEFLATED
+        self.archive.writestr(_zip_info(name, compress_type), data)
+
+    def close(self):
+        self.archive.close()
+
+
+class _DirectoryTarget:
+    def __init__(self, path: str):
+        if os.path.isdir(path) and os.listdir(path):
+            raise FileExistsError(f'{path} is not empty; write deliverables to a new directory')
+        os.makedirs(path, exist_ok=True)
+        self.root = path
+
+    def write(self, name: str, data: bytes):
+        path = os.path.join(self.root, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def close(self):
+        pass
+
+
+@instrumented('deliverables.write', rows=lambda _, summary: summary['contracts'])
+def write_deliverables(contracts: Union[ContractBook, PortfolioAnalyzer, List[Dict]], target: str,
+                       workers: int = None, cents: bool = False, schedule_sheets: bool = True,
+                       use_integer_years: Optional[bool] = None, schedule_method: Optional[str] = None,
+                       task_contracts: int = 200, day_count: Optional[str] = None,
+                       discount_to: Optional[str] = None) -> Dict:
+    """
+    Render every customer's workbook and NetSuite CSV into a ZIP or directory
+
+    Args:
+        contracts: ContractBook, PortfolioAnalyzer, or contract_data dicts in
+            the ASC606FinancingAnalyzer format. A PortfolioAnalyzer is
+            rendered from its own results (analyzed first if needed) and
+            options.
+        target: Path ending in .zip for an archive, otherwise a new or
+            empty directory
+        workers: Worker processes (default: os.cpu_count(); 1 renders in-process)
+        cents: If True, amounts are exact integer cents (asc606_cents)
+        schedule_sheets: If False, workbooks carry the Portfolio Summary only
+        use_integer_years: If True, use 1, 2, 3... years instead of exact day count
+        schedule_method: 'proportional' or 'effective_interest' (level yield)
+        task_contracts: Contracts per worker task (customers are never split)
+        day_count: Day-count convention for exact day count (see DAY_COUNTS)
+        discount_to: Discount each period from its 'end' or its 'midpoint'
+
+    Analysis options left as None take the PortfolioAnalyzer's values, or
+    DEFAULT_TERMS for other inputs.
+
+    Returns:
+        Dict with customers, contracts, files and bytes written (manifest excluded)
+
+    Raises:
+        ValueError: If an analysis option differs from the given PortfolioAnalyzer's
+    """
+    requested = {'use_integer_years': use_integer_years, 'schedule_method': schedule_method,
+                 'day_count': day_count, 'discount_to': discount_to}
+    if isinstance(contracts, PortfolioAnalyzer):
+        terms = {key: getattr(contracts, key) for key in DEFAULT_TERMS}
+        conflicts = [key for key, value in requested.items() if value is not None and value != terms[key]]
+        if conflicts:
+            raise ValueError(f"{', '.join(conflicts)} must match the PortfolioAnalyzer's options; "
+                             f"pass its book to re-analyze with other options")
+        if 'je_amount' not in contracts.results:
+            contracts.analyze()
+    else:
+        terms = {key: DEFAULT_TERMS[key] if value is None else value for key, value in requested.items()}
+        if not isinstance(contracts, ContractBook):
+            contracts = ContractBook.from_contracts(contracts)
+
+    workers = workers or os.cpu_count() or 1
+    check_discounting(terms['day_count'], terms['discount_to'])
+    options = (cents, schedule_sheets, terms)
+    output = _ZipTarget(target) if str(target).lower().endswith('.zip') else _DirectoryTarget(target)
+
+    manifest = io.StringIO()
+    writer = csv.writer(manifest, lineterminator='\n')
+    writer.writerow(MANIFEST_COLUMNS)
+    summary = {'customers': 0, 'contracts': 0, 'files': 0, 'bytes': 0}
+    try:
+        for rendered in _iter_rendered(_plan_tasks(contracts, task_contracts), workers, options):
+            for name, data in rendered['files']:
+                output.write(name, data)
+                writer.writerow([rendered['customer'], rendered['folder'], rendered['contracts'],
+                                 name, len(data), hashlib.sha256(data).hexdigest()])
+                summary['files'] += 1
+                summary['bytes'] += len(data)
+            summary['customers'] += 1
+            summary['contracts'] += rendered['contracts']
+        output.write(MANIFEST_FILE, manifest.getvalue().encode('utf-8'))
+    finally:
+        output.close()
+    return summary
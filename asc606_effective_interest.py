@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Effective Interest Solver
+Coder Technologies Inc.
+
+Level-yield (effective interest) amortization for the financing component.
+After license delivery each contract carries a liability C0 that earns
+interest at a constant periodic rate y while one support installment S is
+recognized per period:
+
+    C(k+1) = C(k) * (1 + y) - S,    interest(k) = y * C(k)
+
+The rate is solved so that total interest equals the contract's financing
+component. Every contract in a book is solved at once with a safeguarded
+Newton iteration (bisection whenever a Newton step leaves the bracket), and
+the schedule uses closed forms, so there is no per-contract Python loop.
+
+Usage:
+    interest, solution = level_yield_interest(carrying, support, financing, n_periods)
+    solution['effective_rate']      # periodic rate per contract
+    solution['iterations']          # Newton/bisection steps per contract
+    solution['converged']           # False -> proportional allocation was used
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import numpy as np
+from typing import Dict, Tuple
+
+# Below this |y| the derivative of ((1+y)^n - 1) / y uses its series
+_SERIES_CUTOFF = 1e-6
+# Periodic rates tried when bracketing the root
+_MIN_RATE = -0.999
+_MAX_RATE = 100.0
+
+
+def _residual(rate: np.ndarray, carrying: np.ndarray, payment: np.ndarray,
+              n: np.ndarray, target: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Total level-yield interest minus target, and its derivative in the rate
+
+    Total interest telescopes to C(n) - C(0) + n * S, with
+    C(n) = C0 * A - S * B, A = (1+y)^n and B = (A - 1) / y.
+    """
+    growth = n * np.log1p(rate)
+    a = np.exp(growth)
+    small = np.abs(rate) < _SERIES_CUTOFF
+    safe_rate = np.where(small, 1.0, rate)
+    b = np.where(small, n + n * (n - 1) / 2 * rate, np.expm1(growth) / safe_rate)
+
+    da = n * a / (1 + rate)
+    db = np.where(small,
+                  n * (n - 1) / 2 + n * (n - 1) * (n - 2) / 3 * rate,
+                  (da * safe_rate - np.expm1(growth)) / safe_rate ** 2)
+
+    value = carrying * (a - 1) - payment * (b - n) - target
+    return value, carrying * da - payment * db
+
+
+def solve_level_yield(carrying, payment, n_periods, interest_total,
+                      tol: float = 1e-7, max_iter: int = 100) -> Dict[str, np.ndarray]:
+    """
+    Solve the periodic effective rate for every contract at once
+
+    Args:
+        carrying: Liability after license delivery, per contract
+        payment: Support recognized each period, per contract
+        n_periods: Periods per contract
+        interest_total: Financing component to amortize, per contract
+        tol: Absolute tolerance on total interest (currency units)
+        max_iter: Iteration cap
+
+    Returns:
+        Dict of per-contract arrays: 'effective_rate' (NaN if not converged),
+        'iterations' and 'converged'
+    """
+    carrying = np.asarray(carrying, dtype=np.float64)
+    payment = np.asarray(payment, dtype=np.float64)
+    n = np.asarray(n_periods, dtype=np.float64)
+    target = np.asarray(interest_total, dtype=np.float64)
+    count = len(target)
+
+    iterations = np.zeros(count, dtype=np.int32)
+    converged = (n == 0) | (target == 0)
+
+    # Start from the average rate on straight-line balances
+    weighted = n * carrying - payment * n * (n - 1) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        guess = np.where(weighted > 0, target / weighted, 0.0)
+    guess = np.clip(guess, _MIN_RATE / 2, _MAX_RATE / 2)
+
+    # Bracket: f(0) = -target, so widen away from zero until the sign flips
+    positive = target > 0
+    limit = np.where(positive, _MAX_RATE, _MIN_RATE)
+    edge = np.where(positive, np.maximum(2 * guess, 1e-4), np.minimum(2 * guess, -1e-4))
+    edge = np.clip(edge, _MIN_RATE, _MAX_RATE)
+    bracketed = converged.copy()
+    exhausted = np.zeros(count, dtype=bool)
+    with np.errstate(over='ignore', invalid='ignore'):
+        while True:
+            idx = np.flatnonzero(~bracketed & ~exhausted)
+            if not len(idx):
+                break
+            value, _ = _residual(edge[idx], carrying[idx], payment[idx], n[idx], target[idx])
+            bracketed[idx[np.where(positive[idx], value > 0, value < 0)]] = True
+            grow = idx[~bracketed[idx]]
+            exhausted[grow[edge[grow] == limit[grow]]] = True
+            edge[grow] = np.clip(edge[grow] * 4, _MIN_RATE, _MAX_RATE)
+
+    # below/above hold rates with a negative/positive residual
+    below = np.where(positive, 0.0, edge)
+    above = np.where(positive, edge, 0.0)
+    active = bracketed & ~converged
+    inside = active & (guess > np.minimum(below, above)) & (guess < np.maximum(below, above))
+    rate = np.where(inside, guess, np.where(active, (below + above) / 2, 0.0))
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for _ in range(max_iter):
+            idx = np.flatnonzero(active)
+            if not len(idx):
+                break
+            value, slope = _residual(rate[idx], carrying[idx], payment[idx], n[idx], target[idx])
+            iterations[idx] += 1
+
+            done = np.abs(value) <= tol
+            converged[idx[done]] = True
+            active[idx[done]] = False
+
+            below[idx] = np.where(value < 0, rate[idx], below[idx])
+            above[idx] = np.where(value > 0, rate[idx], above[idx])
+            lo = np.minimum(below[idx], above[idx])
+            hi = np.maximum(below[idx], above[idx])
+
+            step = rate[idx] - value / slope
+            bisect = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+            step = np.where(bisect, (lo + hi) / 2, step)
+
+            # Bracket collapsed to machine precision: accept the rate
+            stuck = ~done & (hi - lo <= 4 * np.finfo(np.float64).eps * np.maximum(1.0, np.abs(hi)))
+            converged[idx[stuck]] = True
+            active[idx[stuck]] = False
+            rate[idx[~done]] = step[~done]
+
+    rate = np.where(converged & (n > 0), rate, np.nan)
+    return {'effective_rate': rate, 'iterations': iterations, 'converged': converged}
+
+
+def level_yield_interest(carrying, payment, interest_total, n_periods,
+                         tol: float = 1e-7, max_iter: int = 100) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Interest per period under the effective interest method
+
+    Periods are flat, each contract's periods contiguous and in order (the
+    ContractBook layout). Rounding left by the solver goes into each
+    contract's last period, so interest totals tie to the financing
+    component exactly. Contracts that do not converge keep the proportional
+    allocation of build_amortization_schedule().
+
+    Args:
+        carrying: Liability after license delivery, per contract
+        payment: Support recognized each period, per contract
+        interest_total: Financing component to amortize, per contract
+        n_periods: Periods per contract
+        tol: Absolute tolerance on total interest (currency units)
+        max_iter: Iteration cap
+
+    Returns:
+        (interest per period, solve_level_yield() result)
+    """
+    carrying = np.asarray(carrying, dtype=np.float64)
+    payment = np.asarray(payment, dtype=np.float64)
+    interest_total = np.asarray(interest_total, dtype=np.float64)
+    n_periods = np.asarray(n_periods, dtype=np.int64)
+
+    solution = solve_level_yield(carrying, payment, n_periods, interest_total, tol, max_iter)
+    rate = np.nan_to_num(solution['effective_rate'])
+
+    period_contract = np.repeat(np.arange(len(n_periods)), n_periods)
+    offsets = np.concatenate([[0], np.cumsum(n_periods)])
+    k = np.arange(len(period_contract)) - offsets[:-1][period_contract]
+
+    # interest(k) = y * C(k) = y * C0 * (1+y)^k - S * ((1+y)^k - 1)
+    y = rate[period_contract]
+    grown = np.expm1(k * np.log1p(y))
+    interest = y * carrying[period_contract] * (grown + 1) - payment[period_contract] * grown
+
+    # Proportional fallback for contracts the solver could not bracket
+    fallback = ~solution['converged'][period_contract]
+    if fallback.any():
+        balances = carrying[period_contract] - k * payment[period_contract]
+        weights = np.bincount(period_contract, balances, minlength=len(n_periods))
+        interest[fallback] = (interest_total[period_contract] * balances / weights[period_contract])[fallback]
+
+    # Residual in the last period
+    residual = interest_total - np.bincount(period_contract, interest, minlength=len(n_periods))
+    last = offsets[1:][n_periods > 0] - 1
+    interest[last] += residual[n_periods > 0]
+
+    return interest, solution
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Export Layer
+Coder Technologies Inc.
+
+Streaming writers for analysis outputs. Rows are written straight to the
+target file or buffer as they are generated, so exports of whole portfolios
+never hold the full output in memory. Excel workbooks use openpyxl's
+write-only mode, which streams each sheet to disk instead of building the
+workbook in memory; openpyxl is imported only when a workbook is written.
+
+Sources may be ASC606FinancingAnalyzer instances, PortfolioAnalyzer
+instances, or any mix of the two.
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import csv
+import io
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from asc606_analyzer_production import JE_KINDS, ASC606FinancingAnalyzer
+from asc606_instrument import instrumented
+
+
+NETSUITE_COLUMNS = ['Date', 'Account', 'Debit', 'Credit', 'Memo']
+# Combined imports add a journal key (one journal per contract entry) and customer
+PORTFOLIO_COLUMNS = ['External ID'] + NETSUITE_COLUMNS + ['Name']
+
+SCHEDULE_COLUMNS = ['Period', 'Date', 'Opening Liability', 'Interest Income', 'Revenue Recognized', 'Ending Liability']
+PV_COLUMNS = ['Period', 'Start', 'End', 'Service Midpoint', 'Years From Payment',
+              'Stated Amount', 'Present Value', 'Financing Component']
+JOURNAL_COLUMNS = ['Entry #', 'Date', 'Description', 'Account', 'Debit', 'Credit']
+PORTFOLIO_SUMMARY_COLUMNS = ['Contract ID', 'Customer', 'Cash Received', 'Transaction Price (PV)',
+                             'Financing Component', 'Financing %', 'Is Significant?', 'Discount Rate',
+                             'License Allocation %', 'License Revenue', 'Support Revenue', 'Schedule Sheet']
+
+# Financing component above this share of the stated amount is significant
+SIGNIFICANCE_THRESHOLD_PCT = 5.0
+
+_EPOCH = datetime(1970, 1, 1)
+_ROWS_PER_WRITE = 10_000
+_INVALID_SHEET_CHARS = str.maketrans({c: '_' for c in '[]:*?/\\'})
+
+
+def _is_portfolio(source) -> bool:
+    return hasattr(source, 'book') and hasattr(source, 'je_offsets')
+
+
+def _as_sources(sources) -> List:
+    """Accept a single analyzer/portfolio or an iterable of them"""
+    if isinstance(sources, ASC606FinancingAnalyzer) or _is_portfolio(sources):
+        return [sources]
+    return sources
+
+
+@contextmanager
+def open_text(target, mode: str = 'w'):
+    """Yield a text stream for a path, text buffer or binary buffer"""
+    if isinstance(target, (str, bytes)) or hasattr(target, '__fspath__'):
+        with open(target, mode, newline='', encoding='utf-8') as f:
+            yield f
+    elif isinstance(target, io.TextIOBase):
+        yield target
+    else:
+        wrapper = io.TextIOWrapper(target, encoding='utf-8', newline='')
+        try:
+            yield wrapper
+        finally:
+            wrapper.flush()
+            wrapper.detach()
+
+
+def _analyzer_rows(analyzer: ASC606FinancingAnalyzer, contract_id: str) -> Iterator[List]:
+    """NetSuite rows for one per-contract analyzer"""
+    if 'journal_entries' not in analyzer.results:
+        analyzer.analyze()
+
+    customer = analyzer.contract_data['customer']
+    for entry in analyzer.results['journal_entries']:
+        date_str = entry['date'].strftime('%m/%d/%Y')
+        external_id = f"{contract_id}-{entry['entry_num']}"
+        for debit in entry['debits']:
+            yield [external_id, date_str, debit['account'], debit['amount'], '', entry['description'], customer]
+        for credit in entry['credits']:
+            yield [external_id, date_str, credit['account'], '', credit['amount'], entry['description'], customer]
+
+
+def _portfolio_rows(portfolio, chunk_entries: int = 50_000) -> Iterator[List]:
+    """NetSuite rows for every contract of an analyzed portfolio, in book order"""
+    if 'je_amount' not in portfolio.results:
+        portfolio.analyze()
+
+    r = portfolio.results
+    contract_ids = portfolio.book.contract_ids.tolist()
+    customers = portfolio.book.customers.tolist()
+    date_strings = {}
+    memos = {}
+
+    for lo in range(0, len(r['je_amount']), chunk_entries):
+        hi = lo + chunk_entries
+        contracts = r['je_contract'][lo:hi].tolist()
+        entry_nums = r['je_entry_num'][lo:hi].tolist()
+        kinds = r['je_kind'][lo:hi].tolist()
+        years = r['je_year'][lo:hi].tolist()
+        days = r['je_date'][lo:hi].astype('int64').tolist()
+        amounts = r['je_amount'][lo:hi].tolist()
+        if r['je_amount'].dtype.kind == 'i':
+            # Integer cents (asc606_cents): write exact decimals
+            from asc606_cents import cents_text
+            amounts = [cents_text(amount) for amount in amounts]
+
+        for contract, entry_num, kind, year, day, amount in zip(contracts, entry_nums, kinds, years, days, amounts):
+            date_str = date_strings.get(day)
+            if date_str is None:
+                date_str = date_strings[day] = (_EPOCH + timedelta(days=day)).strftime('%m/%d/%Y')
+            memo = memos.get((kind, year))
+            if memo is None:
+                memo = memos[(kind, year)] = JE_KINDS[kind][0].format(year=year)
+            _, debit_account, credit_account = JE_KINDS[kind]
+            external_id = f'{contract_ids[contract]}-{entry_num}'
+            customer = customers[contract]
+            yield [external_id, date_str, debit_account, amount, '', memo, customer]
+            yield [external_id, date_str, credit_account, '', amount, memo, customer]
+
+
+def iter_journal_rows(sources) -> Iterator[List]:
+    """
+    Yield combined NetSuite rows (PORTFOLIO_COLUMNS layout) in a stable order
+
+    Order is source order, then contract order, then entry number, with each
+    entry's debit line before its credit line.
+    """
+    position = 0
+    for source in _as_sources(sources):
+        if _is_portfolio(source):
+            yield from _portfolio_rows(source)
+            position += len(source)
+        else:
+            contract_id = source.contract_data.get('contract_id', str(position))
+            yield from _analyzer_rows(source, contract_id)
+            position += 1
+
+
+@instrumented('export.journal_entries_csv', rows=lambda _, rows: rows)
+def write_journal_entries_csv(target, sources, contract_columns: bool = True) -> int:
+    """
+    Stream journal entries for one or many contracts into a NetSuite CSV
+
+    Args:
+        target: File path, text buffer or binary buffer
+        sources: Analyzer, portfolio, or an iterable of either
+        contract_columns: If True, add External ID and Name columns so one
+            file can carry many contracts; False gives the single-contract layout
+
+    Returns:
+        Number of lines written (excluding header)
+    """
+    lines = 0
+    with open_text(target) as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(PORTFOLIO_COLUMNS if contract_columns else NETSUITE_COLUMNS)
+
+        batch = []
+        for row in iter_journal_rows(sources):
+            batch.append(row if contract_columns else row[1:6])
+            if len(batch) >= _ROWS_PER_WRITE:
+                writer.writerows(batch)
+                lines += len(batch)
+                batch = []
+        writer.writerows(batch)
+        lines += len(batch)
+
+    return lines
+
+
+def _iter_contract_results(sources) -> Iterator[Tuple[str, Dict]]:
+    """Yield (contract_id, results dict) for every contract in the sources"""
+    position = 0
+    for source in _as_sources(sources):
+        if _is_portfolio(source):
+            for i in range(len(source)):
+                yield source.book.contract_ids[i], source.contract_results(i, compact=True)
+            position += len(source)
+        else:
+            if 'summary' not in source.results:
+                source.analyze()
+            yield source.contract_data.get('contract_id', str(position)), source.results
+            position += 1
+
+
+def _summary_rows(results: Dict) -> List[List]:
+    """Metric/Value rows for a single-contract Summary sheet"""
+    summary = results['summary']
+    rows = [
+        ['Customer', summary['customer']],
+        ['Cash Received', f"${summary['cash_received']:,.2f}"],
+    ]
+    if 'total_stated' in results:
+        rows.append(['Stated Contract Value', f"${results['total_stated']:,.2f}"])
+    rows += [
+        ['Transaction Price (PV)', f"${summary['transaction_price']:,.2f}"],
+        ['Financing Component', f"${summary['financing_component']:,.2f}"],
+        ['Financing %', f"{summary['financing_pct']:.2f}%"],
+        ['Is Significant?', 'YES' if abs(summary['financing_pct']) > SIGNIFICANCE_THRESHOLD_PCT else 'NO'],
+        ['Discount Rate', f"{summary['discount_rate']*100:.1f}%"],
+    ]
+    if 'effective_rate' in results:
+        rows.append(['Effective Interest Rate', f"{results['effective_rate']*100:.4f}%"])
+    rows += [
+        ['License Allocation %', f"{summary['license_pct']:.0f}%"],
+        ['License Revenue', f"${results['license_revenue']:,.2f}"],
+        ['Support Allocation %', f"{summary['support_pct']:.0f}%"],
+        ['Support Revenue', f"${results['support_total']:,.2f}"],
+    ]
+    return rows
+
+
+def _schedule_rows(results: Dict) -> Iterator[List]:
+    for row in results['amortization_schedule']:
+        yield [
+            row['period'],
+            row['date'].strftime('%Y-%m-%d'),
+            row['opening_liability'],
+            row['interest_income'],
+            row['revenue_recognized'],
+            row['ending_liability']
+        ]
+
+
+def _pv_rows(results: Dict) -> Iterator[List]:
+    for row in results['pv_analysis']:
+        yield [
+            row['period'],
+            row['start'].strftime('%Y-%m-%d'),
+            row['end'].strftime('%Y-%m-%d'),
+            row['service_midpoint'].strftime('%Y-%m-%d %H:%M'),
+            row['years_from_payment'],
+            row['stated_amount'],
+            row['present_value'],
+            row['financing_component']
+        ]
+
+
+def _journal_rows(results: Dict) -> Iterator[List]:
+    """Entry header, debit and credit lines, then a blank separator per entry"""
+    for entry in results['journal_entries']:
+        yield [entry['entry_num'], entry['date'].strftime('%Y-%m-%d'), entry['description'], None, None, None]
+        for debit in entry['debits']:
+            yield [None, None, None, debit['account'], debit['amount'], None]
+        for credit in entry['credits']:
+            yield [None, None, None, credit['account'], None, credit['amount']]
+        yield [None] * len(JOURNAL_COLUMNS)
+
+
+def _append_sheet(workbook, title: str, columns: List[str], rows: Iterable[List]):
+    """Write a complete sheet and close it so its temp file is finalized"""
+    sheet = workbook.create_sheet(title)
+    sheet.append(columns)
+    for row in rows:
+        sheet.append(row)
+    sheet.close()
+
+
+@instrumented('export.analysis_workbook')
+def write_analysis_workbook(target, results: Dict):
+    """
+    Write the single-contract workbook (Summary, PV Analysis, Amortization
+    Schedule, Journal Entries) to a file path or binary buffer
+
+    Args:
+        target: File path or binary buffer (e.g. BytesIO for the web API)
+        results: Results of ASC606FinancingAnalyzer.analyze()
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    _append_sheet(workbook, 'Summary', ['Metric', 'Value'], _summary_rows(results))
+    if 'pv_analysis' in results:
+        _append_sheet(workbook, 'PV Analysis', PV_COLUMNS, _pv_rows(results))
+    _append_sheet(workbook, 'Amortization Schedule', SCHEDULE_COLUMNS, _schedule_rows(results))
+    _append_sheet(workbook, 'Journal Entries', JOURNAL_COLUMNS, _journal_rows(results))
+    workbook.save(target)
+
+
+def _sheet_title(contract_id: str, used: set) -> str:
+    """Excel-safe, unique sheet title (max 31 characters)"""
+    base = str(contract_id).translate(_INVALID_SHEET_CHARS).strip("'")[:31] or 'Contract'
+    title, n = base, 2
+    while title.lower() in used:
+        suffix = f' ({n})'
+        title = base[:31 - len(suffix)] + suffix
+        n += 1
+    used.add(title.lower())
+    return title
+
+
+@instrumented('export.portfolio_workbook', rows=lambda _, contracts: contracts)
+def write_portfolio_workbook(target, sources, schedule_sheets: bool = True) -> int:
+    """
+    Write one workbook covering many contracts with flat memory use
+
+    The first sheet is a Portfolio Summary with one row per contract; each
+    contract then gets its own amortization schedule sheet.
+
+    Args:
+        target: File path or binary buffer
+        sources: Analyzer, portfolio, or an iterable of either
+        schedule_sheets: If False, write only the Portfolio Summary sheet
+
+    Returns:
+        Number of contracts written
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    summary_sheet = workbook.create_sheet('Portfolio Summary')
+    summary_sheet.append(PORTFOLIO_SUMMARY_COLUMNS)
+    used = {'portfolio summary'}
+
+    contracts = 0
+    for contract_id, results in _iter_contract_results(sources):
+        summary = results['summary']
+        title = _sheet_title(contract_id, used) if schedule_sheets else None
+        summary_sheet.append([
+            contract_id,
+            summary['customer'],
+            summary['cash_received'],
+            summary['transaction_price'],
+            summary['financing_component'],
+            summary['financing_pct'] / 100,
+            'YES' if abs(summary['financing_pct']) > SIGNIFICANCE_THRESHOLD_PCT else 'NO',
+            summary['discount_rate'],
+            summary['license_pct'] / 100,
+            results['license_revenue'],
+            results['support_total'],
+            title
+        ])
+        if schedule_sheets:
+            _append_sheet(workbook, title, SCHEDULE_COLUMNS, _schedule_rows(results))
+        contracts += 1
+
+    workbook.save(target)
+    return contracts
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Instrumentation
+Coder Technologies Inc.
+
+Opt-in per-stage timing for the analyzers, batch runners and exports. Stage
+methods are wrapped with @instrumented; while instrumentation is disabled
+the wrapper only checks one module global, so it stays wired in production.
+Once enabled, every stage call records wall time, rows produced and,
+optionally, its tracemalloc peak. Callbacks receive each event as it
+happens, and the per-stage totals dump as JSON.
+
+Usage:
+    with instrument(trace_memory=True) as stats:
+        analyzer.analyze()
+        analyzer.export_to_excel('output.xlsx')
+    stats.dump_json('stage_stats.json')
+
+    enable(callbacks=[lambda event: print(event['stage'], event['seconds'])])
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Instrumentation receiving events in this process; None means disabled
+_active = None
+
+
+class Instrumentation:
+    """
+    Collects stage events and per-stage totals
+
+    Totals per stage: calls, seconds, rows and peak_bytes (largest peak of
+    any call). Events are dicts with stage, seconds, rows, peak_bytes and
+    pid; they are kept only with keep_events=True.
+    """
+
+    def __init__(self, trace_memory: bool = False, keep_events: bool = False,
+                 callbacks: Iterable[Callable[[Dict], None]] = ()):
+        self.trace_memory = trace_memory
+        self.keep_events = keep_events
+        self.callbacks = list(callbacks)
+        self.totals = {}
+        self.events = []
+        self._stack = []
+        self._started_tracing = False
+
+    def add_callback(self, callback: Callable[[Dict], None]):
+        """Call callback(event) after every stage"""
+        self.callbacks.append(callback)
+
+    def reset(self):
+        self.totals = {}
+        self.events = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time a block as one call of stage name
+
+        Yields the event dict; set event['rows'] inside the block to record
+        rows produced. Nested stages each report their own peak memory.
+        """
+        event = {'stage': name, 'seconds': 0.0, 'rows': None, 'peak_bytes': None, 'pid': os.getpid()}
+        frame = None
+        if self.trace_memory:
+            # Loaded on demand; tracemalloc pulls in re and fnmatch
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+                tracemalloc.reset_peak()
+                frame = {'base': current, 'peak': current}
+                self._stack.append(frame)
+
+        start = time.perf_counter()
+        try:
+            yield event
+        finally:
+            event['seconds'] = time.perf_counter() - start
+            if frame is not None:
+                self._stack.pop()
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                event['peak_bytes'] = peak - frame['base']
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            self.record(event)
+
+    def record(self, event: Dict):
+        """Add one event (e.g. replayed from a worker process) and notify callbacks"""
+        total = self.totals.get(event['stage'])
+        if total is None:
+            total = self.totals[event['stage']] = {'calls': 0, 'seconds': 0.0, 'rows': None, 'peak_bytes': None}
+        total['calls'] += 1
+        total['seconds'] += event['seconds']
+        if event['rows'] is not None:
+            total['rows'] = (total['rows'] or 0) + event['rows']
+        if event['peak_bytes'] is not None:
+            total['peak_bytes'] = max(total['peak_bytes'] or 0, event['peak_bytes'])
+
+        if self.keep_events:
+            self.events.append(event)
+        for callback in self.callbacks:
+            callback(event)
+
+    def to_dict(self) -> Dict:
+        """Totals (and events, if kept) as a JSON-ready dict"""
+        result = {'trace_memory': self.trace_memory, 'stages': self.totals}
+        if self.keep_events:
+            result['events'] = self.events
+        return result
+
+    def dump_json(self, target):
+        """Write to_dict() to a file path or text buffer"""
+        if isinstance(target, (str, bytes)) or hasattr(target, '__fspath__'):
+            with open(target, 'w') as f:
+                json.dump(self.to_dict(), f, indent=2)
+        else:
+            json.dump(self.to_dict(), target, indent=2)
+
+
+def enable(trace_memory: bool = False, keep_events: bool = False,
+           callbacks: Iterable[Callable[[Dict], None]] = ()) -> Instrumentation:
+    """Start instrumenting this process (replaces any active instrumentation)"""
+    global _active
+    disable()
+    recorder = Instrumentation(trace_memory, keep_events, callbacks)
+    if trace_memory:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            recorder._started_tracing = True
+    _active = recorder
+    return recorder
+
+
+def disable() -> Optional[Instrumentation]:
+    """Stop instrumenting; returns the instrumentation that was active"""
+    global _active
+    recorder, _active = _active, None
+    if recorder is not None and recorder._started_tracing:
+        import tracemalloc
+        tracemalloc.stop()
+        recorder._started_tracing = False
+    return recorder
+
+
+def active() -> Optional[Instrumentation]:
+    return _active
+
+
+@contextmanager
+def instrument(trace_memory: bool = False, keep_events: bool = False,
+               callbacks: Iterable[Callable[[Dict], None]] = ()):
+    """Instrument a block; yields the Instrumentation"""
+    recorder = enable(trace_memory, keep_events, callbacks)
+    try:
+        yield recorder
+    finally:
+        if _active is recorder:
+            disable()
+
+
+def instrumented(stage: str, rows: Optional[Callable] = None):
+    """
+    Decorator recording each call as one event of stage
+
+    Args:
+        stage: Stage name, e.g. 'analyzer.calculate_present_value'
+        rows: Optional rows(first_arg, result) -> rows produced (first_arg is
+            self for methods)
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _active
+            if recorder is None:
+                return func(*args, **kwargs)
+            with recorder.stage(stage) as event:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    event['rows'] = rows(args[0] if args else None, result)
+            return result
+        return wrapper
+    return decorate
+
+
+def replay(events: List[Dict]):
+    """Record events collected in another process into this process's instrumentation"""
+    recorder = _active
+    if recorder is not None:
+        for event in events:
+            recorder.record(event)
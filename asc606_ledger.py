@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Contract Ledger
+Coder Technologies Inc.
+
+Append-only event log per contract for what happens after signing: further
+cash receipts (instalments, or refunds as negative receipts), amendments
+(changed, added or dropped service periods) and discount rate changes.
+
+Each event is effective on its date. Posted schedule rows dated before it are
+never rewritten. The contract is re-analyzed with ASC606FinancingAnalyzer's
+incremental analyze(), and the difference between what the amended contract
+would have recognized before the date and what was posted is booked there as
+a cumulative catch-up (ASC 606-10-25-13(b)). Only rows from the effective
+date onward are regenerated.
+
+A snapshot of the ledger state is kept every snapshot_every events. An
+event dated before events already applied (a late-booked receipt, say)
+rewinds to the last snapshot before its date and re-applies only the events
+after it, so the cost of an event depends on how many changes follow it, not
+on the contract's full history.
+
+A ledger without events posts exactly the analyzer's schedule and journal
+entries.
+
+Usage:
+    ledger = ContractLedger(contract_data, discount_rate=0.06, license_pct=0.20)
+    ledger.apply({'type': 'receipt', 'date': '2026-06-30', 'amount': 250_000})
+    ledger.apply({'type': 'amendment', 'date': '2027-01-01',
+                  'changes': {3: {'stated_amount': 450_000}},
+                  'add_periods': [{'start': '2030-12-31', 'end': '2031-12-30', 'stated_amount': 450_000}]})
+    ledger.apply({'type': 'rate_change', 'date': '2028-01-01', 'discount_rate': 0.065})
+    results = ledger.results()      # amortization_schedule, journal_entries, summary, events
+
+    book = PortfolioLedger()
+    book.open(contract_data, contract_id='DEKA-001')
+    book.replay(events)             # events carry a contract_id
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import bisect
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from asc606_analyzer_production import (
+    JE_CASH_RECEIPT, JE_INTEREST, JE_LICENSE, JE_SUPPORT, ASC606FinancingAnalyzer, journal_entry,
+)
+from asc606_instrument import instrumented
+
+
+EVENT_TYPES = ('receipt', 'amendment', 'rate_change')
+
+# Fields an amendment may change on a period (ASC606FinancingAnalyzer.update_period)
+PERIOD_FIELDS = ('start', 'end', 'stated_amount')
+
+# Catch-up amounts below half a cent are not posted
+CATCH_UP_TOLERANCE = 0.005
+
+# (description, account credited when the adjustment is positive)
+_CATCH_UPS = (
+    ('license', 'Cumulative catch-up - license revenue', 'License Revenue'),
+    ('support', 'Cumulative catch-up - support revenue', 'Support Revenue'),
+    ('interest', 'Cumulative catch-up - interest income', 'Interest Income'),
+)
+
+
+def _parse_date(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.strptime(value, '%Y-%m-%d')
+
+
+def _recognized(kind: str, row: Dict) -> Tuple[float, float, float]:
+    """(license, support, interest) recognized by a row of the given kind"""
+    if kind == 'license':
+        return row['revenue_recognized'], 0.0, row['interest_income']
+    if kind == 'service':
+        return 0.0, row['revenue_recognized'], row['interest_income']
+    if kind == 'catch_up':
+        return row['license_revenue'], row['support_revenue'], row['interest_income']
+    return 0.0, 0.0, row['interest_income']
+
+
+def _entry(entry_num: int, date: datetime, description: str, debit: str, credit: str, amount: float) -> Dict:
+    """Balanced journal entry; a negative amount swaps the accounts"""
+    if amount < 0:
+        debit, credit, amount = credit, debit, -amount
+    return {
+        'entry_num': entry_num,
+        'date': date,
+        'description': description,
+        'debits': [{'account': debit, 'amount': amount}],
+        'credits': [{'account': credit, 'amount': amount}]
+    }
+
+
+class ContractLedger:
+    """
+    Event-sourced ASC 606 results for one contract
+
+    rows is the posted amortization schedule: the analyzer's rows plus
+    'Cash Receipt' and 'Catch-up' rows. Every row has kind ('license',
+    'service', 'receipt' or 'catch_up'), cash_received and event (sequence
+    number of the event that posted it, 0 for the original analysis), and
+    ending_liability = opening_liability + cash_received + interest_income
+    - revenue_recognized. Catch-up rows also split revenue into
+    license_revenue and support_revenue.
+
+    recomputed_events counts event applications, including re-applications
+    after a backdated event.
+    """
+
+    def __init__(self, contract_data: Dict, discount_rate: float = 0.06, license_pct: float = 0.20,
+                 override_pv: Optional[float] = None, use_integer_years: bool = True,
+                 schedule_method: str = 'proportional', snapshot_every: int = 16,
+                 day_count: str = 'ACT/365.25', discount_to: str = 'end'):
+        """
+        Initialize ledger from the contract as signed
+
+        Args:
+            contract_data: Contract dict in the ASC606FinancingAnalyzer format
+            discount_rate: Annual discount rate
+            license_pct: Percentage allocated to license
+            override_pv: Optional - directly specify PV instead of calculating
+            use_integer_years: If True, use 1, 2, 3... years instead of exact day count
+            schedule_method: 'proportional' or 'effective_interest' (level yield)
+            snapshot_every: Events between state snapshots
+            day_count: Day-count convention for exact day count (see DAY_COUNTS)
+            discount_to: Discount each period from its 'end' or its 'midpoint'
+        """
+        self.contract_data = dict(contract_data, periods=[dict(p) for p in contract_data['periods']])
+        self.terms = {'discount_rate': discount_rate, 'license_pct': license_pct, 'override_pv': override_pv,
+                      'use_integer_years': use_integer_years, 'schedule_method': schedule_method,
+                      'day_count': day_count, 'discount_to': discount_to}
+        self.snapshot_every = snapshot_every
+        self.events: List[Dict] = []
+        self._sequence = 0
+        self.recomputed_events = 0
+
+        self.analyzer = ASC606FinancingAnalyzer(self.contract_data, **self.terms)
+        self.payment_date = self.analyzer.payment_date
+        # (date, event sequence, amount) in date order; the signing receipt is event 0
+        self.receipts: List[Tuple[datetime, int, float]] = [(self.payment_date, 0, contract_data['cash_received'])]
+        self.rows: List[Dict] = []
+        self._cumulative: List[Tuple[float, float, float]] = []
+        self._extend(0, self._full_view(self.analyzer.analyze()['amortization_schedule']), event=0)
+        self.snapshots = [self._snapshot()]
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    # State snapshots
+
+    def _first_row_on(self, date: datetime) -> int:
+        """Index of the first posted row dated on or after date (rows are in date order)"""
+        lo, hi = 0, len(self.rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.rows[mid]['date'] < date:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _snapshot(self, since: Optional[datetime] = None) -> Dict:
+        """
+        Everything apply() changes: the analyzer inputs and the rows and
+        receipts dated on or after since (all of them when since is None).
+        Restoring it is valid while nothing dated before since has changed.
+        Posted row dicts are never mutated, so they are shared.
+        """
+        if since is None or since <= self.payment_date:
+            row_cut, receipt_cut = 0, 0
+        else:
+            row_cut, receipt_cut = self._first_row_on(since), bisect.bisect_left(self.receipts, (since,))
+        return {
+            'applied': len(self.events),
+            'cash_received': self.analyzer.contract_data['cash_received'],
+            'periods': [dict(p) for p in self.analyzer.periods],
+            'discount_rate': self.analyzer.discount_rate,
+            'receipt_cut': receipt_cut,
+            'receipts': self.receipts[receipt_cut:],
+            'row_cut': row_cut,
+            'rows': self.rows[row_cut:],
+            'cumulative': self._cumulative[row_cut:],
+        }
+
+    def _restore(self, snapshot: Dict):
+        analyzer = self.analyzer
+        analyzer.contract_data['cash_received'] = snapshot['cash_received']
+        analyzer.periods = [dict(p) for p in snapshot['periods']]
+        analyzer.discount_rate = snapshot['discount_rate']
+        self.receipts[snapshot['receipt_cut']:] = snapshot['receipts']
+        self.rows[snapshot['row_cut']:] = snapshot['rows']
+        self._cumulative[snapshot['row_cut']:] = snapshot['cumulative']
+
+    # Posting
+
+    def _full_view(self, schedule: List[Dict]) -> List[Dict]:
+        """Ledger rows of the current analysis over the contract's whole life"""
+        license_row = schedule[0]
+        upfront_receipts = bisect.bisect_right(self.receipts, (self.payment_date, float('inf')))
+        upfront = sum(amount for _, _, amount in self.receipts[:upfront_receipts])
+        rows = [dict(license_row, kind='license', cash_received=upfront, opening_liability=upfront,
+                     ending_liability=upfront - license_row['revenue_recognized'])]
+        return rows + self._later_rows(schedule, upfront_receipts)
+
+    def _later_rows(self, schedule: List[Dict], first_receipt: int, since: Optional[datetime] = None) -> List[Dict]:
+        """
+        Receipt rows from receipts[first_receipt] and service rows dated on or
+        after since, in date order (receipts first on a shared date)
+        """
+        later = [(date, 0, {'period': 'Cash Receipt', 'kind': 'receipt', 'date': date, 'cash_received': amount,
+                            'interest_income': 0.0, 'revenue_recognized': 0.0})
+                 for date, _, amount in self.receipts[first_receipt:]]
+        service = [(row['date'], 1, dict(row, kind='service', year=i, cash_received=0.0))
+                   for i, row in enumerate(schedule[1:], 1) if since is None or row['date'] >= since]
+        return [row for _, _, row in sorted(later + service, key=lambda item: (item[0], item[1]))]
+
+    def _extend(self, cut: int, rows: List[Dict], event: int):
+        """Replace posted rows from cut with rows, rolling the liability forward"""
+        del self.rows[cut:]
+        del self._cumulative[cut:]
+        balance = self.rows[-1]['ending_liability'] if self.rows else 0.0
+        totals = self._cumulative[-1] if self._cumulative else (0.0, 0.0, 0.0)
+        for row in rows:
+            if row['kind'] == 'license':
+                posted = dict(row, event=event)
+            else:
+                ending = balance + row['cash_received'] + row['interest_income'] - row['revenue_recognized']
+                posted = dict(row, opening_liability=balance, ending_liability=ending, event=event)
+            self.rows.append(posted)
+            totals = tuple(total + amount for total, amount in zip(totals, _recognized(row['kind'], row)))
+            self._cumulative.append(totals)
+            balance = posted['ending_liability']
+
+    def _post(self, date: datetime, event: int):
+        """
+        Re-analyze and regenerate rows from date onward, with a catch-up row on date
+
+        Work is proportional to the contract's periods and the rows from date
+        onward; earlier rows and their running totals are left in place.
+        """
+        schedule = self.analyzer.analyze()['amortization_schedule']
+        if date <= self.payment_date:
+            self._extend(0, self._full_view(schedule), event)
+            return
+
+        # Recognized before date by the amended contract, in posting order
+        should = (0.0, 0.0, 0.0)
+        earlier = [('license', schedule[0])] if schedule[0]['date'] < date else []
+        earlier += [('service', row) for row in sorted(schedule[1:], key=lambda row: row['date']) if row['date'] < date]
+        for kind, row in earlier:
+            should = tuple(total + amount for total, amount in zip(should, _recognized(kind, row)))
+
+        cut = self._first_row_on(date)
+        posted = self._cumulative[cut - 1] if cut else (0.0, 0.0, 0.0)
+        license_adj, support_adj, interest_adj = (s - p for s, p in zip(should, posted))
+
+        rows = []
+        if any(abs(amount) >= CATCH_UP_TOLERANCE for amount in (license_adj, support_adj, interest_adj)):
+            rows.append({
+                'period': 'Catch-up', 'kind': 'catch_up', 'date': date, 'cash_received': 0.0,
+                'interest_income': interest_adj,
+                'revenue_recognized': license_adj + support_adj,
+                'license_revenue': license_adj, 'support_revenue': support_adj,
+            })
+        rows += self._later_rows(schedule, bisect.bisect_left(self.receipts, (date,)), since=date)
+        self._extend(cut, rows, event)
+
+    # Events
+
+    def _validate(self, event: Dict) -> Dict:
+        """Parsed copy of an event; raises ValueError for malformed or retroactive events"""
+        if event.get('type') not in EVENT_TYPES:
+            raise ValueError(f"Event type must be one of {EVENT_TYPES}, got {event.get('type')!r}")
+        parsed = dict(event, date=_parse_date(event['date']))
+
+        if parsed['type'] == 'receipt':
+            parsed['amount'] = float(event['amount'])
+        elif parsed['type'] == 'rate_change':
+            if not 0 <= event['discount_rate'] < 1:
+                raise ValueError(f"discount_rate must be in [0, 1), got {event['discount_rate']}")
+        else:
+            parsed['changes'] = {int(i): dict(fields) for i, fields in event.get('changes', {}).items()}
+            for i, fields in parsed['changes'].items():
+                unknown = sorted(set(fields) - set(PERIOD_FIELDS))
+                if unknown:
+                    raise ValueError(f'Amendment changes unknown fields {unknown} of period {i}; '
+                                     f'periods have {PERIOD_FIELDS}')
+            parsed['add_periods'] = [dict(p) for p in event.get('add_periods', [])]
+            for period in parsed['add_periods']:
+                if set(period) != set(PERIOD_FIELDS):
+                    raise ValueError(f'Added periods need exactly the fields {PERIOD_FIELDS}, got {sorted(period)}')
+                period['start'], period['end'] = _parse_date(period['start']), _parse_date(period['end'])
+            parsed['drop_periods'] = int(event.get('drop_periods', 0))
+            if parsed['drop_periods'] < 0:
+                raise ValueError(f"drop_periods must not be negative, got {parsed['drop_periods']}")
+        return parsed
+
+    def _apply_one(self, event: Dict):
+        """Apply a parsed event to the analyzer inputs and post from its date"""
+        analyzer = self.analyzer
+        date = event['date']
+
+        if event['type'] == 'receipt':
+            bisect.insort(self.receipts, (date, event['sequence'], event['amount']))
+            analyzer.contract_data['cash_received'] += event['amount']
+        elif event['type'] == 'rate_change':
+            analyzer.update_terms(discount_rate=event['discount_rate'])
+        else:
+            periods = analyzer.periods
+            touched = set(event['changes']) | set(range(len(periods) - event['drop_periods'], len(periods)))
+            for i in sorted(touched):
+                if not 0 <= i < len(periods):
+                    raise ValueError(f'Amendment on {date:%Y-%m-%d} changes period {i}, '
+                                     f'which does not exist')
+                if periods[i]['end'] < date:
+                    raise ValueError(f'Amendment on {date:%Y-%m-%d} changes period {i}, '
+                                     f'which ended {periods[i]["end"]:%Y-%m-%d}; amendments are prospective')
+            for i, fields in event['changes'].items():
+                analyzer.update_period(i, **fields)
+            if event['drop_periods']:
+                del periods[len(periods) - event['drop_periods']:]
+            periods.extend(dict(period) for period in event['add_periods'])
+            if not periods:
+                raise ValueError(f'Amendment on {date:%Y-%m-%d} leaves the contract without service periods')
+
+        self._post(date, event['sequence'])
+        self.recomputed_events += 1
+
+    @instrumented('ledger.apply')
+    def apply(self, event: Dict) -> Dict:
+        """
+        Append an event and post its effect from its date onward
+
+        Args:
+            event: Dict with type ('receipt', 'amendment' or 'rate_change'),
+                date (YYYY-MM-DD) and:
+                    receipt:      amount (negative for a refund)
+                    amendment:    changes ({0-based period index: {start, end,
+                                  stated_amount}}), add_periods (list of
+                                  period dicts), drop_periods (trailing
+                                  periods removed)
+                    rate_change:  discount_rate
+
+        Returns:
+            The stored event, with its sequence number
+
+        Raises:
+            ValueError: The event is malformed or retroactive. On this or any
+                other error the ledger is left as it was.
+        """
+        parsed = self._validate(event)
+        parsed['sequence'] = self._sequence + 1
+        key = (parsed['date'], parsed['sequence'])
+
+        position = len(self.events)
+        while position and (self.events[position - 1]['date'], self.events[position - 1]['sequence']) > key:
+            position -= 1
+
+        # Rows before an in-order event's date are untouched, so only the rest is saved
+        events, snapshots = self.events, self.snapshots
+        applied, snapshot_count = len(events), len(snapshots)
+        backdated = position < len(self.events)
+        before = self._snapshot(None if backdated else parsed['date'])
+        if backdated:
+            # Rewind to the last snapshot before it and re-apply what follows
+            snapshot = max((s for s in self.snapshots if s['applied'] <= position), key=lambda s: s['applied'])
+            self.snapshots = [s for s in self.snapshots if s['applied'] <= snapshot['applied']]
+            self._restore(snapshot)
+            replay = self.events[snapshot['applied']:position] + [parsed] + self.events[position:]
+            self.events = self.events[:snapshot['applied']]
+        else:
+            replay = [parsed]
+
+        try:
+            for item in replay:
+                self._apply_one(item)
+                self.events.append(item)
+                if len(self.events) % self.snapshot_every == 0:
+                    # Later events are dated on or after item, so earlier rows stay as they are
+                    self.snapshots.append(self._snapshot(item['date']))
+        except Exception:
+            # A failed event leaves the ledger as it was
+            del events[applied:]
+            del snapshots[snapshot_count:]
+            self.events, self.snapshots = events, snapshots
+            self._restore(before)
+            self.analyzer.analyze()
+            raise
+
+        self._sequence += 1
+        return parsed
+
+    # Results
+
+    def journal_entries(self) -> List[Dict]:
+        """Journal entries for every posted row, numbered in posting order"""
+        entries = []
+        for row in self.rows:
+            number = len(entries) + 1
+            if row['kind'] == 'license':
+                entries.append(journal_entry(number, row['date'], JE_CASH_RECEIPT, row['cash_received']))
+                entries.append(journal_entry(number + 1, row['date'], JE_LICENSE, row['revenue_recognized']))
+            elif row['kind'] == 'service':
+                entries.append(journal_entry(number, row['date'], JE_INTEREST, row['interest_income'], year=row['year']))
+                entries.append(journal_entry(number + 1, row['date'], JE_SUPPORT, row['revenue_recognized'],
+                                             year=row['year']))
+            elif row['kind'] == 'receipt':
+                description = 'Cash receipt' if row['cash_received'] >= 0 else 'Refund'
+                entries.append(_entry(number, row['date'], description, 'Cash', 'Contract Liability',
+                                      row['cash_received']))
+            else:
+                amounts = {'license': row['license_revenue'], 'support': row['support_revenue'],
+                           'interest': row['interest_income']}
+                for key, description, account in _CATCH_UPS:
+                    if abs(amounts[key]) >= CATCH_UP_TOLERANCE:
+                        entries.append(_entry(len(entries) + 1, row['date'], description, 'Contract Liability',
+                                              account, amounts[key]))
+        return entries
+
+    def balance(self, as_of) -> float:
+        """Contract liability at the end of as_of (posted rows dated on or before it)"""
+        as_of = _parse_date(as_of)
+        balance = 0.0
+        for row in self.rows:
+            if row['date'] > as_of:
+                break
+            balance = row['ending_liability']
+        return balance
+
+    def results(self) -> Dict:
+        """
+        Analyzer-style results of the posted ledger
+
+        Returns:
+            Dict with amortization_schedule (posted rows), journal_entries,
+            summary (current terms; cash_received is net receipts), events
+            and the current analysis's total_pv, license_revenue and
+            support_total
+        """
+        current = self.analyzer.results
+        summary = dict(current['summary'], cash_received=self.analyzer.contract_data['cash_received'])
+        return {
+            'total_pv': current['total_pv'],
+            'financing_component': current['financing_component'],
+            'license_revenue': current['license_revenue'],
+            'support_total': current['support_total'],
+            'amortization_schedule': list(self.rows),
+            'journal_entries': self.journal_entries(),
+            'summary': summary,
+            'events': list(self.events),
+        }
+
+
+class PortfolioLedger:
+    """
+    Contract ledgers keyed by contract ID
+
+    Usage:
+        book = PortfolioLedger(discount_rate=0.06, license_pct=0.20)
+        for contract in contracts:
+            book.open(contract)
+        book.replay(events)
+    """
+
+    def __init__(self, **terms):
+        """
+        Args:
+            **terms: Defaults for every ContractLedger (discount_rate,
+                license_pct, use_integer_years, schedule_method, snapshot_every, day_count, discount_to)
+        """
+        self.terms = terms
+        self.ledgers: Dict[str, ContractLedger] = {}
+
+    def __len__(self) -> int:
+        return len(self.ledgers)
+
+    def __getitem__(self, contract_id: str) -> ContractLedger:
+        return self.ledgers[contract_id]
+
+    def open(self, contract_data: Dict, contract_id: Optional[str] = None, **terms) -> ContractLedger:
+        """Start a contract's ledger (contract_id defaults to contract_data['contract_id'])"""
+        contract_id = str(contract_id if contract_id is not None else contract_data['contract_id'])
+        if contract_id in self.ledgers:
+            raise ValueError(f'Contract {contract_id} already has a ledger')
+        ledger = ContractLedger(contract_data, **dict(self.terms, **terms))
+        self.ledgers[contract_id] = ledger
+        return ledger
+
+    def apply(self, event: Dict) -> Dict:
+        """Apply one event (with a contract_id) to its contract's ledger"""
+        contract_id = str(event['contract_id'])
+        if contract_id not in self.ledgers:
+            raise KeyError(f'No ledger for contract {contract_id}')
+        return self.ledgers[contract_id].apply(event)
+
+    @instrumented('ledger.replay', rows=lambda _, applied: applied)
+    def replay(self, events: Iterable[Dict]) -> int:
+        """
+        Apply a stream of events, each to its contract's ledger
+
+        Events of each contract are applied in date order, so a sorted log
+        never rewinds; work is proportional to the number of events.
+
+        Returns:
+            Number of events applied
+        """
+        by_contract: Dict[str, List[Dict]] = {}
+        for event in events:
+            by_contract.setdefault(str(event['contract_id']), []).append(event)
+
+        applied = 0
+        for contract_id, contract_events in by_contract.items():
+            if contract_id not in self.ledgers:
+                raise KeyError(f'No ledger for contract {contract_id}')
+            ledger = self.ledgers[contract_id]
+            for event in sorted(contract_events, key=lambda e: _parse_date(e['date'])):
+                ledger.apply(event)
+                applied += 1
+        return applied
+
+    def journal_entries(self) -> Iterator[Tuple[str, Dict]]:
+        """(contract_id, entry) for every posted entry, contract by contract"""
+        for contract_id, ledger in self.ledgers.items():
+            for entry in ledger.journal_entries():
+                yield contract_id, entry
+
+    def balances(self, as_of) -> Dict[str, float]:
+        """Contract liability of every contract at the end of as_of"""
+        return {contract_id: ledger.balance(as_of) for contract_id, ledger in self.ledgers.items()}
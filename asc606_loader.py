@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Contract Book Loader
+Coder Technologies Inc.
+
+Streams a flat contract/period file (CSV or Parquet) into ContractBook batches
+without ever loading the whole file. The file has one row per service period:
+
+    contract_id,customer,cash_received,payment_date,start,end,stated_amount
+    DEKA-001,Deka Bank,2100000,2025-12-31,2025-12-31,2026-12-30,420000
+    DEKA-001,Deka Bank,2100000,2025-12-31,2026-12-31,2027-12-30,420000
+    ...
+
+Optional columns discount_rate, license_pct and override_pv set per-contract
+values. All rows of a contract must be adjacent (e.g. sorted by contract_id);
+a contract whose rows are split raises ValueError rather than loading twice.
+Period rows are kept in file order. pandas (and pyarrow for Parquet) are
+imported when a file is first read.
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import numpy as np
+from typing import Dict, Iterator, Optional
+
+from asc606_instrument import instrumented
+from asc606_portfolio import ContractBook
+
+
+REQUIRED_COLUMNS = ('contract_id', 'customer', 'cash_received', 'payment_date', 'start', 'end', 'stated_amount')
+OPTIONAL_COLUMNS = ('discount_rate', 'license_pct', 'override_pv')
+
+
+def _detect_format(path: str) -> str:
+    """Guess file format from extension"""
+    return 'parquet' if str(path).lower().endswith(('.parquet', '.pq')) else 'csv'
+
+
+def _iter_frames(path: str, chunk_rows: int, file_format: str) -> Iterator['pd.DataFrame']:
+    """Read the file in chunks of at most chunk_rows rows"""
+    import pandas as pd
+
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    elif file_format == 'csv':
+        yield from pd.read_csv(path, chunksize=chunk_rows, dtype={'contract_id': str, 'customer': str})
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+
+def _parse_dates(column: 'pd.Series') -> np.ndarray:
+    """Parse a date column to datetime64[D]"""
+    import pandas as pd
+
+    return pd.to_datetime(column, format='%Y-%m-%d').values.astype('datetime64[D]')
+
+
+@instrumented('loader.frame_to_book', rows=lambda _, book: len(book))
+def frame_to_book(frame: 'pd.DataFrame', discount_rate=0.06, license_pct=0.20) -> ContractBook:
+    """
+    Convert period rows of complete contracts into a ContractBook
+
+    Args:
+        frame: Period rows, with each contract's rows adjacent
+        discount_rate: Rate for contracts without a discount_rate value
+        license_pct: License allocation for contracts without a license_pct value
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Contract file is missing columns: {', '.join(missing)}")
+
+    ids = frame['contract_id'].astype(str).values
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.zeros(0, dtype=np.int64)
+    n_periods = np.diff(np.r_[starts, len(ids)])
+
+    def per_contract(column, default):
+        if column not in frame.columns:
+            return default
+        values = frame[column].values[starts].astype(np.float64)
+        return np.where(np.isnan(values), default, values)
+
+    return ContractBook(
+        contract_ids=ids[starts],
+        customers=frame['customer'].values[starts],
+        cash_received=frame['cash_received'].values[starts],
+        payment_date=_parse_dates(frame['payment_date'].iloc[starts]),
+        n_periods=n_periods,
+        period_start=_parse_dates(frame['start']),
+        period_end=_parse_dates(frame['end']),
+        stated_amount=frame['stated_amount'].values,
+        discount_rate=per_contract('discount_rate', discount_rate),
+        license_pct=per_contract('license_pct', license_pct),
+        override_pv=per_contract('override_pv', np.nan),
+    )
+
+
+def iter_contract_books(path: str, batch_size: int = 10_000, chunk_rows: int = 100_000,
+                        discount_rate=0.06, license_pct=0.20,
+                        file_format: Optional[str] = None,
+                        quarantine: Optional['Quarantine'] = None) -> Iterator[ContractBook]:
+    """
+    Stream a contract file as ContractBook batches
+
+    Memory is bounded by chunk_rows file rows plus one batch of contracts,
+    plus the IDs of the contracts already yielded (to reject split contracts).
+
+    Args:
+        path: CSV or Parquet file with one row per period
+        batch_size: Contracts per yielded book (the last book may be smaller)
+        chunk_rows: File rows read per chunk
+        discount_rate: Rate for contracts without a discount_rate value
+        license_pct: License allocation for contracts without a license_pct value
+        file_format: 'csv' or 'parquet' (default: from file extension)
+        quarantine: Optional asc606_validation.Quarantine; contracts that fail
+            validation are held there instead of being loaded
+
+    Yields:
+        ContractBook of up to batch_size complete contracts
+
+    Raises:
+        ValueError: If a contract's rows are not adjacent (unless the
+            quarantine holds every part of it)
+    """
+    import pandas as pd
+
+    file_format = file_format or _detect_format(path)
+    carry = None
+    pending = None
+    loaded = set()
+
+    def to_book(frame):
+        if quarantine is not None:
+            frame = quarantine.filter(frame)
+        book = frame_to_book(frame, discount_rate, license_pct)
+        for contract_id in book.contract_ids.tolist():
+            if contract_id in loaded:
+                raise ValueError(f"Rows of contract {contract_id!r} are not adjacent in {path}; "
+                                 f"sort the file by contract_id")
+            loaded.add(contract_id)
+        return book
+
+    def emit(book):
+        nonlocal pending
+        if pending is not None and len(pending):
+            book = ContractBook.concat([pending, book])
+        start = 0
+        while len(book) - start >= batch_size:
+            yield book.slice(start, start + batch_size)
+            start += batch_size
+        pending = book.slice(start, len(book))
+
+    for chunk in _iter_frames(path, chunk_rows, file_format):
+        frame = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+        if not len(frame):
+            continue
+
+        # The last contract may continue in the next chunk; hold it back
+        ids = frame['contract_id'].astype(str).values
+        split = len(ids)
+        while split > 0 and ids[split - 1] == ids[-1]:
+            split -= 1
+        carry = frame.iloc[split:]
+        if split:
+            yield from emit(to_book(frame.iloc[:split]))
+
+    if carry is not None and len(carry):
+        yield from emit(to_book(carry))
+    if pending is not None and len(pending):
+        yield pending
+
+
+def iter_contracts(path: str, chunk_rows: int = 100_000, file_format: Optional[str] = None,
+                   quarantine: Optional['Quarantine'] = None) -> Iterator[Dict]:
+    """
+    Stream a contract file as contract_data dicts for ASC606FinancingAnalyzer
+
+    Per-contract discount_rate, license_pct and override_pv values (if any)
+    are included in each dict. With a quarantine, invalid contracts are
+    skipped and collected there (see iter_contract_books).
+    """
+    for book in iter_contract_books(path, batch_size=1_000, chunk_rows=chunk_rows, file_format=file_format,
+                                    quarantine=quarantine):
+        for i in range(len(book)):
+            contract_data = book.contract_data(i)
+            contract_data['discount_rate'] = float(book.discount_rate[i])
+            contract_data['license_pct'] = float(book.license_pct[i])
+            if not np.isnan(book.override_pv[i]):
+                contract_data['override_pv'] = float(book.override_pv[i])
+            yield contract_data
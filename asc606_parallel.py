@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Parallel Batch Runner
+Coder Technologies Inc.
+
+Spreads a contract book across a process pool. The book is cut into chunks of
+chunk_size contracts, each worker runs the vectorized PortfolioAnalyzer on its
+chunk, and the results are merged back in input order, so output is identical
+to a single-process run regardless of worker count or completion order.
+When asc606_instrument is enabled in the parent, each worker's stage events
+come back with its results and are recorded in the parent.
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import asc606_instrument
+from asc606_analyzer_production import check_discounting
+from asc606_portfolio import ContractBook, PortfolioAnalyzer, _as_book
+
+
+def _analyze_chunk(book: ContractBook, terms: Dict) -> Dict:
+    """Analyze one chunk and return its result arrays"""
+    return PortfolioAnalyzer(book, **terms).analyze()
+
+
+def _worker(book: ContractBook, terms: Dict, trace_memory: Optional[bool]) -> Tuple[Dict, Optional[List[Dict]]]:
+    """
+    Worker entry point: analyze one chunk
+
+    trace_memory is None when the parent is not instrumented; otherwise the
+    chunk's stage events are collected and returned for the parent to replay.
+    """
+    if trace_memory is None:
+        return _analyze_chunk(book, terms), None
+    with asc606_instrument.instrument(trace_memory=trace_memory, keep_events=True) as recorder:
+        with recorder.stage('parallel.chunk') as event:
+            results = _analyze_chunk(book, terms)
+            event['rows'] = len(book)
+    return results, recorder.events
+
+
+def _attach(book: ContractBook, results: Dict, terms: Dict) -> PortfolioAnalyzer:
+    """Rebuild an analyzed portfolio from a chunk and its worker results"""
+    portfolio = PortfolioAnalyzer(book, **terms)
+    portfolio.results = results
+    return portfolio
+
+
+def iter_parallel(books: Iterable[ContractBook], workers: Optional[int] = None,
+                  use_integer_years: bool = True, max_pending: Optional[int] = None,
+                  schedule_method: str = 'proportional', day_count: str = 'ACT/365.25',
+                  discount_to: str = 'end') -> Iterator[PortfolioAnalyzer]:
+    """
+    Analyze a stream of books in worker processes, yielding them in input order
+
+    At most max_pending books are in flight at once, so a lazy source such as
+    iter_contract_books() is never read far ahead of the results.
+
+    Args:
+        books: Books to analyze
+        workers: Worker processes (default: os.cpu_count(); 1 runs in-process)
+        use_integer_years: If True, use 1, 2, 3... years instead of exact day count
+        max_pending: Books submitted but not yet yielded (default: 2 * workers)
+        schedule_method: 'proportional' or 'effective_interest' (level yield)
+        day_count: Day-count convention for exact day count (see DAY_COUNTS)
+        discount_to: Discount each period from its 'end' or its 'midpoint'
+
+    Yields:
+        Analyzed PortfolioAnalyzer per input book
+    """
+    check_discounting(day_count, discount_to)
+    terms = {'use_integer_years': use_integer_years, 'schedule_method': schedule_method,
+             'day_count': day_count, 'discount_to': discount_to}
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for book in books:
+            yield _attach(book, _analyze_chunk(book, terms), terms)
+        return
+
+    # Instrumented parents get each worker's stage events back with its results
+    recorder = asc606_instrument.active()
+    trace_memory = recorder.trace_memory if recorder is not None else None
+
+    def collect(book, future):
+        results, events = future.result()
+        if events:
+            asc606_instrument.replay(events)
+        return _attach(book, results, terms)
+
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for book in books:
+            pending.append((book, executor.submit(_worker, book, terms, trace_memory)))
+            if len(pending) >= max_pending:
+                yield collect(*pending.popleft())
+        while pending:
+            yield collect(*pending.popleft())
+
+
+def iter_chunks(book: ContractBook, chunk_size: int) -> Iterator[ContractBook]:
+    """Cut a book into consecutive chunks of chunk_size contracts"""
+    for start in range(0, len(book), chunk_size):
+        yield book.slice(start, min(start + chunk_size, len(book)))
+
+
+def run_parallel(contracts: Union[ContractBook, Iterable[Dict]], workers: Optional[int] = None,
+                 chunk_size: int = 5_000, use_integer_years: bool = True,
+                 discount_rate=None, license_pct=None, schedule_method: str = 'proportional',
+                 day_count: str = 'ACT/365.25', discount_to: str = 'end',
+                 override_pv=None) -> PortfolioAnalyzer:
+    """
+    Analyze a whole book across a process pool and merge the results
+
+    Args:
+        contracts: ContractBook, or contract_data dicts in the ASC606FinancingAnalyzer format
+        workers: Worker processes (default: os.cpu_count())
+        chunk_size: Contracts per worker task
+        use_integer_years: If True, use 1, 2, 3... years instead of exact day count
+        discount_rate: Annual discount rate (scalar or one per contract)
+        license_pct: Percentage allocated to license (scalar or one per contract)
+        schedule_method: 'proportional' or 'effective_interest' (level yield)
+        day_count: Day-count convention for exact day count (see DAY_COUNTS)
+        discount_to: Discount each period from its 'end' or its 'midpoint'
+        override_pv: Optional PV per contract instead of calculating
+
+    discount_rate, license_pct and override_pv apply as in analyze_portfolio():
+    None keeps each contract's own terms, and given values replace a
+    ContractBook's columns.
+
+    Returns:
+        Analyzed PortfolioAnalyzer covering every contract, in input order
+    """
+    contracts = _as_book(contracts, discount_rate, license_pct, override_pv)
+    if not len(contracts):
+        terms = {'use_integer_years': use_integer_years, 'schedule_method': schedule_method,
+                 'day_count': day_count, 'discount_to': discount_to}
+        return _attach(contracts, _analyze_chunk(contracts, terms), terms)
+
+    portfolios = list(iter_parallel(iter_chunks(contracts, chunk_size), workers, use_integer_years,
+                                    schedule_method=schedule_method, day_count=day_count,
+                                    discount_to=discount_to))
+    return PortfolioAnalyzer.concat(portfolios)
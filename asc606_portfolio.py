@@ -0,0 +1,755 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Portfolio Engine
+Coder Technologies Inc.
+
+Vectorized version of ASC606FinancingAnalyzer for analyzing a whole contract
+book in one call. Contracts are held column-wise in a ContractBook (one NumPy
+array per field, with every contract's periods stored back to back), and each
+analysis stage runs as a handful of array operations over the entire book
+instead of one Python loop per contract.
+
+Results match ASC606FinancingAnalyzer to the cent; contract_results() rebuilds
+the familiar per-contract results dict for any single contract.
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import numpy as np
+from datetime import datetime
+from typing import Dict, Iterable, List, Union
+
+from asc606_analyzer_production import (
+    DISCOUNT_FACTORS,
+    JE_CASH_RECEIPT,
+    JE_INTEREST,
+    JE_LICENSE,
+    JE_SUPPORT,
+    SCHEDULE_METHODS,
+    check_discounting,
+    journal_entry,
+)
+from asc606_dates import discount_years, parse_dates, service_midpoints
+from asc606_effective_interest import level_yield_interest
+from asc606_instrument import instrumented
+
+
+# Result keys with one value per period row; 'schedule_*' keys have one per
+# schedule row, 'je_*' keys one per journal entry, the rest one per contract
+PERIOD_RESULTS = ('service_midpoint', 'years_from_payment', 'present_value', 'period_financing')
+
+
+def _as_column(value, length: int, dtype) -> np.ndarray:
+    """Broadcast a scalar or sequence to a 1-D array of the given length"""
+    column = np.asarray(value, dtype=dtype)
+    if column.ndim == 0:
+        return np.full(length, column, dtype=dtype)
+    if len(column) != length:
+        raise ValueError(f"Expected {length} values, got {len(column)}")
+    return column
+
+
+def _segment_rows(offsets: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Row positions of the given segments (offsets plus end sentinel), in the given order"""
+    counts = offsets[1:][indices] - offsets[:-1][indices]
+    return np.repeat(offsets[:-1][indices] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+
+def _to_datetimes(values: np.ndarray) -> List[datetime]:
+    """Convert a datetime64 array to a list of datetime objects"""
+    return values.astype('datetime64[us]').tolist()
+
+
+def _segmented_cumsum(values: np.ndarray, offsets: np.ndarray, n_periods: np.ndarray) -> np.ndarray:
+    """Cumulative sum restarting at every contract boundary
+
+    Contracts are grouped by period count so each group is a dense 2-D block;
+    books rarely have more than a few distinct contract lengths.
+    """
+    out = np.empty_like(values)
+    for n in np.unique(n_periods):
+        if n == 0:
+            continue
+        rows = offsets[:-1][n_periods == n][:, None] + np.arange(n)
+        out[rows] = np.cumsum(values[rows], axis=1)
+    return out
+
+
+class ContractBook:
+    """
+    Column-oriented contract book
+
+    Contract-level fields are arrays of length len(book). Period-level fields
+    are flat arrays with each contract's periods stored contiguously, in
+    contract order; n_periods gives the number of periods per contract.
+
+    Usage:
+        book = ContractBook.from_contracts(
+            [deka_contract_data, acme_contract_data],
+            discount_rate=0.06,
+            license_pct=0.20
+        )
+    """
+
+    def __init__(self, contract_ids, customers, cash_received, payment_date,
+                 n_periods, period_start, period_end, stated_amount,
+                 discount_rate=0.06, license_pct=0.20, override_pv=None):
+        """
+        Initialize book from columns
+
+        Args:
+            contract_ids: Unique identifier per contract
+            customers: Customer name per contract
+            cash_received: Cash received per contract
+            payment_date: Payment date per contract (datetime64 or ISO strings)
+            n_periods: Number of service periods per contract
+            period_start: Start date of every period, contract by contract
+            period_end: End date of every period, contract by contract
+            stated_amount: Stated amount of every period, contract by contract
+            discount_rate: Annual discount rate (scalar or one per contract)
+            license_pct: Percentage allocated to license (scalar or one per contract)
+            override_pv: Optional PV per contract; NaN or 0 means calculate it
+        """
+        self.contract_ids = np.asarray(contract_ids, dtype=object)
+        n = len(self.contract_ids)
+        self.customers = _as_column(customers, n, object)
+        self.cash_received = _as_column(cash_received, n, np.float64)
+        self.payment_date = _as_column(parse_dates(payment_date), n, 'datetime64[D]')
+        self.n_periods = _as_column(n_periods, n, np.int64)
+        self.discount_rate = _as_column(discount_rate, n, np.float64)
+        self.license_pct = _as_column(license_pct, n, np.float64)
+        self.override_pv = _as_column(np.nan if override_pv is None else override_pv, n, np.float64)
+
+        total_periods = int(self.n_periods.sum())
+        self.period_start = _as_column(parse_dates(period_start), total_periods, 'datetime64[D]')
+        self.period_end = _as_column(parse_dates(period_end), total_periods, 'datetime64[D]')
+        self.stated_amount = _as_column(stated_amount, total_periods, np.float64)
+
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(self.n_periods, out=self.offsets[1:])
+
+    def __len__(self) -> int:
+        return len(self.contract_ids)
+
+    @property
+    def period_contract(self) -> np.ndarray:
+        """Contract index of every period row"""
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.n_periods)
+
+    @property
+    def period_number(self) -> np.ndarray:
+        """1-based position of every period row within its contract"""
+        return np.arange(len(self.stated_amount), dtype=np.int64) - np.repeat(self.offsets[:-1], self.n_periods) + 1
+
+    @classmethod
+    def from_contracts(cls, contracts: Iterable[Dict], discount_rate=0.06, license_pct=0.20, override_pv=None) -> 'ContractBook':
+        """
+        Build a book from contract_data dicts (the ASC606FinancingAnalyzer format)
+
+        A contract dict may carry its own 'contract_id', 'discount_rate',
+        'license_pct' or 'override_pv'; otherwise the book-wide values are used.
+        """
+        contracts = list(contracts)
+        n = len(contracts)
+        rates = _as_column(discount_rate, n, np.float64)
+        licenses = _as_column(license_pct, n, np.float64)
+        overrides = _as_column(np.nan if override_pv is None else override_pv, n, np.float64)
+
+        periods = [p for c in contracts for p in c['periods']]
+        return cls(
+            contract_ids=[str(c.get('contract_id', i)) for i, c in enumerate(contracts)],
+            customers=[c['customer'] for c in contracts],
+            cash_received=[c['cash_received'] for c in contracts],
+            payment_date=[c['payment_date'] for c in contracts],
+            n_periods=[len(c['periods']) for c in contracts],
+            period_start=[p['start'] for p in periods],
+            period_end=[p['end'] for p in periods],
+            stated_amount=[p['stated_amount'] for p in periods],
+            discount_rate=[c.get('discount_rate', rates[i]) for i, c in enumerate(contracts)],
+            license_pct=[c.get('license_pct', licenses[i]) for i, c in enumerate(contracts)],
+            override_pv=[c.get('override_pv') or overrides[i] for i, c in enumerate(contracts)],
+        )
+
+    def take(self, indices) -> 'ContractBook':
+        """Return a new book containing only the given contracts, in the given order"""
+        indices = np.asarray(indices, dtype=np.int64)
+        rows = _segment_rows(self.offsets, indices)
+        return ContractBook(
+            contract_ids=self.contract_ids[indices],
+            customers=self.customers[indices],
+            cash_received=self.cash_received[indices],
+            payment_date=self.payment_date[indices],
+            n_periods=self.n_periods[indices],
+            period_start=self.period_start[rows],
+            period_end=self.period_end[rows],
+            stated_amount=self.stated_amount[rows],
+            discount_rate=self.discount_rate[indices],
+            license_pct=self.license_pct[indices],
+            override_pv=self.override_pv[indices],
+        )
+
+    def with_terms(self, discount_rate=None, license_pct=None, override_pv=None) -> 'ContractBook':
+        """
+        Return a new book with the given contract terms replaced
+
+        Each argument is a scalar or one value per contract; None keeps the
+        book's own column (pass np.nan as override_pv to clear overrides).
+        """
+        return ContractBook(
+            contract_ids=self.contract_ids,
+            customers=self.customers,
+            cash_received=self.cash_received,
+            payment_date=self.payment_date,
+            n_periods=self.n_periods,
+            period_start=self.period_start,
+            period_end=self.period_end,
+            stated_amount=self.stated_amount,
+            discount_rate=self.discount_rate if discount_rate is None else discount_rate,
+            license_pct=self.license_pct if license_pct is None else license_pct,
+            override_pv=self.override_pv if override_pv is None else override_pv,
+        )
+
+    def slice(self, start: int, stop: int) -> 'ContractBook':
+        """Return contracts [start, stop) as a new book sharing this book's memory"""
+        lo, hi = self.offsets[start], self.offsets[stop]
+        return ContractBook(
+            contract_ids=self.contract_ids[start:stop],
+            customers=self.customers[start:stop],
+            cash_received=self.cash_received[start:stop],
+            payment_date=self.payment_date[start:stop],
+            n_periods=self.n_periods[start:stop],
+            period_start=self.period_start[lo:hi],
+            period_end=self.period_end[lo:hi],
+            stated_amount=self.stated_amount[lo:hi],
+            discount_rate=self.discount_rate[start:stop],
+            license_pct=self.license_pct[start:stop],
+            override_pv=self.override_pv[start:stop],
+        )
+
+    @classmethod
+    def concat(cls, books: List['ContractBook']) -> 'ContractBook':
+        """Concatenate books end to end"""
+        return cls(
+            contract_ids=np.concatenate([b.contract_ids for b in books]),
+            customers=np.concatenate([b.customers for b in books]),
+            cash_received=np.concatenate([b.cash_received for b in books]),
+            payment_date=np.concatenate([b.payment_date for b in books]),
+            n_periods=np.concatenate([b.n_periods for b in books]),
+            period_start=np.concatenate([b.period_start for b in books]),
+            period_end=np.concatenate([b.period_end for b in books]),
+            stated_amount=np.concatenate([b.stated_amount for b in books]),
+            discount_rate=np.concatenate([b.discount_rate for b in books]),
+            license_pct=np.concatenate([b.license_pct for b in books]),
+            override_pv=np.concatenate([b.override_pv for b in books]),
+        )
+
+    def contract_data(self, index: int) -> Dict:
+        """Rebuild the contract_data dict for one contract"""
+        lo, hi = self.offsets[index], self.offsets[index + 1]
+        return {
+            'contract_id': self.contract_ids[index],
+            'customer': self.customers[index],
+            'cash_received': float(self.cash_received[index]),
+            'payment_date': str(self.payment_date[index]),
+            'periods': [
+                {'start': str(start), 'end': str(end), 'stated_amount': float(amount)}
+                for start, end, amount in zip(self.period_start[lo:hi], self.period_end[lo:hi], self.stated_amount[lo:hi])
+            ]
+        }
+
+
+class PortfolioAnalyzer:
+    """
+    Analyzes a whole ContractBook with batched array operations
+
+    Stages mirror ASC606FinancingAnalyzer. self.results holds flat arrays at
+    three levels: one value per contract (e.g. 'total_pv'), one per period
+    (e.g. 'present_value'), one per schedule row ('schedule_*') and one per
+    journal entry ('je_*'). Each contract owns n_periods + 1 schedule rows
+    (license delivery, then Year 1..N) and 2 * n_periods + 2 journal entries.
+
+    Usage:
+        portfolio = PortfolioAnalyzer(book)
+        results = portfolio.analyze()
+        deka = portfolio.contract_results(0)
+    """
+
+    def __init__(self, book: ContractBook, use_integer_years: bool = True, schedule_method: str = 'proportional',
+                 day_count: str = 'ACT/365.25', discount_to: str = 'end'):
+        """
+        Initialize portfolio analyzer
+
+        Args:
+            book: Contracts to analyze
+            use_integer_years: If True, use 1, 2, 3... years instead of exact day count
+            schedule_method: 'proportional' or 'effective_interest' (level yield)
+            day_count: Day-count convention for exact day count (see DAY_COUNTS)
+            discount_to: Discount each period from its 'end' or its 'midpoint'
+        """
+        if schedule_method not in SCHEDULE_METHODS:
+            raise ValueError(f"schedule_method must be one of {SCHEDULE_METHODS}, got {schedule_method!r}")
+        check_discounting(day_count, discount_to)
+
+        self.book = book
+        self.use_integer_years = use_integer_years
+        self.schedule_method = schedule_method
+        self.day_count = day_count
+        self.discount_to = discount_to
+        self.results = {}
+        self._records = None
+
+    def __len__(self) -> int:
+        return len(self.book)
+
+    @classmethod
+    def concat(cls, portfolios: List['PortfolioAnalyzer']) -> 'PortfolioAnalyzer':
+        """Concatenate analyzed portfolios end to end, merging their results"""
+        first = portfolios[0]
+        combined = cls(ContractBook.concat([p.book for p in portfolios]), use_integer_years=first.use_integer_years,
+                       schedule_method=first.schedule_method, day_count=first.day_count, discount_to=first.discount_to)
+        bases = np.cumsum([0] + [len(p) for p in portfolios[:-1]])
+        for key in portfolios[0].results:
+            if key == 'je_contract':
+                combined.results[key] = np.concatenate([p.results[key] + base for p, base in zip(portfolios, bases)])
+            else:
+                combined.results[key] = np.concatenate([p.results[key] for p in portfolios])
+        return combined
+
+    def take(self, indices) -> 'PortfolioAnalyzer':
+        """Return the given contracts, in the given order, with their results"""
+        indices = np.asarray(indices, dtype=np.int64)
+        book = self.book
+        portfolio = PortfolioAnalyzer(book.take(indices), use_integer_years=self.use_integer_years,
+                                      schedule_method=self.schedule_method, day_count=self.day_count,
+                                      discount_to=self.discount_to)
+        levels = {
+            'period': _segment_rows(book.offsets, indices),
+            'schedule': _segment_rows(self.schedule_offsets, indices),
+            'je': _segment_rows(self.je_offsets, indices),
+        }
+        for key, values in self.results.items():
+            if key == 'je_contract':
+                portfolio.results[key] = np.repeat(np.arange(len(indices), dtype=np.int64),
+                                                    np.diff(portfolio.je_offsets))
+            elif key.startswith('je_'):
+                portfolio.results[key] = values[levels['je']]
+            elif key.startswith('schedule_'):
+                portfolio.results[key] = values[levels['schedule']]
+            elif key in PERIOD_RESULTS:
+                portfolio.results[key] = values[levels['period']]
+            else:
+                portfolio.results[key] = values[indices]
+        return portfolio
+
+    @property
+    def schedule_offsets(self) -> np.ndarray:
+        """Start of each contract's schedule rows (plus end sentinel)"""
+        return self.book.offsets + np.arange(len(self.book) + 1)
+
+    @property
+    def je_offsets(self) -> np.ndarray:
+        """Start of each contract's journal entries (plus end sentinel)"""
+        return 2 * self.schedule_offsets
+
+    @instrumented('portfolio.calculate_present_value', rows=lambda self, _: len(self.book.stated_amount))
+    def calculate_present_value(self) -> Dict:
+        """Calculate PV of every period and total financing component per contract"""
+        book = self.book
+        n = len(book)
+        period_contract = book.period_contract
+
+        years_diff = discount_years(book, self.use_integer_years, self.day_count, self.discount_to)
+        if self.use_integer_years:
+            factors = self._integer_year_factors(years_diff)
+        else:
+            factors = 1 / ((1 + book.discount_rate[period_contract]) ** years_diff)
+
+        stated = book.stated_amount
+        pv = stated * factors
+        financing = stated - pv
+
+        self.results['service_midpoint'] = service_midpoints(book.period_start, book.period_end)
+        self.results['years_from_payment'] = years_diff
+        self.results['present_value'] = pv
+        self.results['period_financing'] = financing
+
+        total_stated = np.bincount(period_contract, stated, minlength=n)
+        total_pv = np.bincount(period_contract, pv, minlength=n)
+        total_financing = np.bincount(period_contract, financing, minlength=n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            financing_pct = (total_financing / total_stated) * 100
+
+        # Contracts with an override PV skip discounting, as in analyze()
+        override = self.override_mask
+        cash = book.cash_received
+        total_pv = np.where(override, book.override_pv, total_pv)
+        total_financing = np.where(override, cash - book.override_pv, total_financing)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            financing_pct = np.where(override, (total_financing / cash) * 100, financing_pct)
+
+        self.results['total_stated'] = total_stated
+        self.results['total_pv'] = total_pv
+        self.results['financing_component'] = total_financing
+        self.results['financing_pct'] = financing_pct
+
+        return self.results
+
+    def _integer_year_factors(self, years_diff: np.ndarray) -> np.ndarray:
+        """Discount factor of every period from the shared rate x year table"""
+        book = self.book
+        period_contract = book.period_contract
+        rates, rate_index = np.unique(book.discount_rate, return_inverse=True)
+        max_years = int(book.n_periods.max()) if len(book) else 0
+        shift = 0.5 if self.discount_to == 'midpoint' else 0.0
+
+        # Too many distinct rates to tabulate: compute directly
+        if len(rates) * max_years > DISCOUNT_FACTORS.maxsize:
+            return 1 / ((1 + book.discount_rate[period_contract]) ** years_diff)
+
+        table = np.array([
+            [DISCOUNT_FACTORS.get(float(rate), years - shift, 'integer') for years in range(1, max_years + 1)]
+            for rate in rates
+        ]).reshape(len(rates), max_years)
+        return table[rate_index[period_contract], book.period_number - 1]
+
+    @property
+    def override_mask(self) -> np.ndarray:
+        """Contracts whose PV was supplied instead of calculated"""
+        override_pv = self.book.override_pv
+        return ~np.isnan(override_pv) & (override_pv != 0)
+
+    @instrumented('portfolio.allocate_transaction_price', rows=lambda self, _: len(self.book))
+    def allocate_transaction_price(self):
+        """Allocate adjusted transaction price to license and support"""
+        if 'total_pv' not in self.results:
+            self.calculate_present_value()
+
+        book = self.book
+        total_pv = self.results['total_pv']
+
+        self.results['license_revenue'] = total_pv * book.license_pct
+        self.results['support_total'] = total_pv * (1 - book.license_pct)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.results['annual_support'] = self.results['support_total'] / book.n_periods
+
+    @instrumented('portfolio.build_amortization_schedule', rows=lambda self, _: len(self.results['schedule_date']))
+    def build_amortization_schedule(self) -> Dict:
+        """Build amortization schedule rows for every contract"""
+        if 'license_revenue' not in self.results:
+            self.allocate_transaction_price()
+
+        book = self.book
+        n = len(book)
+        period_contract = book.period_contract
+        cash_received = book.cash_received
+        license_revenue = self.results['license_revenue']
+        annual_support = self.results['annual_support']
+        financing_component = self.results['financing_component']
+
+        # License delivery
+        license_ending = cash_received - license_revenue
+
+        # Opening balances for interest allocation decline by annual support
+        support = annual_support[period_contract]
+        opening_balances = license_ending[period_contract] - (book.period_number - 1) * support
+
+        if self.schedule_method == 'effective_interest':
+            interest, solution = level_yield_interest(license_ending, annual_support, financing_component, book.n_periods)
+            self.results['effective_rate'] = solution['effective_rate']
+            self.results['solver_iterations'] = solution['iterations']
+            self.results['solver_converged'] = solution['converged']
+        else:
+            # Allocate interest proportionally
+            total_weighted = np.bincount(period_contract, opening_balances, minlength=n)
+            interest = financing_component[period_contract] * (opening_balances / total_weighted[period_contract])
+
+        # Years 1-N roll the liability forward contract by contract
+        ending = license_ending[period_contract] + _segmented_cumsum(interest - support, book.offsets, book.n_periods)
+        opening = ending - interest + support
+
+        license_rows = self.schedule_offsets[:-1]
+        year_rows = np.arange(len(support), dtype=np.int64) + period_contract + 1
+        rows = len(support) + n
+
+        schedule_date = np.empty(rows, dtype='datetime64[D]')
+        schedule_date[license_rows] = book.payment_date
+        schedule_date[year_rows] = book.period_end
+
+        columns = {
+            'schedule_opening_liability': (cash_received, opening),
+            'schedule_interest_income': (np.zeros(n), interest),
+            'schedule_revenue_recognized': (license_revenue, support),
+            'schedule_ending_liability': (license_ending, ending),
+        }
+        self.results['schedule_date'] = schedule_date
+        for key, (license_values, year_values) in columns.items():
+            column = np.empty(rows, dtype=np.float64)
+            column[license_rows] = license_values
+            column[year_rows] = year_values
+            self.results[key] = column
+
+        return self.results
+
+    @instrumented('portfolio.generate_journal_entries', rows=lambda self, _: len(self.results['je_amount']))
+    def generate_journal_entries(self) -> Dict:
+        """Generate journal entries for every contract as flat arrays"""
+        if 'schedule_date' not in self.results:
+            self.build_amortization_schedule()
+
+        book = self.book
+        n = len(book)
+        period_contract = book.period_contract
+        schedule_offsets = self.schedule_offsets
+        je_offsets = self.je_offsets
+        rows = je_offsets[-1]
+
+        first = je_offsets[:-1]
+        license_rows = schedule_offsets[:-1]
+        interest_entries = first[period_contract] + 2 * book.period_number
+        support_entries = interest_entries + 1
+        year_rows = np.arange(len(period_contract), dtype=np.int64) + period_contract + 1
+
+        je_kind = np.empty(rows, dtype=np.int8)
+        je_year = np.zeros(rows, dtype=np.int64)
+        je_date = np.empty(rows, dtype='datetime64[D]')
+        je_amount = np.empty(rows, dtype=np.float64)
+
+        # Entry 1: Initial cash receipt; Entry 2: License revenue
+        je_kind[first] = JE_CASH_RECEIPT
+        je_date[first] = book.payment_date
+        je_amount[first] = book.cash_received
+        je_kind[first + 1] = JE_LICENSE
+        je_date[first + 1] = self.results['schedule_date'][license_rows]
+        je_amount[first + 1] = self.results['schedule_revenue_recognized'][license_rows]
+
+        # Entries 3+: Annual interest and support
+        for entries, kind, column in ((interest_entries, JE_INTEREST, 'schedule_interest_income'),
+                                      (support_entries, JE_SUPPORT, 'schedule_revenue_recognized')):
+            je_kind[entries] = kind
+            je_year[entries] = book.period_number
+            je_date[entries] = self.results['schedule_date'][year_rows]
+            je_amount[entries] = self.results[column][year_rows]
+
+        je_contract = np.repeat(np.arange(n, dtype=np.int64), np.diff(je_offsets))
+        self.results['je_contract'] = je_contract
+        self.results['je_entry_num'] = np.arange(rows, dtype=np.int64) - je_offsets[je_contract] + 1
+        self.results['je_kind'] = je_kind
+        self.results['je_year'] = je_year
+        self.results['je_date'] = je_date
+        self.results['je_amount'] = je_amount
+
+        return self.results
+
+    @instrumented('portfolio.analyze', rows=lambda self, _: len(self.book))
+    def analyze(self) -> Dict:
+        """Run complete analysis for every contract"""
+        self._records = None
+        self.calculate_present_value()
+        self.allocate_transaction_price()
+        self.build_amortization_schedule()
+        self.generate_journal_entries()
+        return self.results
+
+    def summary(self, index: int) -> Dict:
+        """Summary dict for one contract, as in ASC606FinancingAnalyzer.results['summary']"""
+        if 'je_amount' not in self.results:
+            self.analyze()
+
+        book = self.book
+        license_pct = float(book.license_pct[index])
+        return {
+            'customer': book.customers[index],
+            'cash_received': float(book.cash_received[index]),
+            'transaction_price': float(self.results['total_pv'][index]),
+            'financing_component': float(self.results['financing_component'][index]),
+            'financing_pct': float(self.results['financing_pct'][index]),
+            'discount_rate': float(book.discount_rate[index]),
+            'license_pct': license_pct * 100,
+            'support_pct': (1 - license_pct) * 100
+        }
+
+    def summaries(self) -> List[Dict]:
+        """Summary dicts for every contract"""
+        return [self.summary(i) for i in range(len(self.book))]
+
+    def records(self) -> Dict:
+        """
+        Whole-book row results as CompactRecords
+
+        Returns a dict with 'pv_analysis', 'amortization_schedule' and
+        'journal_entries' covering every contract, built once and reused by
+        contract_results(compact=True).
+        """
+        if self._records is not None:
+            return self._records
+        if 'je_amount' not in self.results:
+            self.analyze()
+
+        from asc606_compact import (
+            JOURNAL_DTYPE, PV_DTYPE, SCHEDULE_DTYPE,
+            CompactRecords, JournalEntryRow, PVRow, ScheduleRow,
+        )
+
+        book = self.book
+        r = self.results
+
+        pv = np.empty(len(book.stated_amount), dtype=PV_DTYPE)
+        pv['period'] = book.period_number
+        pv['start'] = book.period_start
+        pv['end'] = book.period_end
+        pv['service_midpoint'] = r['service_midpoint']
+        pv['years_from_payment'] = r['years_from_payment']
+        pv['stated_amount'] = book.stated_amount
+        pv['present_value'] = r['present_value']
+        pv['financing_component'] = r['period_financing']
+
+        schedule = np.empty(len(r['schedule_date']), dtype=SCHEDULE_DTYPE)
+        schedule_contract = np.repeat(np.arange(len(book)), book.n_periods + 1)
+        schedule['period'] = np.arange(len(schedule)) - self.schedule_offsets[schedule_contract]
+        schedule['date'] = r['schedule_date']
+        for field in ('opening_liability', 'interest_income', 'revenue_recognized', 'ending_liability'):
+            schedule[field] = r['schedule_' + field]
+
+        journal = np.empty(len(r['je_amount']), dtype=JOURNAL_DTYPE)
+        for field in ('entry_num', 'date', 'kind', 'year', 'amount'):
+            journal[field] = r['je_' + field]
+
+        self._records = {
+            'pv_analysis': CompactRecords(pv, PVRow),
+            'amortization_schedule': CompactRecords(schedule, ScheduleRow),
+            'journal_entries': CompactRecords(journal, JournalEntryRow),
+        }
+        return self._records
+
+    def contract_results(self, index: int, compact: bool = False) -> Dict:
+        """
+        Rebuild ASC606FinancingAnalyzer.results for one contract
+
+        Args:
+            index: Contract position in the book
+            compact: If True, row results are CompactRecords views into records()
+        """
+        if 'je_amount' not in self.results:
+            self.analyze()
+
+        book = self.book
+        r = self.results
+        results = {}
+
+        if compact:
+            records = self.records()
+            if not self.override_mask[index]:
+                results['pv_analysis'] = records['pv_analysis'][book.offsets[index]:book.offsets[index + 1]]
+                results['total_stated'] = float(r['total_stated'][index])
+            for key in ('total_pv', 'financing_component', 'financing_pct',
+                        'license_revenue', 'support_total', 'annual_support'):
+                results[key] = float(r[key][index])
+            if 'effective_rate' in r:
+                results['effective_rate'] = float(r['effective_rate'][index])
+                results['solver_iterations'] = int(r['solver_iterations'][index])
+                results['solver_converged'] = bool(r['solver_converged'][index])
+            schedule_offsets = self.schedule_offsets
+            je_offsets = self.je_offsets
+            results['amortization_schedule'] = records['amortization_schedule'][schedule_offsets[index]:schedule_offsets[index + 1]]
+            results['journal_entries'] = records['journal_entries'][je_offsets[index]:je_offsets[index + 1]]
+            results['summary'] = self.summary(index)
+            return results
+
+        lo, hi = book.offsets[index], book.offsets[index + 1]
+        if not self.override_mask[index]:
+            starts = _to_datetimes(book.period_start[lo:hi])
+            ends = _to_datetimes(book.period_end[lo:hi])
+            midpoints = _to_datetimes(r['service_midpoint'][lo:hi])
+            results['pv_analysis'] = [
+                {
+                    'period': i,
+                    'start': starts[i - 1],
+                    'end': ends[i - 1],
+                    'service_midpoint': midpoints[i - 1],
+                    'years_from_payment': float(r['years_from_payment'][row]),
+                    'stated_amount': float(book.stated_amount[row]),
+                    'present_value': float(r['present_value'][row]),
+                    'financing_component': float(r['period_financing'][row])
+                }
+                for i, row in enumerate(range(lo, hi), 1)
+            ]
+            results['total_stated'] = float(r['total_stated'][index])
+
+        for key in ('total_pv', 'financing_component', 'financing_pct',
+                    'license_revenue', 'support_total', 'annual_support'):
+            results[key] = float(r[key][index])
+        if 'effective_rate' in r:
+            results['effective_rate'] = float(r['effective_rate'][index])
+            results['solver_iterations'] = int(r['solver_iterations'][index])
+            results['solver_converged'] = bool(r['solver_converged'][index])
+
+        lo, hi = self.schedule_offsets[index], self.schedule_offsets[index + 1]
+        dates = _to_datetimes(r['schedule_date'][lo:hi])
+        results['amortization_schedule'] = [
+            {
+                'period': f'Year {i}' if i else 'License Delivery',
+                'date': dates[i],
+                'opening_liability': float(r['schedule_opening_liability'][row]),
+                'interest_income': float(r['schedule_interest_income'][row]),
+                'revenue_recognized': float(r['schedule_revenue_recognized'][row]),
+                'ending_liability': float(r['schedule_ending_liability'][row])
+            }
+            for i, row in enumerate(range(lo, hi))
+        ]
+        results['amortization_schedule'][0]['interest_income'] = 0
+
+        lo, hi = self.je_offsets[index], self.je_offsets[index + 1]
+        dates = _to_datetimes(r['je_date'][lo:hi])
+        results['journal_entries'] = [
+            journal_entry(int(r['je_entry_num'][row]), dates[i], int(r['je_kind'][row]),
+                          float(r['je_amount'][row]), year=int(r['je_year'][row]))
+            for i, row in enumerate(range(lo, hi))
+        ]
+
+        results['summary'] = self.summary(index)
+        return results
+
+
+def _as_book(contracts: Union[ContractBook, Iterable[Dict]], discount_rate=None, license_pct=None,
+             override_pv=None) -> ContractBook:
+    """ContractBook with the given terms applied, as described in analyze_portfolio()"""
+    if isinstance(contracts, ContractBook):
+        return contracts.with_terms(discount_rate, license_pct, override_pv)
+    return ContractBook.from_contracts(
+        contracts,
+        0.06 if discount_rate is None else discount_rate,
+        0.20 if license_pct is None else license_pct,
+        override_pv)
+
+
+def analyze_portfolio(contracts: Union[ContractBook, Iterable[Dict]], discount_rate=None, license_pct=None,
+                      override_pv=None, use_integer_years: bool = True, schedule_method: str = 'proportional',
+                      day_count: str = 'ACT/365.25', discount_to: str = 'end') -> PortfolioAnalyzer:
+    """
+    Analyze a whole contract book in one call
+
+    Args:
+        contracts: ContractBook, or contract_data dicts in the ASC606FinancingAnalyzer format
+        discount_rate: Annual discount rate (scalar or one per contract)
+        license_pct: Percentage allocated to license (scalar or one per contract)
+        override_pv: Optional PV per contract instead of calculating
+        use_integer_years: If True, use 1, 2, 3... years instead of exact day count
+        schedule_method: 'proportional' or 'effective_interest' (level yield)
+        day_count: Day-count convention for exact day count (see DAY_COUNTS)
+        discount_to: Discount each period from its 'end' or its 'midpoint'
+
+    discount_rate, license_pct and override_pv left as None keep each
+    contract's own terms: a dict's own keys, else 0.06, 0.20 and no
+    override. Given for a ContractBook, they replace the book's columns
+    (see ContractBook.with_terms()); given for dicts, a dict's own keys
+    still take precedence, as in ContractBook.from_contracts().
+
+    Returns:
+        Analyzed PortfolioAnalyzer
+    """
+    contracts = _as_book(contracts, discount_rate, license_pct, override_pv)
+    portfolio = PortfolioAnalyzer(contracts, use_integer_years=use_integer_years, schedule_method=schedule_method,
+                                  day_count=day_count, discount_to=discount_to)
+    portfolio.analyze()
+    return portfolio
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Contract Liability Roll-Forward
+Coder Technologies Inc.
+
+As-of and period queries over an analyzed PortfolioAnalyzer: the contract
+liability roll-forward (opening, cash received, interest accrued, revenue
+recognized, ending) for any date range across the whole book, at monthly,
+quarterly or annual granularity.
+
+Every service period becomes one index row holding its interest and support
+revenue. Rows are sorted by end date with running totals, so the balance as
+of a date is two binary searches plus the partial accrual of the periods in
+progress on that date. Cash receipts and license delivery are point events on
+the payment date, indexed the same way.
+
+Basis:
+    'daily'   Interest and support accrue evenly over each service period's
+              days; balances at a period end tie to the amortization schedule.
+    'posted'  Amounts land on the schedule row date, as the journal entries
+              book them; balances tie to the journal entries on every date.
+
+Usage:
+    portfolio = analyze_portfolio(book)
+    index = RollForwardIndex.from_portfolio(portfolio)
+    index.rollforward('2026-01-01', '2026-01-31')
+    index.series('2026-01-01', '2026-12-31', freq='M')    # one row per month
+    index.balance('2026-06-30', by_contract=True)
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import numpy as np
+from datetime import date
+from typing import Dict, List, Union
+
+from asc606_instrument import instrumented
+from asc606_portfolio import ContractBook, PortfolioAnalyzer, analyze_portfolio
+
+
+BASES = ('daily', 'posted')
+FREQUENCIES = {'M': 1, 'Q': 3, 'A': 12}
+
+DateLike = Union[str, date, np.datetime64]
+
+
+def _day(value: DateLike) -> np.int64:
+    """Days since 1970-01-01 for a date, datetime, ISO string or datetime64"""
+    return np.datetime64(value, 'D').astype(np.int64)
+
+
+def _iso(day) -> str:
+    return str(np.datetime64(int(day), 'D'))
+
+
+class _EventIndex:
+    """Amounts sorted by date with running totals (leading zero)"""
+
+    def __init__(self, days: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.order = np.argsort(days, kind='stable')
+        self.days = days[self.order]
+        self.cumulative = {}
+        for name, values in columns.items():
+            running = np.zeros(len(days) + 1)
+            np.cumsum(values[self.order], out=running[1:])
+            self.cumulative[name] = running
+
+    def through(self, day) -> int:
+        """Number of events on or before day"""
+        return int(np.searchsorted(self.days, day, side='right'))
+
+
+class RollForwardIndex:
+    """
+    Sorted date index over a portfolio's schedule rows
+
+    Balances are end of day: balance(d) includes everything dated on or
+    before d, and rollforward(start, end) opens at balance(start - 1 day).
+    Amounts follow the schedule's sign convention, so
+    ending = opening + cash_received + interest_accrued - revenue_recognized.
+    """
+
+    def __init__(self, contract_ids: np.ndarray, payment_day: np.ndarray, cash_received: np.ndarray,
+                 license_revenue: np.ndarray, period_contract: np.ndarray, period_start: np.ndarray,
+                 period_end: np.ndarray, interest: np.ndarray, support: np.ndarray, basis: str = 'daily'):
+        """
+        Initialize index from flat arrays (see from_portfolio)
+
+        Args:
+            contract_ids: One ID per contract
+            payment_day, cash_received, license_revenue: One value per contract
+            period_contract: Contract position of every service period
+            period_start, period_end: Service period dates (days since epoch, inclusive)
+            interest, support: Interest accrued and support revenue per service period
+            basis: 'daily' or 'posted'
+        """
+        if basis not in BASES:
+            raise ValueError(f"basis must be one of {BASES}, got {basis!r}")
+
+        self.contract_ids = contract_ids
+        self.basis = basis
+        self.period_contract = period_contract
+
+        if basis == 'posted':
+            period_start = period_end
+        self.period_start = period_start
+        self.period_end = period_end
+        self.period_days = period_end - period_start + 1
+        self.interest = interest
+        self.support = support
+
+        self.payments = _EventIndex(payment_day, {'cash_received': cash_received,
+                                                  'license_revenue': license_revenue})
+        self.payment_day = payment_day
+        self.cash_received = cash_received
+        self.license_revenue = license_revenue
+
+        self.periods = _EventIndex(period_end, {'interest': interest, 'support': support})
+        self.max_period_days = int(self.period_days.max()) if len(self.period_days) else 1
+        # Period columns in end-date order, so in-progress periods are one contiguous slice
+        order = self.periods.order
+        self._sorted = {'start': period_start[order], 'days': self.period_days[order],
+                        'interest': interest[order], 'support': support[order]}
+
+    @classmethod
+    def from_portfolio(cls, portfolio: PortfolioAnalyzer, basis: str = 'daily') -> 'RollForwardIndex':
+        """Index an analyzed portfolio (analyzes it first if needed)"""
+        if 'schedule_date' not in portfolio.results:
+            portfolio.build_amortization_schedule()
+
+        book = portfolio.book
+        r = portfolio.results
+        period_contract = book.period_contract
+        license_rows = portfolio.schedule_offsets[:-1]
+        year_rows = np.arange(len(period_contract), dtype=np.int64) + period_contract + 1
+
+        return cls(
+            contract_ids=book.contract_ids,
+            payment_day=book.payment_date.astype(np.int64),
+            cash_received=book.cash_received,
+            license_revenue=r['schedule_revenue_recognized'][license_rows],
+            period_contract=period_contract,
+            period_start=book.period_start.astype(np.int64),
+            period_end=r['schedule_date'][year_rows].astype(np.int64),
+            interest=r['schedule_interest_income'][year_rows],
+            support=r['schedule_revenue_recognized'][year_rows],
+            basis=basis,
+        )
+
+    @classmethod
+    def from_contracts(cls, contracts: Union[ContractBook, List[Dict]], basis: str = 'daily',
+                       **analyze_kwargs) -> 'RollForwardIndex':
+        """Analyze contracts with analyze_portfolio() and index the result"""
+        return cls.from_portfolio(analyze_portfolio(contracts, **analyze_kwargs), basis=basis)
+
+    def __len__(self) -> int:
+        return len(self.contract_ids)
+
+    def _in_progress(self, day) -> Dict[str, np.ndarray]:
+        """Start, days, interest and support of periods started on or before day but ending after it"""
+        periods = self.periods
+        lo = periods.through(day)
+        hi = int(np.searchsorted(periods.days, day + self.max_period_days, side='right'))
+        started = self._sorted['start'][lo:hi] <= day
+        return {key: column[lo:hi][started] for key, column in self._sorted.items()}
+
+    def _totals(self, day) -> Dict[str, float]:
+        """Cumulative amounts through the end of day, whole book"""
+        paid = self.payments.through(day)
+        done = self.periods.through(day)
+        partial = self._in_progress(day)
+        fraction = (day - partial['start'] + 1) / partial['days']
+
+        cash = self.payments.cumulative['cash_received'][paid]
+        license_revenue = self.payments.cumulative['license_revenue'][paid]
+        interest = self.periods.cumulative['interest'][done] + float(partial['interest'] @ fraction)
+        support = self.periods.cumulative['support'][done] + float(partial['support'] @ fraction)
+        return {
+            'cash_received': float(cash),
+            'interest_accrued': float(interest),
+            'license_revenue': float(license_revenue),
+            'support_revenue': float(support),
+        }
+
+    def _totals_by_contract(self, day) -> Dict[str, np.ndarray]:
+        """Cumulative amounts through the end of day, one value per contract"""
+        n = len(self)
+        paid = self.payment_day <= day
+        weight = np.clip((day - self.period_start + 1) / self.period_days, 0.0, 1.0)
+        return {
+            'cash_received': np.where(paid, self.cash_received, 0.0),
+            'interest_accrued': np.bincount(self.period_contract, self.interest * weight, minlength=n),
+            'license_revenue': np.where(paid, self.license_revenue, 0.0),
+            'support_revenue': np.bincount(self.period_contract, self.support * weight, minlength=n),
+        }
+
+    @staticmethod
+    def _balance(totals: Dict):
+        return (totals['cash_received'] + totals['interest_accrued']
+                - totals['license_revenue'] - totals['support_revenue'])
+
+    def balance(self, as_of: DateLike, by_contract: bool = False) -> Union[float, np.ndarray]:
+        """
+        Contract liability at the end of as_of
+
+        Args:
+            as_of: Balance date
+            by_contract: If True, return one balance per contract
+        """
+        day = _day(as_of)
+        totals = self._totals_by_contract(day) if by_contract else self._totals(day)
+        return self._balance(totals)
+
+    def rollforward(self, start: DateLike, end: DateLike, by_contract: bool = False) -> Dict:
+        """
+        Contract liability roll-forward for start through end (inclusive)
+
+        Args:
+            start: First day of the period
+            end: Last day of the period
+            by_contract: If True, amounts are arrays with one value per contract
+
+        Returns:
+            Dict with start, end, opening, cash_received, interest_accrued,
+            license_revenue, support_revenue, revenue_recognized and ending
+            (plus contract_ids when by_contract)
+        """
+        first, last = _day(start), _day(end)
+        if last < first:
+            raise ValueError(f'Roll-forward ends ({end}) before it starts ({start})')
+
+        cumulative = self._totals_by_contract if by_contract else self._totals
+        before, through = cumulative(first - 1), cumulative(last)
+        return self._row(first, last, before, through, by_contract)
+
+    def _row(self, first, last, before: Dict, through: Dict, by_contract: bool) -> Dict:
+        row = {'start': _iso(first), 'end': _iso(last), 'opening': self._balance(before)}
+        for key in ('cash_received', 'interest_accrued', 'license_revenue', 'support_revenue'):
+            row[key] = through[key] - before[key]
+        row['revenue_recognized'] = row['license_revenue'] + row['support_revenue']
+        row['ending'] = self._balance(through)
+        if by_contract:
+            row['contract_ids'] = self.contract_ids
+        return row
+
+    @instrumented('rollforward.series', rows=lambda _, rows: len(rows))
+    def series(self, start: DateLike, end: DateLike, freq: str = 'M') -> List[Dict]:
+        """
+        Book roll-forward for every calendar month, quarter or year
+
+        Args:
+            start: Any date in the first period
+            end: Any date in the last period
+            freq: 'M' (monthly), 'Q' (calendar quarters) or 'A' (calendar years)
+
+        Returns:
+            One rollforward() dict per period; each ending is the next opening
+        """
+        bounds = period_bounds(start, end, freq)
+        totals = [self._totals(day) for day in bounds - 1]
+        return [self._row(bounds[i], bounds[i + 1] - 1, totals[i], totals[i + 1], by_contract=False)
+                for i in range(len(bounds) - 1)]
+
+
+def period_bounds(start: DateLike, end: DateLike, freq: str = 'M') -> np.ndarray:
+    """
+    First day (days since epoch) of every calendar period covering start..end,
+    plus the first day after the last period
+
+    Args:
+        start: Any date in the first period
+        end: Any date in the last period
+        freq: 'M', 'Q' or 'A'
+    """
+    if freq not in FREQUENCIES:
+        raise ValueError(f"freq must be one of {tuple(FREQUENCIES)}, got {freq!r}")
+    step = FREQUENCIES[freq]
+
+    first = np.datetime64(start, 'M').astype(np.int64)
+    last = np.datetime64(end, 'M').astype(np.int64)
+    # Months since 1970-01 align with calendar quarters and years
+    first -= first % step
+    last -= last % step
+    months = np.arange(first, last + step + 1, step).astype('datetime64[M]')
+    return months.astype('datetime64[D]').astype(np.int64)
+
+
+def rollforward_series(portfolio: PortfolioAnalyzer, start: DateLike, end: DateLike, freq: str = 'M',
+                       basis: str = 'daily') -> List[Dict]:
+    """
+    Book roll-forward by month, quarter or year in one call
+
+    Args:
+        portfolio: Analyzed PortfolioAnalyzer
+        start: Any date in the first period
+        end: Any date in the last period
+        freq: 'M', 'Q' or 'A'
+        basis: 'daily' or 'posted'
+    """
+    return RollForwardIndex.from_portfolio(portfolio, basis=basis).series(start, end, freq)
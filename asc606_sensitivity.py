@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Sensitivity Grid
+Coder Technologies Inc.
+
+Evaluates a full grid of discount rates x license allocation percentages for
+one contract or a whole book in one batched computation, without building an
+analyzer per scenario. Every scenario follows the same math as
+ASC606FinancingAnalyzer: PV per period, license/support split of the PV, and
+interest allocated in proportion to the declining opening balances.
+
+Usage:
+    cube = sensitivity_grid(book, discount_rates=np.linspace(0.04, 0.08, 20),
+                            license_pcts=np.linspace(0.10, 0.30, 20))
+    cube.financing_component[0]        # contract 0, one value per rate
+    cube.total_interest[:, :, 0]       # Year 1 interest across the book
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import numpy as np
+from typing import Dict, Iterable, Optional, Sequence, Union
+
+from asc606_dates import discount_years
+from asc606_portfolio import ContractBook
+
+
+class SensitivityCube:
+    """
+    Results of a rate x license-allocation sweep
+
+    Per-contract arrays (only when keep_contracts=True):
+        transaction_price, financing_component: (contracts, rates)
+        license_revenue: (contracts, rates, license_pcts)
+        interest: (contracts, rates, license_pcts, years); NaN past a contract's term
+
+    Book totals (always):
+        total_transaction_price, total_financing: (rates,)
+        total_license_revenue: (rates, license_pcts)
+        total_interest: (rates, license_pcts, years)
+    """
+
+    def __init__(self, discount_rates: np.ndarray, license_pcts: np.ndarray, max_years: int):
+        self.discount_rates = discount_rates
+        self.license_pcts = license_pcts
+        self.contract_ids = None
+        self.transaction_price = None
+        self.financing_component = None
+        self.license_revenue = None
+        self.interest = None
+
+        rates, licenses = len(discount_rates), len(license_pcts)
+        self.total_transaction_price = np.zeros(rates)
+        self.total_financing = np.zeros(rates)
+        self.total_license_revenue = np.zeros((rates, licenses))
+        self.total_interest = np.zeros((rates, licenses, max_years))
+
+    @property
+    def shape(self):
+        return (len(self.discount_rates), len(self.license_pcts))
+
+    def scenario(self, rate_index: int, license_index: int) -> Dict:
+        """Book totals for one grid point"""
+        return {
+            'discount_rate': float(self.discount_rates[rate_index]),
+            'license_pct': float(self.license_pcts[license_index]),
+            'transaction_price': float(self.total_transaction_price[rate_index]),
+            'financing_component': float(self.total_financing[rate_index]),
+            'license_revenue': float(self.total_license_revenue[rate_index, license_index]),
+            'interest_by_year': self.total_interest[rate_index, license_index].tolist()
+        }
+
+
+def _sum_by_contract(values: np.ndarray, book: ContractBook) -> np.ndarray:
+    """Sum period rows (first axis) into one row per contract"""
+    out = np.zeros((len(book),) + values.shape[1:])
+    nonempty = book.n_periods > 0
+    if nonempty.any():
+        out[nonempty] = np.add.reduceat(values, book.offsets[:-1][nonempty], axis=0)
+    return out
+
+
+def chunk_contracts(rates: int, licenses: int, max_years: int, dtype=np.float64,
+                    max_chunk_bytes: int = 256 * 1024 * 1024) -> int:
+    """
+    Contracts per batch that keep one batch's interest cube within max_chunk_bytes
+
+    Each contract needs rates x licenses x max_years cells of the output
+    dtype plus up to four float64 temporaries while its interest is
+    computed and totalled.
+    """
+    cell_bytes = 4 * np.dtype(np.float64).itemsize + np.dtype(dtype).itemsize
+    contract_bytes = max(rates * licenses * max_years, 1) * cell_bytes
+    return max(1, max_chunk_bytes // contract_bytes)
+
+
+def _evaluate_chunk(book: ContractBook, rates: np.ndarray, licenses: np.ndarray,
+                    max_years: int, discounting: tuple, dtype):
+    """Transaction price, financing, license revenue and interest for one chunk"""
+    years = discount_years(book, *discounting)
+
+    # (periods, rates)
+    pv_periods = book.stated_amount[:, None] * (1 + rates)[None, :] ** -years[:, None]
+    pv = _sum_by_contract(pv_periods, book)
+    total_stated = _sum_by_contract(book.stated_amount, book)
+    financing = total_stated[:, None] - pv
+
+    override_pv = book.override_pv
+    override = ~np.isnan(override_pv) & (override_pv != 0)
+    pv[override] = override_pv[override, None]
+    financing[override] = (book.cash_received - override_pv)[override, None]
+
+    # (contracts, rates, licenses)
+    license_revenue = pv[:, :, None] * licenses[None, None, :]
+    n = book.n_periods.astype(np.float64)[:, None, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annual_support = pv[:, :, None] * (1 - licenses)[None, None, :] / n
+        ending = book.cash_received[:, None, None] - license_revenue
+
+        # Opening balance of year k is ending - k * annual_support; weights sum in closed form
+        k = np.arange(max_years, dtype=np.float64)
+        total_weighted = n * ending - annual_support * n * (n - 1) / 2
+        balances = ending[..., None] - k * annual_support[..., None]
+        interest = (financing[:, :, None, None] * balances / total_weighted[..., None]).astype(dtype)
+    beyond_term = k[None, :] >= book.n_periods[:, None]
+    interest[np.broadcast_to(beyond_term[:, None, None, :], interest.shape)] = np.nan
+
+    return pv, financing, license_revenue, interest
+
+
+def sensitivity_grid(contracts: Union[ContractBook, Iterable[Dict]], discount_rates: Sequence[float],
+                     license_pcts: Sequence[float], use_integer_years: bool = True,
+                     keep_contracts: bool = True, chunk_size: Optional[int] = None, dtype=np.float64,
+                     day_count: str = 'ACT/365.25', discount_to: str = 'end',
+                     max_chunk_bytes: int = 256 * 1024 * 1024) -> SensitivityCube:
+    """
+    Evaluate every discount rate x license allocation scenario in one pass
+
+    Args:
+        contracts: ContractBook, or contract_data dicts in the ASC606FinancingAnalyzer format
+        discount_rates: Rates to sweep (the book's own rates are ignored)
+        license_pcts: License allocations to sweep
+        use_integer_years: If True, use 1, 2, 3... years instead of exact day count
+        keep_contracts: If False, keep only book totals, so memory does not
+            grow with the number of contracts
+        chunk_size: Contracts evaluated per batch (default: as many as fit in
+            max_chunk_bytes, see chunk_contracts())
+        dtype: Storage type of the per-contract interest cube (e.g. np.float32)
+        day_count: Day-count convention for exact day count (see DAY_COUNTS)
+        discount_to: Discount each period from its 'end' or its 'midpoint'
+        max_chunk_bytes: Working memory budget of one batch. This bounds peak
+            memory only with keep_contracts=False; kept per-contract results
+            grow with the book.
+
+    Returns:
+        SensitivityCube
+    """
+    if not isinstance(contracts, ContractBook):
+        contracts = ContractBook.from_contracts(contracts)
+
+    book = contracts
+    rates = np.asarray(discount_rates, dtype=np.float64)
+    licenses = np.asarray(license_pcts, dtype=np.float64)
+    max_years = int(book.n_periods.max()) if len(book) else 0
+
+    cube = SensitivityCube(rates, licenses, max_years)
+    if chunk_size is None:
+        chunk_size = chunk_contracts(len(rates), len(licenses), max_years, dtype, max_chunk_bytes)
+    parts = []
+    for start in range(0, len(book), chunk_size):
+        chunk = book.slice(start, min(start + chunk_size, len(book)))
+        pv, financing, license_revenue, interest = _evaluate_chunk(
+            chunk, rates, licenses, max_years, (use_integer_years, day_count, discount_to), dtype)
+
+        cube.total_transaction_price += pv.sum(axis=0)
+        cube.total_financing += financing.sum(axis=0)
+        cube.total_license_revenue += license_revenue.sum(axis=0)
+        cube.total_interest += np.nansum(interest, axis=0, dtype=np.float64)
+        if keep_contracts:
+            parts.append((pv, financing, license_revenue, interest))
+
+    if keep_contracts:
+        cube.contract_ids = book.contract_ids
+        if parts:
+            cube.transaction_price, cube.financing_component, cube.license_revenue, cube.interest = (
+                np.concatenate(arrays) for arrays in zip(*parts))
+        else:
+            cube.transaction_price = np.zeros((0, len(rates)))
+            cube.financing_component = np.zeros((0, len(rates)))
+            cube.license_revenue = np.zeros((0, len(rates), len(licenses)))
+            cube.interest = np.zeros((0, len(rates), len(licenses), max_years), dtype=dtype)
+
+    return cube
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Analysis Server
+Coder Technologies Inc.
+
+Long-lived local HTTP service around ASC606FinancingAnalyzer, built on
+asyncio and the standard library. A pool of worker processes is started and
+warmed once (imports, openpyxl, discount factor cache), so a request pays
+only for its own analysis instead of a Python start-up per call.
+
+Endpoints:
+    GET  /health           {"status": "ok", "workers": N}
+    POST /analyze          one request, JSON response
+    POST /analyze/batch    {"contracts": [request, ...], ...defaults}; NDJSON
+                           response streamed as each contract finishes
+
+A request is the same JSON the web app posts to /api/analyze:
+    {"contract_data": {...}, "discount_rate": 0.06, "license_pct": 0.20,
+     "override_pv": null, "use_integer_years": true,
+     "schedule_method": "proportional", "day_count": "ACT/365.25",
+     "discount_to": "end", "exports": ["excel", "csv"]}
+
+Responses carry success, results (dates as ISO strings), excel_file
+(base64 .xlsx from export_to_excel_buffer) and csv_file (text from
+export_journal_entries_buffer). Batch lines add the request's index. If a
+worker process dies, the pool is replaced and the affected requests get a
+503 response (an error line in a batch) so callers can retry.
+
+Usage:
+    python asc606_server.py --port 8606 --workers 4
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import json
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from asc606_analyzer_production import SCHEDULE_METHODS, ASC606FinancingAnalyzer, check_discounting
+
+DEFAULT_PORT = 8606
+MAX_BODY_BYTES = 64 * 1024 * 1024
+EXPORTS = ('excel', 'csv')
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+_WARMUP_REQUEST = {
+    'contract_data': {
+        'customer': 'Warmup',
+        'cash_received': 2_100_000,
+        'payment_date': '2025-12-31',
+        'periods': [
+            {'start': '2025-12-31', 'end': '2026-12-30', 'stated_amount': 420_000},
+            {'start': '2026-12-31', 'end': '2027-12-30', 'stated_amount': 420_000},
+        ]
+    }
+}
+
+
+def _json_default(value):
+    """Dates as YYYY-MM-DD (with time only when it is not midnight)"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d') if value.time() == datetime.min.time() else value.isoformat()
+    if hasattr(value, 'to_dicts'):
+        return value.to_dicts()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def analyze_request(request: Dict) -> Tuple[int, Dict]:
+    """
+    Run one analysis request
+
+    Args:
+        request: contract_data plus optional discount_rate, license_pct,
+            override_pv, use_integer_years, schedule_method, day_count,
+            discount_to and exports
+
+    Returns:
+        (HTTP status, response dict)
+    """
+    contract_data = request.get('contract_data') if isinstance(request, dict) else None
+    if not contract_data:
+        return 400, {'success': False, 'error': 'Missing contract_data'}
+
+    exports = request.get('exports', EXPORTS)
+    if isinstance(exports, str):
+        exports = [exports]
+    if not isinstance(exports, list) or not all(isinstance(name, str) for name in exports):
+        return 400, {'success': False, 'error': f'exports must be a list of {EXPORTS} names'}
+    unknown = [name for name in exports if name not in EXPORTS]
+    if unknown:
+        return 400, {'success': False, 'error': f'Unknown exports: {unknown}'}
+
+    schedule_method = request.get('schedule_method', 'proportional')
+    day_count = request.get('day_count', 'ACT/365.25')
+    discount_to = request.get('discount_to', 'end')
+    if schedule_method not in SCHEDULE_METHODS:
+        return 400, {'success': False, 'error': f'schedule_method must be one of {SCHEDULE_METHODS}, '
+                                                f'got {schedule_method!r}'}
+    try:
+        check_discounting(day_count, discount_to)
+    except ValueError as e:
+        return 400, {'success': False, 'error': str(e)}
+
+    try:
+        analyzer = ASC606FinancingAnalyzer(
+            contract_data=contract_data,
+            discount_rate=request.get('discount_rate', 0.06),
+            license_pct=request.get('license_pct', 0.20),
+            override_pv=request.get('override_pv'),
+            use_integer_years=request.get('use_integer_years', True),
+            schedule_method=schedule_method,
+            day_count=day_count,
+            discount_to=discount_to
+        )
+        results = analyzer.analyze()
+
+        response = {'success': True, 'results': results}
+        if 'excel' in exports:
+            buffer = io.BytesIO()
+            analyzer.export_to_excel_buffer(buffer)
+            response['excel_file'] = base64.b64encode(buffer.getvalue()).decode('ascii')
+        if 'csv' in exports:
+            buffer = io.StringIO()
+            analyzer.export_journal_entries_buffer(buffer)
+            response['csv_file'] = buffer.getvalue()
+        return 200, response
+    except Exception as e:
+        return 500, {'success': False, 'error': f'{type(e).__name__}: {e}'}
+
+
+def _error_body(status: int, error: str, index: Optional[int] = None) -> Tuple[int, bytes]:
+    """(status, JSON bytes) for a failed request, tagged with its batch index"""
+    response = {'success': False, 'error': error}
+    if index is not None:
+        response = {'index': index, **response}
+    return status, json.dumps(response).encode()
+
+
+def _worker_analyze(request: Dict, index: Optional[int] = None) -> Tuple[int, bytes]:
+    """Worker entry point: analyze and serialize, keeping JSON work off the event loop"""
+    try:
+        status, response = analyze_request(request)
+        if index is not None:
+            response = {'index': index, **response}
+        return status, json.dumps(response, default=_json_default).encode()
+    except Exception as e:
+        return _error_body(500, f'{type(e).__name__}: {e}', index)
+
+
+def _warm_worker():
+    """Pool initializer: import everything a request needs and fill the caches"""
+    # Ctrl-C reaches the whole process group; the parent shuts workers down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    analyze_request(_WARMUP_REQUEST)
+
+
+class AnalysisServer:
+    """
+    asyncio HTTP/1.1 server (keep-alive) backed by warm worker processes
+
+    Usage:
+        server = AnalysisServer(port=8606, workers=4)
+        asyncio.run(server.serve_forever())
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT, workers: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        """
+        Initialize server
+
+        Args:
+            host: Interface to bind
+            port: TCP port (0 picks a free one)
+            workers: Worker processes (default: os.cpu_count())
+            max_pending: Batch contracts in flight per request (default: 2 * workers)
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        self.executor = None
+        self.server = None
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Workers started by fork would inherit open client sockets and keep
+        # those connections from closing; forkserver/spawn start them clean
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=_warm_worker)
+
+    async def start(self):
+        """Start and warm the workers, then begin accepting connections"""
+        loop = asyncio.get_running_loop()
+        self.executor = self._new_pool()
+        # Spawn every worker now so the first requests do not pay for it
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _worker_analyze, _WARMUP_REQUEST)
+                               for _ in range(self.workers)))
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Serve until SIGINT/SIGTERM, then stop the workers"""
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+            except NotImplementedError:
+                pass
+
+        try:
+            await self.start()
+            print(f"✓ ASC 606 analysis server on http://{self.host}:{self.port} ({self.workers} workers)", flush=True)
+            async with self.server:
+                await stop
+        finally:
+            self.close()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    async def _analyze(self, request, index: Optional[int] = None) -> Tuple[int, bytes]:
+        """
+        Run one request in the pool, always returning a response body
+
+        A broken pool is replaced and the request answered with 503; any other
+        failure is a 500, so one bad contract never cuts off a connection or batch.
+        """
+        executor = self.executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, _worker_analyze, request, index)
+        except BrokenProcessPool:
+            # Concurrent requests on the same dead pool replace it only once
+            if self.executor is executor:
+                self.executor = self._new_pool()
+                executor.shutdown(wait=False)
+            return _error_body(503, 'Worker process died; the pool was restarted, retry the request', index)
+        except Exception as e:
+            return _error_body(500, f'{type(e).__name__}: {e}', index)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until it closes"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'success': False, 'error': 'Malformed request line'})
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {'success': False, 'error': 'Invalid Content-Length'})
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'success': False, 'error': 'Request body too large'})
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                await self._dispatch(method, path.split('?', 1)[0], body, writer)
+                if version != 'HTTP/1.1' or headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter):
+        routes = {'/health': 'GET', '/analyze': 'POST', '/analyze/batch': 'POST'}
+        if path not in routes:
+            return await self._respond(writer, 404, {'success': False, 'error': f'No route {path}'})
+        if method != routes[path]:
+            return await self._respond(writer, 405, {'success': False, 'error': f'{path} expects {routes[path]}'})
+        if path == '/health':
+            return await self._respond(writer, 200, {'status': 'ok', 'workers': self.workers})
+
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError as e:
+            return await self._respond(writer, 400, {'success': False, 'error': f'Invalid JSON: {e}'})
+
+        if path == '/analyze':
+            status, data = await self._analyze(payload)
+            return await self._send(writer, status, data, 'application/json')
+        return await self._stream_batch(payload, writer)
+
+    async def _stream_batch(self, payload, writer: asyncio.StreamWriter):
+        """Analyze a batch, writing one NDJSON line per contract as each finishes"""
+        if not isinstance(payload, dict) or not isinstance(payload.get('contracts'), list):
+            return await self._respond(writer, 400, {'success': False, 'error': 'Missing contracts list'})
+
+        # Top-level keys other than contracts are defaults for every request
+        defaults = {key: value for key, value in payload.items() if key != 'contracts'}
+        requests = iter(enumerate(payload['contracts']))
+
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n'
+                     b'Transfer-Encoding: chunked\r\n\r\n')
+        pending = set()
+        while True:
+            for index, request in requests:
+                if isinstance(request, dict):
+                    request = {**defaults, **request}
+                pending.add(asyncio.ensure_future(self._analyze(request, index)))
+                if len(pending) >= self.max_pending:
+                    break
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                _, data = future.result()
+                line = data + b'\n'
+                writer.write(b'%x\r\n%s\r\n' % (len(line), line))
+            await writer.drain()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, response: Dict):
+        await self._send(writer, status, json.dumps(response).encode(), 'application/json')
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, data: bytes, content_type: str):
+        writer.write(f'HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: {content_type}\r\n'
+                     f'Content-Length: {len(data)}\r\n\r\n'.encode() + data)
+        await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ASC 606 analysis server')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='TCP port')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    server = AnalysisServer(args.host, args.port, args.workers)
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == '__main__':
+    main()
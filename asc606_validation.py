@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+ASC 606 Contract Validation
+Coder Technologies Inc.
+
+Checks a whole contract book before analysis, in columnar passes over every
+period row at once, and reports every problem of every contract instead of
+stopping at the first. Contracts with errors are quarantined so the rest of
+the batch still runs; warnings are reported but do not block analysis.
+
+Errors (contract is quarantined):
+    missing_value, bad_date, bad_number      unparseable or empty fields
+    non_positive_cash, negative_amount       impossible amounts
+    bad_rate, bad_license_pct                discount_rate outside [0, 1),
+                                             license_pct outside [0, 1]
+    end_before_start, period_out_of_order,   period dates that cannot form
+    period_overlap                           a schedule
+    year_unrealistic                         a year outside 1900-2100
+    no_periods, split_contract,              malformed contract structure
+    inconsistent_contract
+Warnings (same checks as validateContractData in the web app):
+    cash_above_stated                        cash more than 10% above stated total
+    year_past                                a period starting before 2020
+
+Usage:
+    report = validate_contracts(contracts)
+    valid, quarantined = split_contracts(contracts, report)
+    report.write_csv('validation_report.csv')
+
+    quarantine = Quarantine()
+    for book in iter_contract_books('contracts.csv', quarantine=quarantine):
+        ...
+    quarantine.report.summary()
+
+Author: Dan deCoen, Controller
+Date: December 2025
+"""
+
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from asc606_instrument import instrumented
+
+
+ERROR = 'error'
+WARNING = 'warning'
+
+CONTRACT_COLUMNS = ('customer', 'cash_received', 'payment_date', 'discount_rate', 'license_pct', 'override_pv')
+PERIOD_COLUMNS = ('start', 'end', 'stated_amount')
+
+# Years outside this range are data-entry errors (e.g. a day-first date)
+MIN_YEAR, MAX_YEAR = 1900, 2100
+# Periods starting before this year are flagged for review
+PAST_YEAR = 2020
+# Cash received above stated total by more than this share is flagged for review
+CASH_ABOVE_STATED = 0.10
+
+REPORT_COLUMNS = ['Contract ID', 'Period', 'Severity', 'Code', 'Message']
+
+# Character positions of the digits in YYYY-MM-DD
+_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9]
+
+
+def _to_dates(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """datetime64[D] from integer parts, NaT for impossible dates (e.g. 2025-02-30)"""
+    ok = (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    dates = np.full(len(year), np.datetime64('NaT'), dtype='datetime64[D]')
+    months = ((year[ok] - 1970) * 12 + month[ok] - 1).astype('datetime64[M]')
+    parsed = months.astype('datetime64[D]') + (day[ok] - 1)
+    # A day past the end of its month rolls into the next month
+    parsed[parsed.astype('datetime64[M]') != months] = np.datetime64('NaT')
+    dates[ok] = parsed
+    return dates
+
+
+def parse_dates(values) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse YYYY-MM-DD values without raising
+
+    Strings are parsed from their character codes in one array pass. Only
+    the exact ten-character form is accepted: variants such as 2025-1-5 or
+    a trailing time load in some paths (strptime, pandas, NumPy) but not
+    in others.
+
+    Returns:
+        (datetime64[D] array with NaT where missing or invalid, present mask)
+    """
+    import pandas as pd
+
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        dates = values.astype('datetime64[D]')
+        return dates, ~np.isnat(dates)
+
+    present = ~pd.isna(values)
+    dates = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[D]')
+    rows = np.flatnonzero(present)
+    text = values[rows].astype(str)
+    if not len(text):
+        return dates, present
+
+    chars = text.view(np.uint32).reshape(len(text), -1)
+    codes = np.zeros((len(text), 10), dtype=np.int32)
+    codes[:, :min(10, chars.shape[1])] = chars[:, :10]
+    # Exactly ten characters: the rest of the fixed-width string is padding
+    exact = chars[:, 10] == 0 if chars.shape[1] > 10 else np.ones(len(text), dtype=bool)
+    codes -= ord('0')
+    exact &= (codes[:, 4] == ord('-') - ord('0')) & (codes[:, 7] == ord('-') - ord('0'))
+    exact &= (codes[:, _DIGITS].view(np.uint32) <= 9).all(axis=1)
+    d = codes[exact].astype(np.int64)
+    dates[rows[exact]] = _to_dates(d[:, 0] * 1000 + d[:, 1] * 100 + d[:, 2] * 10 + d[:, 3],
+                                   d[:, 5] * 10 + d[:, 6], d[:, 8] * 10 + d[:, 9])
+
+    # Blank strings count as missing rather than invalid
+    blank = rows[~exact]
+    present[blank] = _present_text(values[blank])
+    return dates, present
+
+
+def parse_numbers(values) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse numeric values without raising
+
+    Returns:
+        (float64 array with NaN where missing or invalid, present mask)
+    """
+    import pandas as pd
+
+    values = np.asarray(values)
+    if values.dtype.kind in 'iuf':
+        numbers = values.astype(np.float64)
+        present = ~np.isnan(numbers)
+    else:
+        present = ~pd.isna(values)
+        numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').values.astype(np.float64)
+        # Blank strings count as missing rather than invalid
+        failed = np.flatnonzero(present & np.isnan(numbers))
+        present[failed] = [bool(str(value).strip()) for value in values[failed]]
+    numbers[~np.isfinite(numbers)] = np.nan
+    return numbers, present
+
+
+def _present_text(values) -> np.ndarray:
+    """Non-missing, non-blank values"""
+    import pandas as pd
+
+    present = ~pd.isna(values)
+    rows = np.flatnonzero(present)
+    text = values[rows].astype(str)
+    if len(text):
+        chars = text.view(np.uint32).reshape(len(text), -1)
+        present[rows] = ((chars != 0) & (chars != ord(' '))).any(axis=1)
+    return present
+
+
+def _years(dates: np.ndarray) -> np.ndarray:
+    return dates.astype('datetime64[Y]').astype(np.int64) + 1970
+
+
+class ValidationReport:
+    """
+    Validation findings for a contract book
+
+    Findings are stored per check as arrays and turned into messages only
+    when read. valid marks contracts without errors.
+    """
+
+    def __init__(self, contract_ids: np.ndarray, findings: List[Tuple], row_contract: Optional[np.ndarray] = None):
+        """
+        Initialize report
+
+        Args:
+            contract_ids: ID of every contract checked, in book order
+            findings: (code, severity, contracts, periods, message template,
+                template field arrays) per check
+            row_contract: Contract position of every period row (frames only)
+        """
+        self.contract_ids = np.asarray(contract_ids, dtype=object)
+        self.findings = findings
+        self.row_contract = row_contract
+
+        n = len(self.contract_ids)
+        self.error_counts = np.zeros(n, dtype=np.int64)
+        self.warning_counts = np.zeros(n, dtype=np.int64)
+        for _, severity, contracts, _, _, _ in findings:
+            counts = self.error_counts if severity == ERROR else self.warning_counts
+            counts += np.bincount(contracts, minlength=n)
+
+    def __len__(self) -> int:
+        return len(self.contract_ids)
+
+    @property
+    def valid(self) -> np.ndarray:
+        """Contracts without errors"""
+        return self.error_counts == 0
+
+    @property
+    def quarantined(self) -> np.ndarray:
+        """Positions of contracts with errors"""
+        return np.flatnonzero(self.error_counts)
+
+    def issues(self, contracts: Optional[Iterable[int]] = None) -> List[Dict]:
+        """
+        Findings as dicts (contract_id, period, severity, code, message),
+        ordered by contract then period; period 0 is a contract-level finding
+
+        Args:
+            contracts: Only these contract positions (default: all)
+        """
+        wanted = None if contracts is None else np.asarray(list(contracts), dtype=np.int64)
+        issues = []
+        for code, severity, positions, periods, message, fields in self.findings:
+            keep = np.arange(len(positions)) if wanted is None else np.flatnonzero(np.isin(positions, wanted))
+            columns = {name: values[keep].tolist() for name, values in fields.items()}
+            for j, (contract, period) in enumerate(zip(positions[keep].tolist(), periods[keep].tolist())):
+                issues.append({
+                    'contract': contract,
+                    'contract_id': self.contract_ids[contract],
+                    'period': period,
+                    'severity': severity,
+                    'code': code,
+                    'message': message.format(**{name: values[j] for name, values in columns.items()})
+                })
+        issues.sort(key=lambda issue: (issue['contract'], issue['period']))
+        return issues
+
+    def for_contract(self, contract_id) -> List[Dict]:
+        """Findings of the contract with this ID"""
+        return self.issues(np.flatnonzero(self.contract_ids == str(contract_id)))
+
+    def counts(self) -> Dict[str, int]:
+        """Number of findings per code"""
+        counts = {}
+        for code, _, contracts, _, _, _ in self.findings:
+            counts[code] = counts.get(code, 0) + len(contracts)
+        return counts
+
+    def summary(self) -> Dict:
+        return {
+            'contracts': len(self),
+            'valid': int(self.valid.sum()),
+            'quarantined': int((~self.valid).sum()),
+            'errors': int(self.error_counts.sum()),
+            'warnings': int(self.warning_counts.sum()),
+            'by_code': self.counts()
+        }
+
+    def write_csv(self, target) -> int:
+        """Write every finding (REPORT_COLUMNS) to a path or buffer; returns rows written"""
+        import csv
+        from asc606_export import open_text
+
+        issues = self.issues()
+        with open_text(target) as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(REPORT_COLUMNS)
+            writer.writerows([issue['contract_id'], issue['period'] or '', issue['severity'], issue['code'],
+                              issue['message']] for issue in issues)
+        return len(issues)
+
+    @classmethod
+    def concat(cls, reports: List['ValidationReport']) -> 'ValidationReport':
+        """Combine reports of consecutive batches"""
+        bases = np.cumsum([0] + [len(r) for r in reports[:-1]])
+        findings = [(code, severity, contracts + base, periods, message, fields)
+                    for report, base in zip(reports, bases)
+                    for code, severity, contracts, periods, message, fields in report.findings]
+        ids = np.concatenate([r.contract_ids for r in reports]) if reports else np.zeros(0, dtype=object)
+        return cls(ids, findings)
+
+
+def _validate(contract_ids: np.ndarray, contract_columns: Dict[str, np.ndarray],
+              period_columns: Dict[str, np.ndarray], row_contract: np.ndarray) -> List[Tuple]:
+    """
+    Run every check; returns the findings list for ValidationReport
+
+    Args:
+        contract_ids: One ID per contract
+        contract_columns: Raw CONTRACT_COLUMNS values, one per contract (absent optional columns omitted)
+        period_columns: Raw PERIOD_COLUMNS values, one per period row
+        row_contract: Contract position of every period row (non-decreasing)
+    """
+    n = len(contract_ids)
+    findings = []
+
+    def contract_finding(code, severity, mask, message, **fields):
+        contracts = np.flatnonzero(mask)
+        if len(contracts):
+            findings.append((code, severity, contracts, np.zeros(len(contracts), dtype=np.int64), message,
+                             {name: np.asarray(values)[contracts] for name, values in fields.items()}))
+
+    def row_finding(code, severity, mask, message, **fields):
+        rows = np.flatnonzero(mask)
+        if len(rows):
+            findings.append((code, severity, row_contract[rows], period_number[rows], message,
+                             {name: np.asarray(values)[rows] for name, values in fields.items()}))
+
+    n_periods = np.bincount(row_contract, minlength=n)
+    first_row = np.cumsum(n_periods) - n_periods
+    period_number = np.arange(len(row_contract), dtype=np.int64) - first_row[row_contract] + 1
+    contract_finding('no_periods', ERROR, n_periods == 0, 'Contract has no periods')
+
+    # Contract fields
+    contract_finding('missing_value', ERROR, ~_present_text(contract_columns['customer']), 'customer is missing')
+
+    cash, present = parse_numbers(contract_columns['cash_received'])
+    raw = contract_columns['cash_received']
+    contract_finding('missing_value', ERROR, ~present, 'cash_received is missing')
+    contract_finding('bad_number', ERROR, present & np.isnan(cash), "cash_received '{value}' is not a number", value=raw)
+    contract_finding('non_positive_cash', ERROR, cash <= 0, 'cash_received must be positive ({value:,.2f})', value=cash)
+
+    payment, present = parse_dates(contract_columns['payment_date'])
+    raw = contract_columns['payment_date']
+    contract_finding('missing_value', ERROR, ~present, 'payment_date is missing')
+    contract_finding('bad_date', ERROR, present & np.isnat(payment),
+                     "payment_date '{value}' is not a YYYY-MM-DD date", value=raw)
+
+    for column, upper, closed in (('discount_rate', 1, False), ('license_pct', 1, True)):
+        if column not in contract_columns:
+            continue
+        values, present = parse_numbers(contract_columns[column])
+        contract_finding('bad_number', ERROR, present & np.isnan(values),
+                         f"{column} '{{value}}' is not a number", value=contract_columns[column])
+        out = (values < 0) | ((values > upper) if closed else (values >= upper))
+        code = 'bad_rate' if column == 'discount_rate' else 'bad_license_pct'
+        interval = f"[0, {upper}{']' if closed else ')'}"
+        contract_finding(code, ERROR, out, f'{column} {{value}} is outside {interval}', value=values)
+    if 'override_pv' in contract_columns:
+        values, present = parse_numbers(contract_columns['override_pv'])
+        contract_finding('bad_number', ERROR, present & np.isnan(values),
+                         "override_pv '{value}' is not a number", value=contract_columns['override_pv'])
+
+    # Period fields
+    stated, present = parse_numbers(period_columns['stated_amount'])
+    raw = period_columns['stated_amount']
+    row_finding('missing_value', ERROR, ~present, 'stated_amount is missing')
+    row_finding('bad_number', ERROR, present & np.isnan(stated), "stated_amount '{value}' is not a number", value=raw)
+    row_finding('negative_amount', ERROR, stated < 0, 'stated_amount is negative ({value:,.2f})', value=stated)
+
+    dates = {}
+    for column in ('start', 'end'):
+        dates[column], present = parse_dates(period_columns[column])
+        row_finding('missing_value', ERROR, ~present, f'{column} is missing')
+        row_finding('bad_date', ERROR, present & np.isnat(dates[column]),
+                    f"{column} '{{value}}' is not a YYYY-MM-DD date", value=period_columns[column])
+    start, end = dates['start'], dates['end']
+    row_finding('end_before_start', ERROR, end < start, 'end {end} is before start {start}', start=start, end=end)
+
+    # Each period must start after the previous one ends
+    same = np.r_[False, row_contract[1:] == row_contract[:-1]]
+    previous_start = np.r_[np.datetime64('NaT', 'D'), start[:-1]]
+    previous_end = np.r_[np.datetime64('NaT', 'D'), end[:-1]]
+    out_of_order = same & (start < previous_start)
+    row_finding('period_out_of_order', ERROR, out_of_order, 'start {start} is before the previous period starts ({previous})',
+                start=start, previous=previous_start)
+    row_finding('period_overlap', ERROR, same & ~out_of_order & (start <= previous_end),
+                'start {start} is on or before the previous period ends ({previous})',
+                start=start, previous=previous_end)
+
+    # Unrealistic years are errors; past years (as in the web app) are warnings
+    for column, values, finding in (('payment_date', payment, contract_finding),
+                                    ('start', start, row_finding), ('end', end, row_finding)):
+        years = _years(values)
+        valid = ~np.isnat(values)
+        finding('year_unrealistic', ERROR, valid & ((years < MIN_YEAR) | (years > MAX_YEAR)),
+                f'{column} year {{year}} is outside {MIN_YEAR}-{MAX_YEAR}', year=years)
+    years = _years(start)
+    row_finding('year_past', WARNING, ~np.isnat(start) & (years >= MIN_YEAR) & (years < PAST_YEAR),
+                f'Period starts in {{year}}, before {PAST_YEAR}', year=years)
+
+    # Cash versus stated total (only when every stated amount parsed)
+    stated_total = np.bincount(row_contract, np.nan_to_num(stated), minlength=n)
+    stated_ok = np.bincount(row_contract, np.isnan(stated), minlength=n) == 0
+    contract_finding('cash_above_stated', WARNING, stated_ok & (n_periods > 0) & (cash > stated_total * (1 + CASH_ABOVE_STATED)),
+                     f'cash_received ({{cash:,.2f}}) is more than {CASH_ABOVE_STATED:.0%} above the stated total '
+                     f'({{stated:,.2f}})', cash=cash, stated=stated_total)
+    return findings
+
+
+def _contract_runs(ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(first row of every run of equal IDs, run position of every row)"""
+    boundary = np.r_[True, ids[1:] != ids[:-1]] if len(ids) else np.zeros(0, dtype=bool)
+    return np.flatnonzero(boundary), np.cumsum(boundary) - 1
+
+
+@instrumented('validation.validate_frame', rows=lambda _, report: len(report))
+def validate_frame(frame: 'pd.DataFrame') -> ValidationReport:
+    """
+    Validate period rows in the loader layout (one row per service period,
+    each contract's rows adjacent)
+
+    Args:
+        frame: DataFrame with the asc606_loader columns
+
+    Returns:
+        ValidationReport with one entry per run of rows sharing a contract_id
+    """
+    import pandas as pd
+    from asc606_loader import REQUIRED_COLUMNS
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Contract file is missing columns: {', '.join(missing)}")
+
+    raw_ids = frame['contract_id'].values
+    ids = frame['contract_id'].astype(str).values
+    first_row, row_contract = _contract_runs(ids)
+    contract_ids = ids[first_row]
+    contract_columns = {column: frame[column].values[first_row] for column in CONTRACT_COLUMNS if column in frame.columns}
+    period_columns = {column: frame[column].values for column in PERIOD_COLUMNS}
+    findings = _validate(contract_ids, contract_columns, period_columns, row_contract)
+    n = len(contract_ids)
+
+    def contract_finding(code, mask, message, **fields):
+        contracts = np.flatnonzero(mask)
+        if len(contracts):
+            findings.append((code, ERROR, contracts, np.zeros(len(contracts), dtype=np.int64), message,
+                             {name: np.asarray(values)[contracts] for name, values in fields.items()}))
+
+    contract_finding('missing_value', ~_present_text(raw_ids[first_row]), 'contract_id is missing')
+
+    # The loader takes contract fields from a contract's first row
+    for column in contract_columns:
+        values = frame[column].values
+        first = values[first_row][row_contract]
+        missing = pd.isna(values)
+        differs = (values != first) & ~(missing & pd.isna(first))
+        contract_finding('inconsistent_contract', np.bincount(row_contract[differs], minlength=n) > 0,
+                         f"{column} differs between the contract's rows")
+
+    contract_finding('split_contract', pd.Series(contract_ids).duplicated(keep=False).values,
+                     'Rows for this contract_id are not adjacent')
+    return ValidationReport(contract_ids, findings, row_contract=row_contract)
+
+
+@instrumented('validation.validate_contracts', rows=lambda _, report: len(report))
+def validate_contracts(contracts: Iterable[Dict]) -> ValidationReport:
+    """
+    Validate contract_data dicts (the ASC606FinancingAnalyzer format)
+
+    Contracts without a 'contract_id' are identified by position, as in
+    ContractBook.from_contracts().
+    """
+    contracts = list(contracts)
+    contract_ids = np.array([str(c.get('contract_id', i)) if isinstance(c, dict) else str(i)
+                             for i, c in enumerate(contracts)], dtype=object)
+    contracts = [c if isinstance(c, dict) else {} for c in contracts]
+
+    contract_columns = {column: np.array([c.get(column) for c in contracts] + [None], dtype=object)[:-1]
+                        for column in CONTRACT_COLUMNS}
+    period_lists = [c.get('periods') if isinstance(c.get('periods'), list) else [] for c in contracts]
+    periods = [p if isinstance(p, dict) else {} for ps in period_lists for p in ps]
+    period_columns = {column: np.array([p.get(column) for p in periods] + [None], dtype=object)[:-1]
+                      for column in PERIOD_COLUMNS}
+    row_contract = np.repeat(np.arange(len(contracts), dtype=np.int64), [len(ps) for ps in period_lists])
+
+    return ValidationReport(contract_ids, _validate(contract_ids, contract_columns, period_columns, row_contract))
+
+
+def split_contracts(contracts: List[Dict], report: ValidationReport) -> Tuple[List[Dict], List[Dict]]:
+    """(valid contracts, quarantined contracts) in their original order"""
+    valid = report.valid
+    return ([c for c, ok in zip(contracts, valid) if ok],
+            [c for c, ok in zip(contracts, valid) if not ok])
+
+
+def split_frame(frame: 'pd.DataFrame', report: ValidationReport) -> Tuple['pd.DataFrame', 'pd.DataFrame']:
+    """(rows of valid contracts, rows of quarantined contracts) of a validated frame"""
+    keep = report.valid[report.row_contract]
+    return frame[keep], frame[~keep]
+
+
+class Quarantine:
+    """
+    Collects invalid contracts while a contract file is streamed
+
+    Pass to asc606_loader.iter_contract_books(quarantine=...): every batch is
+    validated before it becomes a ContractBook, and the rows of contracts
+    with errors are held here instead.
+    """
+
+    def __init__(self):
+        self.reports = []
+        self.frames = []
+
+    def filter(self, frame: 'pd.DataFrame') -> 'pd.DataFrame':
+        """Validate frame; keep its invalid rows and return the valid ones"""
+        report = validate_frame(frame)
+        valid, quarantined = split_frame(frame, report)
+        self.reports.append(report)
+        if len(quarantined):
+            self.frames.append(quarantined)
+        return valid
+
+    @property
+    def report(self) -> ValidationReport:
+        """Combined report of every batch so far"""
+        return ValidationReport.concat(self.reports)
+
+    @property
+    def contracts(self) -> int:
+        """Number of contracts quarantined so far"""
+        return sum(int((~report.valid).sum()) for report in self.reports)
+
+    def write_csv(self, target) -> int:
+        """Write the quarantined rows (loader layout) to a path or buffer; returns rows written"""
+        import pandas as pd
+        from asc606_export import open_text
+
+        rows = pd.concat(self.frames, ignore_index=True) if self.frames else pd.DataFrame()
+        with open_text(target) as f:
+            rows.to_csv(f, index=False, lineterminator='\n')
+        return len(rows)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Import-time regression check
+
+Imports each module in a fresh interpreter and fails if it pulls in a heavy
+dependency it should not need, or if the import takes longer than its budget.
+The calculation core must import with the standard library only; the batch
+modules may add NumPy; pandas and openpyxl load only when an export runs.
+
+Usage:
+    python benchmarks/check_import_time.py
+    python benchmarks/check_import_time.py --budget-scale 2   # slower CI boxes
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module: (forbidden modules, budget in milliseconds)
+CHECKS = {
+    'asc606_analyzer_production': (('pandas', 'numpy', 'openpyxl'), 50),
+    'asc606_export': (('pandas', 'numpy', 'openpyxl'), 60),
+    'asc606_instrument': (('pandas', 'numpy', 'openpyxl'), 30),
+    'asc606_effective_interest': (('pandas', 'openpyxl'), 250),
+    'asc606_portfolio': (('pandas', 'openpyxl'), 250),
+    'asc606_parallel': (('pandas', 'openpyxl'), 300),
+    'asc606_loader': (('pandas', 'openpyxl'), 300),
+}
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{'ms': elapsed, 'loaded': [m for m in {forbidden!r} if m in sys.modules]}}))
+'''
+
+
+def measure(module: str, forbidden, repeats: int = 3) -> dict:
+    """Best-of-N import time of module in a fresh interpreter"""
+    best = None
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(module=module, forbidden=tuple(forbidden))],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output)
+        if best is None or result['ms'] < best['ms']:
+            best = result
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='Multiply every time budget')
+    parser.add_argument('--repeats', type=int, default=3, help='Fresh interpreters per module (best time wins)')
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for module, (forbidden, budget_ms) in CHECKS.items():
+        result = measure(module, forbidden, args.repeats)
+        budget = budget_ms * args.budget_scale
+        problems = []
+        if result['loaded']:
+            problems.append(f"imports {', '.join(result['loaded'])}")
+        if result['ms'] > budget:
+            problems.append(f"over budget ({budget:.0f} ms)")
+        status = 'FAIL' if problems else 'ok'
+        print(f"{status:<5} {module:<30} {result['ms']:7.1f} ms  {'; '.join(problems)}")
+        failures += bool(problems)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Load test for asc606_server
+
+Sends the Deka Bank contract to a running server (or one it starts with
+--spawn) from many concurrent keep-alive connections, then reports
+throughput and latency percentiles. With --batch N each request posts N
+contracts to /analyze/batch and reads the streamed NDJSON to the end.
+
+Usage:
+    python benchmarks/load_test.py --spawn --workers 4 --requests 2000 --concurrency 16
+    python benchmarks/load_test.py --port 8606 --batch 100 --no-exports --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEKA_REQUEST = {
+    'contract_data': {
+        'customer': 'Deka Bank',
+        'cash_received': 2_100_000,
+        'payment_date': '2025-12-31',
+        'periods': [
+            {'start': '2025-12-31', 'end': '2026-12-30', 'stated_amount': 420_000},
+            {'start': '2026-12-31', 'end': '2027-12-30', 'stated_amount': 420_000},
+            {'start': '2027-12-31', 'end': '2028-12-30', 'stated_amount': 420_000},
+            {'start': '2028-12-31', 'end': '2029-12-30', 'stated_amount': 420_000},
+            {'start': '2029-12-31', 'end': '2030-12-30', 'stated_amount': 420_000}
+        ]
+    },
+    'discount_rate': 0.06,
+    'license_pct': 0.20
+}
+
+
+async def _read_response(reader: asyncio.StreamReader):
+    """Read one HTTP/1.1 response; returns (status, body bytes)"""
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding') == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            chunk = await reader.readexactly(size + 2)
+            if not size:
+                break
+            chunks.append(chunk[:-2])
+        return status, b''.join(chunks)
+    return status, await reader.readexactly(int(headers.get('content-length', 0)))
+
+
+async def _client(host: str, port: int, path: str, body: bytes, queue: asyncio.Queue,
+                  latencies: list, failures: list):
+    reader, writer = await asyncio.open_connection(host, port)
+    request = (f'POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+               f'Content-Length: {len(body)}\r\n\r\n').encode() + body
+    try:
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            writer.write(request)
+            status, data = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            lines = data.splitlines() if path.endswith('/batch') else [data]
+            if status != 200 or any(not json.loads(line)['success'] for line in lines):
+                failures.append(status)
+    finally:
+        writer.close()
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return float('nan')
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+async def run_load(host: str, port: int, requests: int, concurrency: int, batch: int, exports) -> dict:
+    """Fire requests from concurrency connections; returns the summary dict"""
+    request = dict(DEKA_REQUEST, exports=list(exports))
+    if batch:
+        path, body = '/analyze/batch', json.dumps({'contracts': [request] * batch}).encode()
+    else:
+        path, body = '/analyze', json.dumps(request).encode()
+
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+    latencies, failures = [], []
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, path, body, queue, latencies, failures)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'endpoint': path,
+        'requests': len(latencies),
+        'contracts': len(latencies) * (batch or 1),
+        'failures': len(failures),
+        'concurrency': concurrency,
+        'exports': list(exports),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+        'contracts_per_second': len(latencies) * (batch or 1) / elapsed,
+        'latency_ms': {
+            'p50': percentile(latencies, 50) * 1000,
+            'p90': percentile(latencies, 90) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': max(latencies) * 1000 if latencies else float('nan'),
+        },
+    }
+
+
+def _spawn_server(port: int, workers):
+    command = [sys.executable, os.path.join(REPO_ROOT, 'asc606_server.py'), '--port', str(port)]
+    if workers:
+        command += ['--workers', str(workers)]
+    process = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True)
+    # The server prints its banner once the workers are warm
+    process.stdout.readline()
+    return process
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8606)
+    parser.add_argument('--requests', type=int, default=1000, help='Total requests')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent keep-alive connections')
+    parser.add_argument('--batch', type=int, default=0, help='Contracts per /analyze/batch request (0: /analyze)')
+    parser.add_argument('--no-exports', action='store_true', help='Skip the Excel and CSV buffers')
+    parser.add_argument('--spawn', action='store_true', help='Start a server for the duration of the test')
+    parser.add_argument('--workers', type=int, help='Worker processes for --spawn')
+    parser.add_argument('--output', help='Write the summary JSON here')
+    args = parser.parse_args(argv)
+
+    server = _spawn_server(args.port, args.workers) if args.spawn else None
+    try:
+        exports = () if args.no_exports else ('excel', 'csv')
+        summary = asyncio.run(run_load(args.host, args.port, args.requests, args.concurrency, args.batch, exports))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latency = summary['latency_ms']
+    print(f"{summary['endpoint']}: {summary['requests']} requests ({summary['contracts']} contracts), "
+          f"{summary['failures']} failed, {summary['seconds']:.2f} s")
+    print(f"  throughput  {summary['requests_per_second']:8.1f} req/s  {summary['contracts_per_second']:8.1f} contracts/s")
+    print(f"  latency     p50 {latency['p50']:.1f} ms  p90 {latency['p90']:.1f} ms  "
+          f"p99 {latency['p99']:.1f} ms  max {latency['max']:.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f'✓ Wrote {args.output}')
+    return 1 if summary['failures'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
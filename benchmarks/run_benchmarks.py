@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Analysis and export benchmarks
+
+Times every analysis stage and the Excel/CSV exports on synthetic books of
+1, 1k and 100k contracts with 5, 60 and 600 periods each, and records the
+peak traced memory of every stage. Books up to --max-analyzer-contracts run
+through ASC606FinancingAnalyzer (one analyzer per contract, stage by stage
+across the book); every book also runs through PortfolioAnalyzer.
+
+Results are written as JSON. Save a run as the baseline, then compare later
+runs against it; the compare exits non-zero when a stage gets slower (or
+uses more memory) than the baseline by more than the threshold.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json --threshold 0.25
+    python benchmarks/run_benchmarks.py --contracts 1 1000 --periods 5 60   # quick run
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from asc606_analyzer_production import ASC606FinancingAnalyzer  # noqa: E402
+from asc606_export import write_analysis_workbook, write_journal_entries_csv, write_portfolio_workbook  # noqa: E402
+from asc606_portfolio import ContractBook, PortfolioAnalyzer  # noqa: E402
+
+
+CONTRACT_COUNTS = (1, 1_000, 100_000)
+PERIOD_COUNTS = (5, 60, 600)
+
+STAGES = ('calculate_present_value', 'allocate_transaction_price',
+          'build_amortization_schedule', 'generate_journal_entries')
+EXPORTS = ('export_excel', 'export_csv')
+
+# Excel sheets hold at most 1,048,576 rows
+EXCEL_MAX_ROWS = 1_048_576
+# Per-contract schedule sheets only for small books (openpyxl title checks are quadratic)
+SCHEDULE_SHEETS_MAX_CONTRACTS = 100
+
+
+def synthetic_book(n_contracts: int, n_periods: int, seed: int = 0) -> ContractBook:
+    """
+    Deterministic book of n_contracts annual-period contracts
+
+    Each contract is paid upfront on a date in 2025 and covers n_periods
+    consecutive 365-day periods with a level stated amount; about a third
+    were collected at a 5% discount to the stated total.
+    """
+    rng = np.random.default_rng(seed)
+    payment = np.datetime64('2025-01-01') + rng.integers(0, 365, n_contracts).astype('timedelta64[D]')
+    amount = np.round(rng.uniform(10_000, 500_000, n_contracts), 2)
+    discount = np.where(rng.random(n_contracts) < 1 / 3, 0.95, 1.0)
+
+    period_contract = np.repeat(np.arange(n_contracts), n_periods)
+    offset = np.tile(np.arange(n_periods), n_contracts) * 365
+    start = payment[period_contract] + offset.astype('timedelta64[D]')
+
+    return ContractBook(
+        contract_ids=[f'SYN-{i:06d}' for i in range(n_contracts)],
+        customers=[f'Customer {i % 997}' for i in range(n_contracts)],
+        cash_received=np.round(amount * n_periods * discount, 2),
+        payment_date=payment,
+        n_periods=np.full(n_contracts, n_periods),
+        period_start=start,
+        period_end=start + np.timedelta64(364, 'D'),
+        stated_amount=amount[period_contract],
+    )
+
+
+def _analyzer_stages(book: ContractBook):
+    """(stage, callable) pairs running each stage across per-contract analyzers"""
+    analyzers = [ASC606FinancingAnalyzer(book.contract_data(i)) for i in range(len(book))]
+
+    def stage(name):
+        return lambda: [getattr(a, name)() for a in analyzers]
+
+    steps = [(name, stage(name)) for name in STAGES]
+    # Summary rows come from analyze(); untimed, as the stages already ran
+    steps.append((None, lambda: [a.analyze() for a in analyzers]))
+    return analyzers, steps
+
+
+def _portfolio_stages(book: ContractBook):
+    """(stage, callable) pairs running each stage on one PortfolioAnalyzer"""
+    portfolio = PortfolioAnalyzer(book)
+    return portfolio, [(name, getattr(portfolio, name)) for name in STAGES]
+
+
+def _export_steps(sources, n_contracts: int, journal_rows: int, workdir: str):
+    """(stage, callable) pairs for the exports; None where Excel cannot hold the output"""
+    csv_path = os.path.join(workdir, 'journal_entries.csv')
+    xlsx_path = os.path.join(workdir, 'analysis.xlsx')
+
+    if isinstance(sources, list) and n_contracts == 1:
+        excel = lambda: write_analysis_workbook(xlsx_path, sources[0].results)  # noqa: E731
+        excel_rows = journal_rows
+    else:
+        schedule_sheets = n_contracts <= SCHEDULE_SHEETS_MAX_CONTRACTS
+        excel = lambda: write_portfolio_workbook(xlsx_path, sources, schedule_sheets=schedule_sheets)  # noqa: E731
+        excel_rows = n_contracts
+    return [
+        ('export_excel', excel if excel_rows < EXCEL_MAX_ROWS else None),
+        ('export_csv', lambda: write_journal_entries_csv(csv_path, sources)),
+    ]
+
+
+def _run_once(engine: str, book: ContractBook, workdir: str, trace_memory: bool) -> dict:
+    """Run every stage and export once; returns {stage: seconds or peak bytes}"""
+    if engine == 'analyzer':
+        sources, steps = _analyzer_stages(book)
+    else:
+        sources, steps = _portfolio_stages(book)
+    journal_rows = int(2 * book.n_periods.sum() + 2 * len(book))
+
+    measured = {}
+    for name, step in steps + _export_steps(sources, len(book), journal_rows, workdir):
+        if name is None:
+            step()
+            continue
+        if step is None:
+            measured[name] = None
+            continue
+        gc.collect()
+        if trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            step()
+            measured[name] = tracemalloc.get_traced_memory()[1] - base
+        else:
+            start = time.perf_counter()
+            step()
+            measured[name] = time.perf_counter() - start
+    return measured
+
+
+def run_case(engine: str, n_contracts: int, n_periods: int, repeats: int, trace_memory: bool) -> dict:
+    """Best-of-repeats time and peak memory for every stage of one case"""
+    book = synthetic_book(n_contracts, n_periods)
+    with tempfile.TemporaryDirectory() as workdir:
+        runs = [_run_once(engine, book, workdir, trace_memory=False) for _ in range(repeats)]
+        peaks = {}
+        if trace_memory:
+            tracemalloc.start()
+            try:
+                peaks = _run_once(engine, book, workdir, trace_memory=True)
+            finally:
+                tracemalloc.stop()
+
+    stages = {}
+    for name in STAGES + EXPORTS:
+        if runs[0][name] is None:
+            stages[name] = {'skipped': 'output exceeds the Excel row limit'}
+            continue
+        stages[name] = {'seconds': min(run[name] for run in runs)}
+        if trace_memory:
+            stages[name]['peak_bytes'] = peaks[name]
+    return {'engine': engine, 'contracts': n_contracts, 'periods': n_periods, 'stages': stages}
+
+
+def run_suite(contract_counts, period_counts, repeats: int = 3, trace_memory: bool = True,
+              max_analyzer_contracts: int = 1_000, max_period_rows: int = 10_000_000) -> dict:
+    """Run every engine x book size; returns the JSON-ready results document"""
+    cases = {}
+    for n_contracts in contract_counts:
+        for n_periods in period_counts:
+            for engine in ('analyzer', 'portfolio'):
+                key = f'{engine}/{n_contracts}x{n_periods}'
+                if engine == 'analyzer' and n_contracts > max_analyzer_contracts:
+                    continue
+                if n_contracts * n_periods > max_period_rows:
+                    cases[key] = {'engine': engine, 'contracts': n_contracts, 'periods': n_periods,
+                                  'skipped': f'more than {max_period_rows:,} period rows (--max-period-rows)'}
+                    print(f'skip  {key}')
+                    continue
+                cases[key] = run_case(engine, n_contracts, n_periods, repeats, trace_memory)
+                print(f'done  {key}')
+                print_case(cases[key])
+
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeats': repeats,
+        },
+        'cases': cases,
+    }
+
+
+def print_case(case: dict):
+    for name, stage in case['stages'].items():
+        if 'skipped' in stage:
+            print(f'      {name:<30} skipped')
+            continue
+        memory = f"{stage['peak_bytes'] / 2**20:9.1f} MiB" if 'peak_bytes' in stage else ''
+        print(f"      {name:<30} {stage['seconds'] * 1000:10.1f} ms {memory}")
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_seconds: float,
+            memory_threshold: float, min_bytes: int) -> int:
+    """Print stage-by-stage changes; returns the number of regressions"""
+    regressions = 0
+    for key, case in current['cases'].items():
+        base_case = baseline['cases'].get(key)
+        if 'stages' not in case or not base_case or 'stages' not in base_case:
+            continue
+        for name, stage in case['stages'].items():
+            base = base_case['stages'].get(name, {})
+            if 'seconds' not in stage or 'seconds' not in base:
+                continue
+            problems = []
+            seconds, base_seconds = stage['seconds'], base['seconds']
+            if seconds > base_seconds * (1 + threshold) and seconds - base_seconds > min_seconds:
+                problems.append('time')
+            if 'peak_bytes' in stage and 'peak_bytes' in base:
+                peak, base_peak = stage['peak_bytes'], base['peak_bytes']
+                if peak > base_peak * (1 + memory_threshold) and peak - base_peak > min_bytes:
+                    problems.append('memory')
+            ratio = seconds / base_seconds if base_seconds else float('inf')
+            status = 'FAIL' if problems else 'ok'
+            print(f"{status:<5} {key:<24} {name:<30} {base_seconds * 1000:10.1f} -> {seconds * 1000:10.1f} ms "
+                  f"({ratio:5.2f}x) {' '.join(problems)}")
+            regressions += bool(problems)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--contracts', type=int, nargs='+', default=CONTRACT_COUNTS, help='Book sizes')
+    parser.add_argument('--periods', type=int, nargs='+', default=PERIOD_COUNTS, help='Periods per contract')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed runs per case (best time wins)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--max-analyzer-contracts', type=int, default=1_000,
+                        help='Largest book run through per-contract analyzers')
+    parser.add_argument('--max-period-rows', type=int, default=10_000_000,
+                        help='Skip books with more period rows than this')
+    parser.add_argument('--output', help='Write results JSON here (e.g. a new baseline)')
+    parser.add_argument('--compare', metavar='BASELINE', help='Fail on regressions against this results JSON')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown (0.25 = 25%%)')
+    parser.add_argument('--min-seconds', type=float, default=0.005, help='Ignore slowdowns smaller than this')
+    parser.add_argument('--memory-threshold', type=float, default=0.25, help='Allowed peak memory growth')
+    parser.add_argument('--min-bytes', type=int, default=1 << 20, help='Ignore memory growth smaller than this')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.contracts, args.periods, args.repeats, not args.no_memory,
+                        args.max_analyzer_contracts, args.max_period_rows)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'✓ Wrote {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds,
+                              args.memory_threshold, args.min_bytes)
+        if regressions:
+            print(f'{regressions} stage(s) regressed past the threshold')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""Tests for asc606_consolidation"""
+
+import csv
+import io
+import os
+import sys
+from collections import defaultdict
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from asc606_consolidation import consolidate_journal  # noqa: E402
+from asc606_portfolio import PortfolioAnalyzer  # noqa: E402
+from run_benchmarks import synthetic_book  # noqa: E402
+
+
+def test_every_written_journal_balances():
+    portfolio = PortfolioAnalyzer(synthetic_book(3000, 5))
+    consolidated = consolidate_journal(portfolio, dimensions=('customer',))
+    assert consolidated.balanced
+
+    target = io.StringIO()
+    consolidated.write_csv(target)
+    totals = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    for row in csv.DictReader(io.StringIO(target.getvalue())):
+        totals[row['External ID']][0] += Decimal(row['Debit'] or 0)
+        totals[row['External ID']][1] += Decimal(row['Credit'] or 0)
+    unbalanced = [journal for journal, (debit, credit) in totals.items() if debit != credit]
+    assert len(totals) == consolidated.n_journals
+    assert unbalanced == []
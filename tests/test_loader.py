@@ -0,0 +1,29 @@
+"""Tests for asc606_loader"""
+
+import pytest
+
+from asc606_loader import iter_contract_books
+
+HEADER = 'contract_id,customer,cash_received,payment_date,start,end,stated_amount\n'
+
+
+def _row(contract_id: str, start: str, end: str) -> str:
+    return f'{contract_id},Customer {contract_id},1000,2025-01-01,{start},{end},500\n'
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 100])
+def test_split_contract_is_rejected(tmp_path, chunk_rows):
+    path = tmp_path / 'book.csv'
+    path.write_text(HEADER + _row('A', '2025-01-01', '2025-12-31') + _row('B', '2025-01-01', '2025-12-31')
+                    + _row('A', '2026-01-01', '2026-12-31'))
+    with pytest.raises(ValueError, match="'A'"):
+        list(iter_contract_books(str(path), batch_size=1, chunk_rows=chunk_rows))
+
+
+def test_adjacent_rows_across_chunks_load_once(tmp_path):
+    path = tmp_path / 'book.csv'
+    path.write_text(HEADER + _row('A', '2025-01-01', '2025-12-31') + _row('A', '2026-01-01', '2026-12-31')
+                    + _row('B', '2025-01-01', '2025-12-31'))
+    books = list(iter_contract_books(str(path), batch_size=10, chunk_rows=1))
+    assert [book.contract_ids.tolist() for book in books] == [['A', 'B']]
+    assert books[0].n_periods.tolist() == [2, 1]
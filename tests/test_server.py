@@ -0,0 +1,53 @@
+"""Tests for asc606_server request handling"""
+
+import asyncio
+import json
+
+from asc606_server import AnalysisServer, _WARMUP_REQUEST, analyze_request
+
+
+async def _post(port: int, path: str, payload) -> bytes:
+    body = json.dumps(payload).encode()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(b'POST %s HTTP/1.1\r\nContent-Length: %d\r\nConnection: close\r\n\r\n'
+                 % (path.encode(), len(body)) + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def _serve(*requests):
+    """Start a one-worker server, post (path, payload) requests, return raw responses"""
+    async def run():
+        server = AnalysisServer(port=0, workers=1)
+        await server.start()
+        try:
+            return [await asyncio.wait_for(_post(server.port, path, payload), 60) for path, payload in requests]
+        finally:
+            server.close()
+    return asyncio.run(run())
+
+
+def test_malformed_exports_is_bad_request():
+    for exports in (5, None, {'csv': True}, ['csv', 1]):
+        status, response = analyze_request({**_WARMUP_REQUEST, 'exports': exports})
+        assert status == 400 and not response['success']
+
+    response, = _serve(('/analyze', {**_WARMUP_REQUEST, 'exports': 5}))
+    assert response.startswith(b'HTTP/1.1 400 ')
+    assert json.loads(response.split(b'\r\n\r\n', 1)[1])['success'] is False
+
+
+def test_batch_with_one_bad_contract_completes():
+    contracts = [_WARMUP_REQUEST, {**_WARMUP_REQUEST, 'exports': 5},
+                 {'contract_data': {'customer': 'Broken'}}, _WARMUP_REQUEST]
+    response, = _serve(('/analyze/batch', {'exports': [], 'contracts': contracts}))
+    assert response.startswith(b'HTTP/1.1 200 ')
+    assert response.endswith(b'0\r\n\r\n')
+
+    # Chunked body: size line, then a chunk holding one NDJSON line
+    chunks = response.split(b'\r\n\r\n', 1)[1].split(b'\r\n')
+    lines = [json.loads(chunk) for chunk in chunks[1::2] if chunk]
+    results = {line['index']: line['success'] for line in lines}
+    assert results == {0: True, 1: False, 2: False, 3: True}